@@ -1,10 +1,19 @@
 import os
-import json
+import sys
 import argparse
 import requests
 from dotenv import load_dotenv
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.govee_pool import DEFAULT_WORKERS, fan_out, make_session
+from utils.govee_effects import EFFECTS, FrameScheduler
+from utils.govee_groups import GROUPS_FILE, GroupConfig, load_groups, resolve
+from utils.govee_queue import CommandQueue, QuotaStore
+from utils.govee_registry import DeviceRegistry
+from utils.govee_state import COMMAND_FIELDS, DeviceStateMirror, parse_v1_properties
 
 # ──────────────────────────────────────────────────────────────
 # 🌙 Load environment variables
@@ -27,6 +36,15 @@ HEADERS: Dict[str, str] = {
     "Content-Type": "application/json"
 }
 
+# Shared keep-alive session: every command reuses a pooled connection
+SESSION: requests.Session = make_session(HEADERS, pool_size=DEFAULT_WORKERS)
+
+# Per-device and per-key quota usage, persisted in ~/.cache/govee_quota.json
+QUOTA: QuotaStore = QuotaStore(API_KEY)
+
+# Last known power/brightness/color per device, persisted in ~/.cache/govee_state.json
+STATE: DeviceStateMirror = DeviceStateMirror(quota=QUOTA)
+
 # ──────────────────────────────────────────────────────────────
 # 🌈 Themed RGB color presets with effects
 # ──────────────────────────────────────────────────────────────
@@ -124,34 +142,35 @@ COLOR_PRESETS: Dict[str, Dict[str, Any]] = {
 # ──────────────────────────────────────────────────────────────
 # 📦 Device management
 # ──────────────────────────────────────────────────────────────
-def get_devices(refresh: bool = False) -> List[Dict[str, Any]]:
-    """
-    Retrieve devices from cache or Govee API.
-    Cache is saved in ~/.cache/govee_devices.json and reused unless refresh=True.
-    """
-    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-    # Try reading from cache first
-    if CACHE_FILE.exists() and not refresh:
-        try:
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                devices = json.load(f)
-                if devices:
-                    return devices
-        except json.JSONDecodeError:
-            print("⚠️ Cache corrupted, refetching from API...")
-
+def fetch_devices() -> Optional[List[Dict[str, Any]]]:
+    """Fetch the device list from the Govee API. Returns None on failure."""
     print("🔄 Fetching devices from Govee API...")
-    response = requests.get(f"{BASE_URL}/devices", headers=HEADERS)
+    try:
+        response = SESSION.get(f"{BASE_URL}/devices")
+    except requests.RequestException as e:
+        print(f"⚠️ Error retrieving devices: {e}")
+        return None
+
     if response.status_code == 200:
-        devices = response.json().get("data", {}).get("devices", [])
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(devices, f, indent=2)
-        return devices
+        return response.json().get("data", {}).get("devices", [])
 
     print(f"⚠️ Error retrieving devices: {response.status_code}")
     print(response.text)
-    return []
+    return None
+
+
+# Devices indexed by name/ID/model, cached in ~/.cache/govee_devices.json
+REGISTRY: DeviceRegistry = DeviceRegistry(fetch_devices, CACHE_FILE)
+
+
+def get_devices(refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Retrieve devices from the registry.
+    The cache is refreshed synchronously when empty or refresh=True, and in the
+    background once it is older than the registry TTL.
+    """
+    REGISTRY.ensure_fresh(force=refresh)
+    return REGISTRY.devices
 
 # ──────────────────────────────────────────────────────────────
 # 📋 Pretty-print devices
@@ -173,54 +192,241 @@ def print_device_table(devices: List[Dict[str, Any]]) -> None:
         print(f"{name:25} {model:15} {device_id}")
     print("=" * 60)
 
+def print_group_table(groups: GroupConfig) -> None:
+    """Pretty-print the rooms and scenes defined in the groups file."""
+    if not groups.rooms and not groups.scenes:
+        print(f"No groups defined. Add rooms and scenes to {GROUPS_FILE}")
+        return
+
+    print("\n🏠 Rooms")
+    print("=" * 60)
+    for name in sorted(groups.rooms):
+        print(f"{name:25} {', '.join(groups.rooms[name])}")
+    print("\n🎬 Scenes")
+    print("=" * 60)
+    for name in sorted(groups.scenes):
+        settings = groups.scenes[name]
+        details = " ".join(f"{k}={settings[k]}" for k in ("state", "color", "brightness") if k in settings)
+        print(f"{name:25} {settings.get('room', 'all')}: {details}")
+    print("=" * 60)
+
 # ──────────────────────────────────────────────────────────────
 # 💡 Device control
 # ──────────────────────────────────────────────────────────────
-def control_device(device: Dict[str, Any], action: str, effect: Optional[str] = None) -> None:
+def build_command(device: Dict[str, Any], action: str, effect: Optional[Any] = None) -> Optional[Dict[str, Any]]:
     """
-    Send control command to a specific device.
+    Build the Govee `cmd` body for an action, or None if the action is invalid.
     - action: 'on', 'off', 'color', or 'brightness'
     - effect: color name or brightness value (int)
     """
     name = device.get("deviceName", "unknown")
-    device_id = device.get("device")
-    model = device.get("model")
 
-    if not device_id or not model:
+    if not device.get("device") or not device.get("model"):
         print(f"⚠️ Skipping {name}: missing device ID or model")
-        return
-
-    cmd: Dict[str, Any]
+        return None
 
     # Handle power state
     if action in ["on", "off"]:
-        cmd = {"name": "turn", "value": action}
+        return {"name": "turn", "value": action}
 
     # Handle color presets
-    elif action == "color" and effect in COLOR_PRESETS:
+    if action == "color" and effect in COLOR_PRESETS:
         preset = COLOR_PRESETS[effect]
-        cmd = {"name": "color", "value": {"r": preset["r"], "g": preset["g"], "b": preset["b"]}}
-
-        # Optional: trigger any special "effect" behavior
-        if preset.get("effect"):
-            print(f"✨ {name}: activating {effect} ({preset['effect']}) mode")
+        return {"name": "color", "value": {"r": preset["r"], "g": preset["g"], "b": preset["b"]}}
 
     # Handle brightness
-    elif action == "brightness" and isinstance(effect, int):
-        cmd = {"name": "brightness", "value": max(0, min(effect, 100))}
+    if action == "brightness" and isinstance(effect, int):
+        return {"name": "brightness", "value": max(0, min(effect, 100))}
 
-    else:
-        print(f"⚠️ No valid payload for {name} ({action})")
-        return
+    print(f"⚠️ No valid payload for {name} ({action})")
+    return None
 
-    payload = {"device": device_id, "model": model, "cmd": cmd}
-    response = requests.put(f"{BASE_URL}/devices/control", headers=HEADERS, json=payload)
+
+def send_command(device: Dict[str, Any], cmd: Dict[str, Any], label: str,
+                 session: Optional[requests.Session] = None) -> Optional[requests.Response]:
+    """PUT one command to Govee. Returns the response, or None on a network error."""
+    name = device.get("deviceName", "unknown")
+    payload = {"device": device["device"], "model": device["model"], "cmd": cmd}
+    try:
+        response = (session or SESSION).put(f"{BASE_URL}/devices/control", json=payload)
+    except requests.RequestException as e:
+        print(f"⚠️ Error controlling {name} ({label}): {e}")
+        return None
 
     if response.status_code == 200:
-        print(f"✅ {name}: {action} {effect if effect else ''}")
-    else:
-        print(f"⚠️ Error controlling {name} ({action}): {response.status_code}")
+        print(f"✅ {name}: {label}")
+        STATE.record_command(device["device"], cmd["name"], cmd["value"])
+    elif response.status_code != 429:
+        print(f"⚠️ Error controlling {name} ({label}): {response.status_code}")
         print(response.text)
+    return response
+
+
+def fetch_state(device: Dict[str, Any], session: Optional[requests.Session] = None) -> Optional[Dict[str, Any]]:
+    """Read a device's real power/brightness/color from Govee, or None on failure."""
+    params = {"device": device.get("device"), "model": device.get("model")}
+    try:
+        response = (session or SESSION).get(f"{BASE_URL}/devices/state", params=params)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return parse_v1_properties(response.json().get("data", {}).get("properties", []))
+
+
+def reconcile_devices(devices: List[Dict[str, Any]], workers: int = DEFAULT_WORKERS,
+                      session: Optional[requests.Session] = None) -> None:
+    """Refresh mirrored state for every device whose entry is older than the reconcile interval."""
+    by_id = {d["device"]: d for d in devices if d.get("device") and d.get("model")}
+    stale = STATE.stale(by_id)
+    if stale:
+        fan_out(lambda device_id: STATE.reconcile(device_id, lambda: fetch_state(by_id[device_id], session)),
+                stale, workers=workers)
+        QUOTA.save()
+
+
+def enqueue(queue: CommandQueue, device: Dict[str, Any], action: str, effect: Optional[Any] = None,
+            session: Optional[requests.Session] = None, force: bool = False) -> Optional[bool]:
+    """
+    Validate an action and put it on the rate-limited queue.
+    A later command of the same kind for the same device replaces this one.
+    Returns True if queued, None if the mirrored state says it would change nothing
+    (unless force=True), and False if the action was invalid.
+    """
+    cmd = build_command(device, action, effect)
+    if cmd is None:
+        return False
+
+    label = f"{action} {effect}" if effect is not None else action
+    if not force and not STATE.would_change(device["device"], COMMAND_FIELDS[cmd["name"]], cmd["value"]):
+        print(f"💤 {device.get('deviceName', 'unknown')}: already {label}")
+        return None
+
+    queue.submit(device["device"], cmd["name"],
+                 lambda: send_command(device, cmd, label, session=session), label=action)
+    return True
+
+
+def control_device(device: Dict[str, Any], action: str, effect: Optional[Any] = None,
+                   session: Optional[requests.Session] = None, force: bool = False) -> bool:
+    """
+    Send control command to a specific device through the quota-aware queue.
+    Returns True if Govee accepted it or the device was already in that state.
+    """
+    queue = CommandQueue(QUOTA)
+    queued = enqueue(queue, device, action, effect, session=session, force=force)
+    if queued is not True:
+        return queued is None
+    ok = all(ok for _, _, ok in queue.drain(workers=1))
+    STATE.save()
+    return ok
+
+# ──────────────────────────────────────────────────────────────
+# 🚀 Concurrent control
+# ──────────────────────────────────────────────────────────────
+def control_devices(devices: List[Dict[str, Any]], actions: List[Tuple[str, Any]],
+                    workers: int = DEFAULT_WORKERS,
+                    session: Optional[requests.Session] = None,
+                    force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Apply the same action sequence to many devices at once.
+    Every command goes through one rate-limited CommandQueue: actions for one device
+    run in order (power before color before brightness), devices drain concurrently
+    over the shared session, and superseded commands are coalesced away.
+    Commands the state mirror says are no-ops are skipped unless force=True.
+    Returns one result per device: {"name", "results": [(action, ok), ...], "ok"},
+    where ok is None for a skipped command.
+    """
+    if not force:
+        reconcile_devices(devices, workers=workers, session=session)
+
+    queue = CommandQueue(QUOTA)
+    summary: Dict[str, Dict[str, Any]] = {}
+    for device in devices:
+        entry = summary.setdefault(device.get("device") or id(device), {
+            "name": device.get("deviceName", "unknown"), "results": [], "ok": True,
+        })
+        for action, value in actions:
+            # Queued commands hold their slot until the queue reports back
+            queued = enqueue(queue, device, action, value, session=session, force=force)
+            entry["results"].append((action, False if queued else queued))
+
+    try:
+        for device_id, action, ok in queue.drain(workers=workers):
+            results = summary[device_id]["results"]
+            index = next(i for i, (name, _) in enumerate(results) if name == action)
+            results[index] = (action, ok)
+    finally:
+        STATE.save()
+
+    for entry in summary.values():
+        entry["ok"] = bool(entry["results"]) and all(ok is not False for _, ok in entry["results"])
+    return list(summary.values())
+
+
+# ──────────────────────────────────────────────────────────────
+# ✨ Effects
+# ──────────────────────────────────────────────────────────────
+def animate(devices: List[Dict[str, Any]], color: str, duration: float,
+            workers: int = DEFAULT_WORKERS, session: Optional[requests.Session] = None) -> Optional[Dict[str, float]]:
+    """
+    Run a color preset's `effect` on the devices for `duration` seconds.
+    Frames go through the quota-aware queue, so the frame rate adapts to the
+    per-device and daily limits instead of exhausting them.
+    """
+    preset = COLOR_PRESETS.get(color, {})
+    effect = preset.get("effect")
+    if effect not in EFFECTS:
+        print(f"⚠️ {color} has no animated effect")
+        return None
+
+    targets = [d for d in devices if d.get("device") and d.get("model")]
+    if not targets:
+        return None
+
+    def send(rgb: Optional[Tuple[int, int, int]], brightness: Optional[int]) -> None:
+        queue = CommandQueue(QUOTA)
+        for device in targets:
+            if rgb is not None:
+                cmd = {"name": "color", "value": dict(zip("rgb", rgb))}
+                queue.submit(device["device"], "color",
+                             lambda d=device, c=cmd: send_command(d, c, f"{effect} color", session=session))
+            if brightness is not None:
+                cmd = {"name": "brightness", "value": brightness}
+                queue.submit(device["device"], "brightness",
+                             lambda d=device, c=cmd: send_command(d, c, f"{effect} {brightness}%", session=session))
+        queue.drain(workers=workers)
+
+    print(f"✨ Activating {color} ({effect}) on {len(targets)} device(s) for {duration:.0f}s")
+    scheduler = FrameScheduler(effect, (preset["r"], preset["g"], preset["b"]),
+                               [QUOTA.bucket(d["device"]) for d in targets], send, account=QUOTA.account)
+    try:
+        stats = scheduler.run(duration)
+    except KeyboardInterrupt:
+        print("\n⏹️ Effect stopped.")
+        return None
+    finally:
+        STATE.save()
+
+    print(f"🎞️ {stats['frames_sent']}/{stats['frames_computed']} frames sent "
+          f"({stats['commands']} commands, {stats['fps'] * 60:.1f} frames/min)")
+    return stats
+
+
+def print_summary(summary: List[Dict[str, Any]]) -> None:
+    """Print a per-device result table for a batch of commands."""
+    if not summary:
+        return
+
+    print("\n📋 Results")
+    print("=" * 60)
+    for entry in summary:
+        steps = "  ".join(f"{action}{'💤' if ok is None else '✅' if ok else '❌'}"
+                          for action, ok in entry["results"])
+        print(f"{entry['name'][:25]:25} {steps}")
+    print("=" * 60)
+    succeeded = sum(1 for entry in summary if entry["ok"])
+    print(f"{'✨' if succeeded == len(summary) else '⚠️'} {succeeded}/{len(summary)} devices updated")
 
 # ──────────────────────────────────────────────────────────────
 # 🧙 CLI entrypoint
@@ -231,10 +437,28 @@ def main() -> None:
     parser.add_argument("-s", "--state", choices=["on", "off"], help="Turn device(s) on or off")
     parser.add_argument("-c", "--color", help="Set color (e.g., witch, trans, cuddle)")
     parser.add_argument("-b", "--brightness", type=int, help="Set brightness (0–100)")
-    parser.add_argument("-d", "--device", help="Control a specific device by name")
+    parser.add_argument("-d", "--device", help="Control a specific device by name (any case or unique prefix) or ID")
+    parser.add_argument("-g", "--group", help="Control a room/group from the groups file")
+    parser.add_argument("--scene", help="Apply a scene from the groups file (e.g. 'living room warm 40%%')")
+    parser.add_argument("--groups", action="store_true", help="List rooms and scenes")
     parser.add_argument("--refresh", action="store_true", help="Refresh device list from Govee API")
     parser.add_argument("--list", action="store_true", help="List all cached devices")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Number of devices to control concurrently")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="Send commands even if the device already appears to be in that state")
+    parser.add_argument("-a", "--animate", type=float, metavar="SECONDS",
+                        help="Run the color preset's effect (pulse, breathe, fade...) for this long")
     args = parser.parse_args()
+    if args.animate is not None and args.animate <= 0:
+        parser.error("--animate needs a positive number of seconds")
+    if args.animate and not (args.color or args.scene):
+        parser.error("--animate needs --color (or a --scene that sets one)")
+
+    groups = load_groups()
+    if args.groups:
+        print_group_table(groups)
+        return
 
     devices = get_devices(refresh=args.refresh)
 
@@ -248,22 +472,57 @@ def main() -> None:
 
     # Filter for specific device if requested
     if args.device:
-        matches = [d for d in devices if d.get("deviceName") == args.device]
-        if not matches:
+        device = REGISTRY.find(args.device)
+        if not device:
             print(f"⚠️ Device named '{args.device}' not found.")
             return
-        devices = matches
+        devices = [device]
 
-    # Execute actions
-    for device in devices:
-        name = device.get("deviceName", "unknown")
-        print(f"→ Controlling {name}")
-        if args.state:
-            control_device(device, args.state)
-        if args.color:
-            control_device(device, "color", args.color)
-        if args.brightness is not None:
-            control_device(device, "brightness", args.brightness)
+    # Rooms and scenes resolve to one batch through the registry
+    settings: Dict[str, Any] = {}
+    if args.scene or args.group:
+        everything = [d.get("deviceName", "") for d in devices]
+        try:
+            if args.scene:
+                names, settings = groups.scene(args.scene, everything)
+            else:
+                names = groups.members(args.group, everything)
+        except KeyError:
+            print(f"⚠️ No {'scene' if args.scene else 'room'} named '{args.scene or args.group}' in {GROUPS_FILE}")
+            return
+        devices, missing = resolve(names, REGISTRY.find)
+        if missing:
+            print(f"⚠️ Not found: {', '.join(missing)}")
+        if not devices:
+            return
+
+    # Build the action sequence applied to every device (flags override the scene)
+    state = args.state or settings.get("state")
+    color = args.color or settings.get("color")
+    brightness = args.brightness if args.brightness is not None else settings.get("brightness")
+    if args.animate and not color:
+        parser.error(f"--animate needs a color; scene '{args.scene}' does not set one")
+
+    actions: List[Tuple[str, Any]] = []
+    if state:
+        actions.append((state, None))
+    if color:
+        actions.append(("color", color))
+    if brightness is not None:
+        actions.append(("brightness", int(brightness)))
+
+    if not actions:
+        print("Nothing to do. Use --state, --color or --brightness.")
+        return
+
+    # Size the connection pool to the worker count so no worker waits on a socket
+    session = SESSION if args.workers <= DEFAULT_WORKERS else make_session(HEADERS, pool_size=args.workers)
+
+    print(f"→ Controlling {len(devices)} device(s)")
+    print_summary(control_devices(devices, actions, workers=args.workers, session=session, force=args.force))
+
+    if args.animate and color:
+        animate(devices, color, args.animate, workers=args.workers, session=session)
 
 # ──────────────────────────────────────────────────────────────
 # 🚀 Main entry
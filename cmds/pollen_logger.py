@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cmds.pollen import Pollen
+
+# Time-series file: one compact JSON object per line
+LOG_FILE = "pollen_log.jsonl"
+# Ambee responses keyed by grid cell, reused until the update window rolls over
+CACHE_FILE: Path = Path.home() / ".cache" / "pollen_cells.json"
+
+# Grid cell size in degrees (0.1° ≈ 11 km of latitude)
+DEFAULT_GRID = 0.1
+# Ambee refreshes its pollen model hourly
+UPDATE_WINDOW = 3600
+
+
+def grid_cell(lat: float, lng: float, grid: float = DEFAULT_GRID) -> Tuple[float, float]:
+    """Snap coordinates to the centre of their grid cell so nearby lookups share a key."""
+    decimals = max(0, len(f"{grid:.10f}".rstrip("0").split(".")[1]))
+    return (round(round(lat / grid) * grid, decimals),
+            round(round(lng / grid) * grid, decimals))
+
+
+def _parse_updated_at(value: Optional[str]) -> Optional[float]:
+    """Convert Ambee's ISO `updatedAt` stamp to epoch seconds."""
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class PollenCellCache:
+    """Caches Ambee responses per grid cell until the `updatedAt` window rolls over."""
+
+    def __init__(self, pollen: Pollen, grid: float = DEFAULT_GRID,
+                 window: int = UPDATE_WINDOW, cache_file: Path = CACHE_FILE):
+        self.pollen = pollen
+        self.grid = grid
+        self.window = window
+        self.cache_file = cache_file
+        self.api_calls = 0
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, separators=(",", ":"))
+        os.replace(tmp, self.cache_file)
+
+    def expires_at(self, entry: Dict[str, Any]) -> float:
+        """A cell is fresh until one window past its `updatedAt` (or past the fetch time)."""
+        updated = entry.get("updated") or entry.get("fetched", 0)
+        return updated + self.window
+
+    def get(self, lat: float, lng: float) -> Tuple[Tuple[float, float], Dict[str, Any]]:
+        """Return (cell, response) for the coordinates, calling Ambee at most once per cell window."""
+        cell = grid_cell(lat, lng, self.grid)
+        key = f"{cell[0]},{cell[1]}"
+        entry = self.entries.get(key)
+        now = time.time()
+
+        if entry and now < self.expires_at(entry):
+            return cell, entry["data"]
+
+        data = self.pollen.fetch_pollen_data(*cell)
+        self.api_calls += 1
+        if not data:
+            # Serve stale data rather than nothing if the API hiccups
+            return cell, entry["data"] if entry else {}
+
+        info = data.get("data", [{}])[0] if data.get("data") else {}
+        updated = _parse_updated_at(info.get("updatedAt"))
+        # Guard against a stale `updatedAt` pinning the cell to expired forever
+        if updated is not None and updated + self.window <= now:
+            updated = None
+        self.entries[key] = {"updated": updated, "fetched": now, "data": data}
+        self._save()
+        return cell, data
+
+
+def summarize(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Flatten an Ambee response into species/risk counts for the time series."""
+    info = data.get("data", [{}])[0] if data.get("data") else {}
+    if not info:
+        return None
+
+    species: Dict[str, Any] = {}
+    for category, allergens in info.get("Species", {}).items():
+        if isinstance(allergens, dict):
+            for allergen, count in allergens.items():
+                if count:
+                    species[f"{category}.{allergen}"] = count
+        elif allergens:
+            species[category] = allergens
+
+    return {
+        "updatedAt": info.get("updatedAt"),
+        "count": info.get("Count", {}),
+        "risk": info.get("Risk", {}),
+        "species": species,
+    }
+
+
+def log_pollen(cache: PollenCellCache, cities: List[str],
+               coordinates: Dict[str, Tuple[float, float]]) -> int:
+    """Append one entry per city to the time series. Returns the number of rows written."""
+    written = 0
+    with open(LOG_FILE, "a", encoding="utf-8") as f:
+        for city in cities:
+            if city not in coordinates:
+                lat, lng = cache.pollen.get_coordinates(city)
+                if lat is None or lng is None:
+                    continue
+                coordinates[city] = (lat, lng)
+
+            cell, data = cache.get(*coordinates[city])
+            summary = summarize(data)
+            if not summary:
+                print(f"❌ No pollen data for {city}")
+                continue
+
+            entry = {"t": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+                     "city": city, "cell": list(cell), **summary}
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            written += 1
+
+    print(f"✅ Pollen logged for {written} location(s) ({cache.api_calls} API call(s) so far)")
+    return written
+
+
+def main(interval=UPDATE_WINDOW):
+    """Starts logging pollen data for one or more cities at a specified interval (in seconds)."""
+    parser = argparse.ArgumentParser(description="Log pollen counts to a time-series file.")
+    parser.add_argument("cities", nargs="*", default=["New York"],
+                        help="City names to log (comma-separate multi-word names)")
+    parser.add_argument("--interval", type=int, default=interval, help="Seconds between log entries")
+    parser.add_argument("--grid", type=float, default=DEFAULT_GRID,
+                        help="Grid cell size in degrees used to share API calls")
+    parser.add_argument("--once", action="store_true", help="Log a single entry and exit")
+    args = parser.parse_args()
+
+    cities = [c.strip() for c in " ".join(args.cities).split(",") if c.strip()]
+    cache = PollenCellCache(Pollen(), grid=args.grid)
+    coordinates: Dict[str, Tuple[float, float]] = {}
+
+    print("🌟 Starting pollen logging...")
+    try:
+        while True:
+            log_pollen(cache, cities, coordinates)
+            if args.once:
+                return
+            print(f"⏳ Waiting for {args.interval} seconds before the next log entry.")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n⏹️ Pollen logging stopped manually.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,31 @@
-import csv
-import time
-from datetime import datetime, timedelta
-from typing import Optional, Tuple
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
 
-# Raspberry Pi-specific imports
-import board
-import busio
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Adafruit sensors
-import adafruit_lsm9ds1
-import adafruit_apds9960.apds9960
-import adafruit_bme680
-import adafruit_gps
-
-# Constants
-MAX_RETRIES = 5
-RETRY_DELAY = 0.5
+# Real or simulated sensors, chosen by HARDWARE_BACKEND
+from utils import hardware
+from utils.acquisition import AcquisitionEngine, print_report, record
+from utils.gps_reader import GpsReader
+from utils.sensor_health import MAX_RETRIES, guarded_read, print_health
+from utils.sensor_threads import locked
 
 
 class SensorSuite:
-    def __init__(self, i2c: busio.I2C):
+    def __init__(self, i2c: Any):
         """Initializes the SensorSuite with the necessary sensors."""
         self.sensors = self.init_sensors(i2c)
         self.configure_sensors()
 
-    def init_sensors(self, i2c: busio.I2C) -> dict:
-        """Initializes all sensors and returns them as a dictionary."""
+    def init_sensors(self, i2c: Any) -> dict:
+        """Initializes all sensors and returns them as a dictionary (bus-locked for reader threads)."""
         return {
-            "lsm9ds1": adafruit_lsm9ds1.LSM9DS1_I2C(i2c),
-            "apds9960": adafruit_apds9960.apds9960.APDS9960(i2c),
-            "bme680": adafruit_bme680.Adafruit_BME680_I2C(i2c),
-            "gps": adafruit_gps.GPS_GtopI2C(i2c, debug=False)
+            "lsm9ds1": locked(hardware.lsm9ds1(i2c), i2c),
+            "apds9960": locked(hardware.apds9960(i2c), i2c),
+            "bme680": locked(hardware.bme680(i2c), i2c),
+            "gps": GpsReader(locked(hardware.gps(i2c), i2c))
         }
 
     def configure_sensors(self) -> None:
@@ -38,16 +33,12 @@ class SensorSuite:
         self.sensors["apds9960"].enable_proximity = True
         self.sensors["apds9960"].enable_color = True
 
-    def safe_read(self, func, retries=MAX_RETRIES) -> Optional[Tuple]:
-        """Safely read sensor data with retries and graceful error handling."""
-        for attempt in range(1, retries + 1):
-            try:
-                return func()
-            except Exception as e:
-                print(f"⚠️ Error reading sensor: {e} (Attempt {attempt}/{retries})")
-                time.sleep(RETRY_DELAY)
-        print("❌ Failed to read sensor data after retries.")
-        return None
+    def safe_read(self, func, retries=MAX_RETRIES, name: str = "sensor") -> Optional[Tuple]:
+        """
+        Safely read sensor data with backoff retries behind a per-sensor circuit breaker.
+        Returns None when the read failed or the sensor is being skipped as dead.
+        """
+        return guarded_read(name, func, retries)
 
     def read_lsm9ds1(self) -> Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float], float]]:
         """Reads LSM9DS1 acceleration, gyroscope, magnetometer, and temperature with map conversion."""
@@ -56,7 +47,7 @@ class SensorSuite:
             tuple(self.sensors["lsm9ds1"].gyro),           # Convert map to tuple
             tuple(self.sensors["lsm9ds1"].magnetic),       # Convert map to tuple
             self.sensors["lsm9ds1"].temperature
-        ))
+        ), name="lsm9ds1")
         return result
 
     def read_apds9960(self) -> Optional[Tuple[int, Tuple[int, int, int, int], int]]:
@@ -65,7 +56,7 @@ class SensorSuite:
             self.sensors["apds9960"].proximity,
             tuple(self.sensors["apds9960"].color_data),     # Convert map to tuple
             sum(self.sensors["apds9960"].color_data)
-        ))
+        ), name="apds9960")
         return result
 
     def read_bme680(self) -> Optional[Tuple[float, float, float, float]]:
@@ -75,67 +66,56 @@ class SensorSuite:
             self.sensors["bme680"].gas,
             self.sensors["bme680"].humidity,
             self.sensors["bme680"].pressure
-        ))
+        ), name="bme680")
 
     def read_gps(self) -> Optional[Tuple[float, float, float]]:
-        """Reads data from the GPS module with error handling."""
-        def get_gps_data():
-            self.sensors["gps"].update()
-            return self.sensors["gps"].latitude, self.sensors["gps"].longitude, self.sensors["gps"].speed_knots
-
-        return self.safe_read(get_gps_data)
-
-    def record_data(self, csv_path: str, duration: int, frequency: int = 1) -> None:
-        """Records sensor data to a CSV file with error handling."""
-        end_time = datetime.now() + timedelta(seconds=duration)
-
-        with open(csv_path, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                'Timestamp', 'Accel_X', 'Accel_Y', 'Accel_Z',
-                'Gyro_X', 'Gyro_Y', 'Gyro_Z', 'Mag_X', 'Mag_Y', 'Mag_Z',
-                'Temp_LSM9DS1', 'Proximity', 'Color_R', 'Color_G', 'Color_B', 'Color_C',
-                'BME680_Temp', 'Gas', 'Humidity', 'Pressure',
-                'GPS_Latitude', 'GPS_Longitude', 'GPS_Speed'
-            ])
-
-            while datetime.now() < end_time:
-                timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
-
-                # Safely read sensor data
-                lsm_data = self.read_lsm9ds1()
-                apds_data = self.read_apds9960()
-                bme_data = self.read_bme680()
-                gps_data = self.read_gps()
-
-                # Handle missing data with placeholders
-                accel, gyro, mag, temp = lsm_data or ((0, 0, 0), (0, 0, 0), (0, 0, 0), 0)
-                prox, color, lux = apds_data or (0, (0, 0, 0, 0), 0)
-                bme_temp, gas, humidity, pressure = bme_data or (0, 0, 0, 0)
-                lat, lon, speed = gps_data or (None, None, None)
-
-                # Write data to CSV
-                writer.writerow([
-                    timestamp, *accel, *gyro, *mag, temp,
-                    prox, *color, bme_temp, gas, humidity, pressure,
-                    lat, lon, speed
-                ])
-
-                # Print sensor data for debugging
-                print(f"Timestamp: {timestamp}")
-                print(f"Accel: {accel}, Gyro: {gyro}, Mag: {mag}, Temp: {temp}")
-                print(f"Proximity: {prox}, Color: {color}, Lux: {lux}")
-                print(f"BME680 Temp: {bme_temp}, Gas: {gas}, Humidity: {humidity}, Pressure: {pressure}")
-                print(f"GPS Latitude: {lat}, Longitude: {lon}, Speed: {speed}")
-                print("-" * 40)
-
-                time.sleep(1 / frequency)
+        """Latest GPS fix; the module is drained by a background reader, so this never blocks."""
+        return self.sensors["gps"].reading()
+
+    def readers(self) -> dict:
+        """Read functions per sensor, for the acquisition engine."""
+        return {
+            "lsm9ds1": self.read_lsm9ds1,
+            "apds9960": self.read_apds9960,
+            "bme680": self.read_bme680,
+            "gps": self.read_gps,
+        }
+
+    @staticmethod
+    def print_row(row: list) -> None:
+        """Print one recorded row for debugging."""
+        timestamp, *values = row
+        accel, gyro, mag, temp = values[0:3], values[3:6], values[6:9], values[9]
+        prox, color = values[10], tuple(values[11:15])
+        bme_temp, gas, humidity, pressure = values[15:19]
+        lat, lon, speed = values[19:22]
+
+        print(f"Timestamp: {timestamp}")
+        print(f"Accel: {tuple(accel)}, Gyro: {tuple(gyro)}, Mag: {tuple(mag)}, Temp: {temp}")
+        lux = sum(color) if None not in color else None
+        print(f"Proximity: {prox}, Color: {color}, Lux: {lux}")
+        print(f"BME680 Temp: {bme_temp}, Gas: {gas}, Humidity: {humidity}, Pressure: {pressure}")
+        print(f"GPS Latitude: {lat}, Longitude: {lon}, Speed: {speed}")
+        print("-" * 40)
+
+    def record_data(self, csv_path: str, duration: int, frequency: int = 1,
+                    rates: Optional[Dict[str, float]] = None, summary: float = 1.0) -> None:
+        """
+        Records sensor data to a CSV file at `frequency` rows per second.
+        Each sensor is sampled at its own rate (`rates`, defaulting to DEFAULT_RATES).
+        The latest row is printed at most every `summary` seconds (0 to disable).
+        """
+        engine = AcquisitionEngine(self.readers(), frequency, rates)
+        stats = record(engine, csv_path, duration, show=self.print_row, summary_every=summary)
+        print_report(stats)
+        print_health()
+        print(f"🛰️ GPS: {self.sensors['gps'].describe()}")
 
 class SensorRecorder:
     def __init__(self):
         """Initializes the main application."""
         try:
-            self.i2c = busio.I2C(board.SCL, board.SDA)
+            self.i2c = hardware.i2c()
             self.sensor_suite = SensorSuite(self.i2c)
         except Exception as e:
             print(f"🔥 Error initializing: {e}")
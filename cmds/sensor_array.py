@@ -1,23 +1,23 @@
-import csv
-import time
+import sys
 import os
 import argparse
-from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-# Raspberry Pi-specific imports
-import board
-import busio
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Adafruit sensors
-import adafruit_lsm9ds1
-import adafruit_apds9960.apds9960
-import adafruit_bme680
-import adafruit_gps
+# Real or simulated sensors, chosen by HARDWARE_BACKEND
+from utils import hardware
+from utils.acquisition import CSV_COLUMNS, AcquisitionEngine, parse_rates, print_report, record
+from utils.events import parse_triggers
+from utils.gps_reader import GpsReader
+from utils.rollups import DEFAULT_WINDOWS
+from utils.sensor_file import CODECS
+from utils.sensor_health import MAX_RETRIES, guarded_read, print_health
+from utils.sensor_threads import locked
 
 # Constants
-MAX_RETRIES = 5
-RETRY_DELAY = 0.5
+I2C_FREQUENCY = hardware.DEFAULT_I2C_FREQUENCY
 
 
 # 🛠️ Initialization Functions
@@ -28,17 +28,18 @@ class SensorInitializer:
         self.i2c = self.init_i2c(frequency)
         self.sensors = self.init_sensors()
 
-    def init_i2c(self, frequency: int) -> busio.I2C:
+    def init_i2c(self, frequency: int) -> Any:
         """Initializes and returns the I2C connection."""
-        return busio.I2C(board.SCL, board.SDA, frequency=frequency)
+        return hardware.i2c(frequency)
 
     def init_sensors(self) -> dict:
-        """Initializes all sensors and returns them as a dictionary."""
+        """Initializes all sensors and returns them as a dictionary (bus-locked for reader threads)."""
         return {
-            "lsm9ds1": adafruit_lsm9ds1.LSM9DS1_I2C(self.i2c),
-            "apds9960": adafruit_apds9960.apds9960.APDS9960(self.i2c),
-            "bme680": adafruit_bme680.Adafruit_BME680_I2C(self.i2c),
-            "gps": adafruit_gps.GPS_GtopI2C(self.i2c, debug=False)
+            "lsm9ds1": locked(hardware.lsm9ds1(self.i2c), self.i2c),
+            "apds9960": locked(hardware.apds9960(self.i2c), self.i2c),
+            "bme680": locked(hardware.bme680(self.i2c), self.i2c),
+            # Drained continuously on its own thread; reads take the latest fix
+            "gps": GpsReader(locked(hardware.gps(self.i2c), self.i2c))
         }
 
     def configure_sensors(self) -> None:
@@ -62,17 +63,12 @@ class SensorReader:
     """Handles the safe reading of sensor data."""
     
     @staticmethod
-    def safe_read(func, retries=MAX_RETRIES) -> Optional[Tuple]:
-        """Safely read sensor data with retries and graceful error handling."""
-        for attempt in range(1, retries + 1):
-            try:
-                return func()
-            except Exception as e:
-                print(
-                    f"⚠️ Error reading sensor: {e} (Attempt {attempt}/{retries})")
-                time.sleep(RETRY_DELAY)
-        print("❌ Failed to read sensor data after retries.")
-        return None
+    def safe_read(func, retries=MAX_RETRIES, name: str = "sensor") -> Optional[Tuple]:
+        """
+        Safely read sensor data with backoff retries behind a per-sensor circuit breaker.
+        Returns None when the read failed or the sensor is being skipped as dead.
+        """
+        return guarded_read(name, func, retries)
 
     @staticmethod
     def read_lsm9ds1(sensor) -> Optional[Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float], float]]:
@@ -81,7 +77,7 @@ class SensorReader:
             tuple(sensor.gyro),
             tuple(sensor.magnetic),
             sensor.temperature
-        ))
+        ), name="lsm9ds1")
 
     @staticmethod
     def read_apds9960(sensor) -> Optional[Tuple[int, Tuple[int, int, int, int], int]]:
@@ -89,7 +85,7 @@ class SensorReader:
             sensor.proximity,
             tuple(sensor.color_data),
             sum(sensor.color_data)
-        ))
+        ), name="apds9960")
 
     @staticmethod
     def read_bme680(sensor) -> Optional[Tuple[float, float, float, float]]:
@@ -98,80 +94,90 @@ class SensorReader:
             sensor.gas,
             sensor.humidity,
             sensor.pressure
-        ))
+        ), name="bme680")
 
     @staticmethod
-    def read_gps(gps) -> Optional[Tuple[float, float, float]]:
-        def get_gps_data():
-            gps.update()
-            return gps.latitude, gps.longitude, gps.speed_knots
-        return SensorReader.safe_read(get_gps_data)
+    def read_gps(gps: GpsReader) -> Optional[Tuple[float, float, float]]:
+        """Latest fix from the background GPS reader (no bus access), or None if stale."""
+        return gps.reading()
 
 
 # 📊 Data Recording with Error Handling
 class DataRecorder:
-    """Handles the recording of sensor data to CSV files."""
+    """Handles the recording of sensor data to CSV (or .srec) files."""
     
-    def __init__(self, csv_path: str, sensors: dict, duration: int, frequency: int = 1):
+    def __init__(self, csv_path: str, sensors: dict, duration: int, frequency: int = 1,
+                 rates: Optional[Dict[str, float]] = None, summary: float = 1.0,
+                 threaded: bool = True, rollups: Optional[str] = None, raw: bool = True,
+                 codec: str = "raw", triggers: Optional[List[str]] = None,
+                 pre: float = 5.0, post: float = 5.0):
         self.csv_path = csv_path
         self.sensors = sensors
         self.duration = duration
         self.frequency = frequency
+        self.rates = rates
+        self.summary = summary
+        self.threaded = threaded
+        self.rollups = rollups
+        self.raw = raw
+        self.codec = codec
+        self.triggers = triggers
+        self.pre = pre
+        self.post = post
+
+    def readers(self) -> dict:
+        """Read functions per sensor, for the acquisition engine."""
+        return {
+            "lsm9ds1": lambda: SensorReader.read_lsm9ds1(self.sensors['lsm9ds1']),
+            "apds9960": lambda: SensorReader.read_apds9960(self.sensors['apds9960']),
+            "bme680": lambda: SensorReader.read_bme680(self.sensors['bme680']),
+            "gps": lambda: SensorReader.read_gps(self.sensors['gps']),
+        }
+
+    @staticmethod
+    def print_row(row: list) -> None:
+        """✨ Verbose printout of one recorded row (including pressure and humidity)."""
+        timestamp, *values = row
+        accel, gyro, mag, temp = values[0:3], values[3:6], values[6:9], values[9]
+        prox, color = values[10], values[11:15]
+        bme_temp, gas, humidity, pressure = values[15:19]
+        lat, lon, speed = values[19:22]
+
+        print(f"\n[{timestamp}]")
+        print(f"  📈 Accel:     X: {accel[0]} Y: {accel[1]} Z: {accel[2]}")
+        print(f"  🔄 Gyro:      X: {gyro[0]} Y: {gyro[1]} Z: {gyro[2]}")
+        print(f"  🧭 Mag:       X: {mag[0]} Y: {mag[1]} Z: {mag[2]}")
+        print(f"  🌡️ LSM Temp: {temp}°C")
+        print(
+            f"  🔦 Prox:      {prox} | Color: R{color[0]} G{color[1]} B{color[2]} C{color[3]}")
+        print(
+            f"  🌫️ BME680:    Temp: {bme_temp}°C  Gas: {gas}Ω  Humidity: {humidity}%  Pressure: {pressure} hPa")
+        print(
+            f"  📍 GPS:       Lat: {lat}  Lon: {lon}  Speed: {speed} knots")
 
     def record_data(self) -> None:
-        """Records sensor data to a CSV file with error handling."""
+        """
+        Records sensor data to a CSV file, each sensor at its own rate.
+        Rows are buffered and written in blocks by a background thread; the latest
+        row is printed at most every `summary` seconds.
+        """
         FileHelper.ensure_data_folder(self.csv_path)
-        end_time = datetime.now() + timedelta(seconds=self.duration)
-        print(f"📁 Writing CSV to: {self.csv_path}")
-        print(f"⏳ Recording for {self.duration} seconds at {self.frequency} Hz...\n")
-
-        with open(self.csv_path, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([
-                'Timestamp', 'Accel_X', 'Accel_Y', 'Accel_Z',
-                'Gyro_X', 'Gyro_Y', 'Gyro_Z', 'Mag_X', 'Mag_Y', 'Mag_Z',
-                'Temp_LSM9DS1', 'Proximity', 'Color_R', 'Color_G', 'Color_B', 'Color_C',
-                'BME680_Temp', 'Gas', 'Humidity', 'Pressure',
-                'GPS_Latitude', 'GPS_Longitude', 'GPS_Speed'
-            ])
-
-            while self.duration > 0:
-                self.duration -= 1
-                timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
-
-                # Sensor reads with default fallback values
-                lsm_data = SensorReader.read_lsm9ds1(self.sensors['lsm9ds1'])
-                apds_data = SensorReader.read_apds9960(self.sensors['apds9960'])
-                bme_data = SensorReader.read_bme680(self.sensors['bme680'])
-                gps_data = SensorReader.read_gps(self.sensors['gps'])
-
-                accel, gyro, mag, temp = lsm_data or (
-                    (0, 0, 0), (0, 0, 0), (0, 0, 0), 0)
-                prox, color, lux = apds_data or (0, (0, 0, 0, 0), 0)
-                bme_temp, gas, humidity, pressure = bme_data or (0, 0, 0, 0)
-                lat, lon, speed = gps_data or (None, None, None)
-
-                # Writing row
-                writer.writerow([
-                    timestamp, *accel, *gyro, *mag, temp,
-                    prox, *color, bme_temp, gas, humidity, pressure,
-                    lat, lon, speed
-                ])
-
-                # ✨ Verbose printout per loop (including pressure and humidity)
-                print(f"\n[{timestamp}]")
-                print(f"  📈 Accel:     X: {accel[0]} Y: {accel[1]} Z: {accel[2]}")
-                print(f"  🔄 Gyro:      X: {gyro[0]} Y: {gyro[1]} Z: {gyro[2]}")
-                print(f"  🧭 Mag:       X: {mag[0]} Y: {mag[1]} Z: {mag[2]}")
-                print(f"  🌡️ LSM Temp: {temp}°C")
-                print(
-                    f"  🔦 Prox:      {prox} | Color: R{color[0]} G{color[1]} B{color[2]} C{color[3]}")
-                print(
-                    f"  🌫️ BME680:    Temp: {bme_temp}°C  Gas: {gas}Ω  Humidity: {humidity}%  Pressure: {pressure} hPa")
-                print(
-                    f"  📍 GPS:       Lat: {lat}  Lon: {lon}  Speed: {speed} km/h")
-
-                time.sleep(1 / self.frequency)
+        engine = AcquisitionEngine(self.readers(), self.frequency, self.rates, threaded=self.threaded)
+        rates = ", ".join(f"{name} {rate:g} Hz" for name, rate in engine.rates.items())
+        if self.raw:
+            print(f"📁 Writing CSV to: {self.csv_path}")
+        if self.rollups:
+            print(f"📉 Rolling up {self.rollups}{'' if self.raw else ' (rollups only, no raw rows)'}")
+        if self.triggers:
+            print(f"🎯 Capturing {self.pre:g} s before and {self.post:g} s after: {'; '.join(self.triggers)}")
+        print(f"⏳ Recording for {self.duration} seconds at {self.frequency} Hz ({rates})...\n")
+        stats = record(engine, self.csv_path, self.duration,
+                       show=self.print_row, summary_every=self.summary,
+                       rollups=self.rollups, raw=self.raw, codec=self.codec,
+                       triggers=self.triggers, pre=self.pre, post=self.post)
+        print_report(stats)
+        print_health()
+        print(f"🛰️ GPS: {self.sensors['gps'].describe()}")
 
 
 # 🚀 Main Execution
@@ -185,7 +191,8 @@ class SensorDataRecorder:
             sensor_initializer = SensorInitializer()
             sensor_initializer.configure_sensors()
 
-            csv_path = f"data/sensor_data_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}.csv"
+            extension = ".srec" if args.format == "srec" or args.codec != "raw" else ".csv"
+            csv_path = f"data/sensor_data_{datetime.now().strftime('%Y-%m-%dT%H-%M-%S')}{extension}"
             print(f"📂 Saving data to: {csv_path}")
             print("📡 Starting sensor read loop...")
 
@@ -193,7 +200,16 @@ class SensorDataRecorder:
                 csv_path=csv_path,
                 sensors=sensor_initializer.sensors,
                 duration=args.duration,
-                frequency=args.frequency
+                frequency=args.frequency,
+                rates=args.rates,
+                summary=args.summary,
+                threaded=not args.single_thread,
+                rollups=args.rollups or (DEFAULT_WINDOWS if args.rollups_only else None),
+                raw=not (args.rollups_only or args.trigger),
+                codec=args.codec,
+                triggers=args.trigger,
+                pre=args.pre,
+                post=args.post
             )
             data_recorder.record_data()
             print("✅ Data recording complete!")
@@ -211,8 +227,37 @@ class SensorDataRecorder:
         parser.add_argument('--duration', type=int, default=10,
                             help='Recording duration in seconds')
         parser.add_argument('--frequency', type=int, default=1,
-                            help='Sampling frequency in Hz')
-        return parser.parse_args()
+                            help='Rows per second (and the default sensor rate) in Hz')
+        parser.add_argument('--rates', type=parse_rates, default=None,
+                            help='Per-sensor rates, e.g. "lsm9ds1=100,bme680=1,gps=1" '
+                                 '(BME680 and GPS default to 1 Hz)')
+        parser.add_argument('--summary', type=float, default=1.0,
+                            help='Print the latest reading every N seconds (0 = quiet)')
+        parser.add_argument('--format', choices=['csv', 'srec'], default='csv',
+                            help='csv, or crash-safe chunked binary (see sensor_convert)')
+        parser.add_argument('--codec', choices=list(CODECS), default='raw',
+                            help='Column codec for srec; gorilla (delta/XOR) is typically several '
+                                 'times smaller and implies --format srec')
+        parser.add_argument('--rollups', metavar='WINDOWS', nargs='?', const=DEFAULT_WINDOWS,
+                            help=f'Also write per-window stats (mean/std/min/max/percentiles), '
+                                 f'e.g. "{DEFAULT_WINDOWS}"')
+        parser.add_argument('--rollups-only', action='store_true',
+                            help='Keep only the rollups, not every raw row (for multi-day runs)')
+        parser.add_argument('--trigger', action='append', metavar='EXPR',
+                            help='Only keep rows around events, e.g. "approach: Proximity > 50" or '
+                                 '"gas: d_Gas < -5000" (repeatable; see utils/events.py)')
+        parser.add_argument('--pre', type=float, default=5.0,
+                            help='Seconds kept before each trigger')
+        parser.add_argument('--post', type=float, default=5.0,
+                            help='Seconds kept after each trigger')
+        parser.add_argument('--single-thread', action='store_true',
+                            help='Poll every sensor from the recording loop instead of reader threads')
+        args = parser.parse_args()
+        try:
+            parse_triggers(args.trigger, CSV_COLUMNS)
+        except ValueError as e:
+            parser.error(str(e))
+        return args
 
 
 def main():
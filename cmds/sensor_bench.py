@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import hardware, sensor_health
+from utils.acquisition import AcquisitionEngine, parse_rates
+from utils.bench import LatencyHistogram, TickJitter
+
+from cmds.sensor_array import I2C_FREQUENCY, SensorInitializer, SensorReader
+
+# A case sustains its rate when nothing was dropped and it got within this of the target
+SUSTAINED = 0.98
+
+
+def parse_list(text: str) -> List[float]:
+    """Parse "10,50,100" (or "100k,400k" for bus speeds) into numbers."""
+    values = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        if part:
+            values.append(float(part[:-1]) * 1000 if part.endswith("k") else float(part))
+    return values
+
+
+def run_case(i2c_frequency: int, frequency: float, duration: float,
+             rates: Optional[Dict[str, float]] = None, threaded: bool = True) -> Dict[str, Any]:
+    """Open the sensors on a bus at `i2c_frequency`, acquire for `duration` s and measure."""
+    sensor_health.HEALTH.clear()
+    initializer = SensorInitializer(i2c_frequency)
+    initializer.configure_sensors()
+    sensors = initializer.sensors
+
+    reads = {
+        "lsm9ds1": lambda: SensorReader.read_lsm9ds1(sensors["lsm9ds1"]),
+        "apds9960": lambda: SensorReader.read_apds9960(sensors["apds9960"]),
+        "bme680": lambda: SensorReader.read_bme680(sensors["bme680"]),
+        "gps": lambda: SensorReader.read_gps(sensors["gps"]),
+    }
+    latency = {name: LatencyHistogram() for name in reads}
+    readers = {name: latency[name].timed(read) for name, read in reads.items()}
+    jitter = TickJitter(frequency)
+
+    engine = AcquisitionEngine(readers, frequency, rates, threaded=threaded)
+    stats = engine.run(duration, lambda row: jitter.tick())
+
+    bus = initializer.i2c
+    result = {
+        "i2c_frequency": i2c_frequency,
+        "frequency": frequency,
+        "rates": engine.rates,
+        "duration": duration,
+        "threaded": threaded,
+        "rows": {**stats["rows"], "jitter": jitter.summary()},
+        "sensors": {
+            name: {
+                **stats[name],
+                "latency": latency[name].summary(),
+                "health": sensor_health.HEALTH[name].summary() if name in sensor_health.HEALTH else None,
+            }
+            for name in reads
+        },
+    }
+    if hasattr(bus, "transactions"):
+        result["bus"] = {"transactions": bus.transactions, "failures": bus.failures}
+    result["dropped"] = sum(s["missed"] for s in [stats["rows"], *(stats[name] for name in reads)])
+    result["sustained"] = result["dropped"] == 0 and all(
+        s["achieved_hz"] >= s["target_hz"] * SUSTAINED for s in stats.values())
+
+    if sensors.get("gps") is not None:
+        sensors["gps"].stop()
+    deinit = getattr(bus, "deinit", None)
+    if deinit:
+        deinit()
+    return result
+
+
+def print_case(case: Dict[str, Any]) -> None:
+    rows = case["rows"]
+    flag = "✅" if case["sustained"] else "⚠️"
+    print(f"{flag} I2C {case['i2c_frequency'] / 1000:g} kHz @ {case['frequency']:g} Hz: "
+          f"rows {rows['achieved_hz']:.2f} Hz, dropped {case['dropped']}, "
+          f"jitter std {rows['jitter'].get('std_ms', 0):.2f} ms "
+          f"(p99 {rows['jitter'].get('p99_error_ms', 0):.2f} ms)")
+    for name, s in case["sensors"].items():
+        lat = s["latency"]
+        if not lat["reads"]:
+            print(f"    {name:<9} no reads")
+            continue
+        print(f"    {name:<9} {s['achieved_hz']:>8.2f} / {s['target_hz']:<7g} Hz  "
+              f"p50/p95/p99/max: {lat['p50_ms']:.2f}/{lat['p95_ms']:.2f}/"
+              f"{lat['p99_ms']:.2f}/{lat['max_ms']:.2f} ms  missed: {s['missed']}")
+
+
+def best_rates(cases: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
+    """Highest row frequency sustained at each bus speed."""
+    best: Dict[str, Optional[float]] = {}
+    for case in cases:
+        key = str(case["i2c_frequency"])
+        best.setdefault(key, None)
+        if case["sustained"]:
+            best[key] = max(best[key] or 0.0, case["frequency"])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the acquisition loop: per-read latency, loop jitter and dropped "
+                    "ticks across I2C bus speeds and sample rates.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per case (default: 10)")
+    parser.add_argument("--i2c", type=parse_list, default=[I2C_FREQUENCY],
+                        help=f'I2C bus frequencies to sweep in Hz, e.g. "100k,400k" (default: {I2C_FREQUENCY})')
+    parser.add_argument("--frequency", type=parse_list, default=[10.0, 50.0, 100.0],
+                        help='Row rates to sweep in Hz, each also the default sensor rate '
+                             '(default: "10,50,100")')
+    parser.add_argument("--rates", type=parse_rates, default=None,
+                        help='Fixed per-sensor rates, e.g. "lsm9ds1=100,apds9960=10"')
+    parser.add_argument("--single-thread", action="store_true",
+                        help="Poll every sensor from the loop instead of reader threads")
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: data/bench_<timestamp>.json)")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    output = args.output or f"data/bench_{started.strftime('%Y-%m-%dT%H-%M-%S')}.json"
+    total = len(args.i2c) * len(args.frequency)
+    print(f"⏱️ Benchmarking {total} case(s) of {args.duration:g} s on the {hardware.BACKEND} backend")
+
+    cases = []
+    try:
+        for i2c_frequency in args.i2c:
+            for frequency in args.frequency:
+                case = run_case(int(i2c_frequency), frequency, args.duration,
+                                args.rates, threaded=not args.single_thread)
+                print_case(case)
+                cases.append(case)
+    except KeyboardInterrupt:
+        print("\n🛑 Benchmark interrupted; saving the finished cases.")
+
+    best = best_rates(cases)
+    for bus, frequency in best.items():
+        print(f"🏁 I2C {int(bus) / 1000:g} kHz sustains "
+              + (f"{frequency:g} Hz" if frequency else "none of the tested rates"))
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "backend": hardware.BACKEND,
+            "started": started.isoformat(timespec="seconds"),
+            "host": os.uname().nodename,
+            "cases": cases,
+            "best_frequency": best,
+        }, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
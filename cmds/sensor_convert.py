@@ -0,0 +1,130 @@
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.acquisition import CSV_COLUMNS, format_row
+from utils.replay import load_rows
+from utils.sensor_file import (CODECS, EXTENSION, SENSOR_SCHEMA, CorruptRecording, RecordingReader,
+                               RecordingWriter, csv_to_recording, parse_csv_row, recording_to_csv,
+                               shortest_float32)
+
+BENCH_COLUMN = "Pressure"   # a slow channel, as a dashboard would read it
+
+
+def show_info(path: str, column: Optional[str] = None) -> None:
+    """Print a recording's schema and size, or one column's values."""
+    with RecordingReader(path) as reader:
+        if column:
+            for value in reader.column(column):
+                print(value)
+            return
+        print(f"📼 {path}")
+        print(f"  Created: {reader.created}   Codec: {reader.codec}")
+        print(f"  Rows:    {reader.rows} in {len(reader.chunks)} chunks")
+        print(f"  Columns: {', '.join(f'{name}:{typecode}' for name, typecode in reader.columns)}")
+        if reader.dropped_bytes:
+            print(f"  ⚠️ Ignored {reader.dropped_bytes} bytes of torn or corrupt data at the end")
+
+
+def benchmark(path: str) -> List[Dict[str, Any]]:
+    """Size, write and read throughput of CSV and every codec on one recording's rows."""
+    rows = list(load_rows(path))
+    # The CSV baseline prints float32 columns as short decimals, like recording_to_csv
+    narrow = [i for i, (_, typecode) in enumerate(SENSOR_SCHEMA) if typecode == "f"]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "bench.csv")
+        start = time.perf_counter()
+        with open(out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for row in rows:
+                row = list(row)
+                for i in narrow:
+                    row[i] = shortest_float32(row[i])
+                writer.writerow(format_row(row))
+        written = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(out, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for cells in reader:
+                parse_csv_row(header, cells)
+        read = time.perf_counter() - start
+        results.append({"format": "csv", "bytes": os.path.getsize(out), "write_s": written,
+                        "read_s": read, "column_s": read})
+
+        for codec in CODECS:
+            out = os.path.join(tmp, f"bench_{codec}{EXTENSION}")
+            start = time.perf_counter()
+            with RecordingWriter(out, codec=codec) as writer:
+                writer.write(rows)
+            written = time.perf_counter() - start
+            # Opening (indexing) counts towards both read timings
+            start = time.perf_counter()
+            with RecordingReader(out) as reader:
+                for _ in reader.iter_columns(reader.names):
+                    pass
+            read = time.perf_counter() - start
+            start = time.perf_counter()
+            with RecordingReader(out) as reader:
+                reader.column(BENCH_COLUMN)
+            column = time.perf_counter() - start
+            results.append({"format": codec, "bytes": os.path.getsize(out), "write_s": written,
+                            "read_s": read, "column_s": column})
+
+    for result in results:
+        result["rows"] = len(rows)
+        result["ratio"] = results[0]["bytes"] / result["bytes"]
+    return results
+
+
+def print_benchmark(results: List[Dict[str, Any]]) -> None:
+    rows = results[0]["rows"]
+    print(f"🏁 {rows:,} rows (ratio vs CSV; one column = {BENCH_COLUMN} only)")
+    print(f"  {'format':<9} {'bytes':>12} {'ratio':>7} {'write rows/s':>13} {'read rows/s':>12} {'one column':>11}")
+    for r in results:
+        print(f"  {r['format']:<9} {r['bytes']:>12,} {r['ratio']:>6.1f}x {rows / r['write_s']:>13,.0f} "
+              f"{rows / r['read_s']:>12,.0f} {r['column_s'] * 1000:>9.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert sensor recordings between CSV and the binary .srec format, or inspect one.")
+    parser.add_argument("input", help="sensor_data_*.csv or *.srec file")
+    parser.add_argument("output", nargs="?", help="Output file; the direction follows the input's extension")
+    parser.add_argument("--codec", choices=list(CODECS), default="raw", help="Codec for CSV → .srec")
+    parser.add_argument("--column", help="Print one column of a .srec file")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Compare size and speed of CSV and every codec on the input's rows")
+    args = parser.parse_args()
+
+    try:
+        if args.benchmark:
+            print_benchmark(benchmark(args.input))
+            return
+        if args.input.endswith(EXTENSION):
+            if not args.output:
+                show_info(args.input, args.column)
+                return
+            count = recording_to_csv(args.input, args.output)
+        else:
+            output = args.output or os.path.splitext(args.input)[0] + EXTENSION
+            count = csv_to_recording(args.input, output, codec=args.codec)
+            args.output = output
+    except (OSError, CorruptRecording, KeyError, ValueError) as e:
+        print(f"❌ Conversion failed: {e}")
+        sys.exit(1)
+
+    before, after = os.path.getsize(args.input), os.path.getsize(args.output)
+    print(f"✅ {count} rows: {args.input} ({before:,} B) → {args.output} ({after:,} B)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,39 @@
 import os
+import sys
 import time
-import board
-import busio
-import requests
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from pathlib import Path
 
-# ─── I2C DEVICES ───────────────────────────────────────────────────────────────
-from adafruit_ht16k33.segments import Seg14x4
-import adafruit_bme680
-from adafruit_apds9960.apds9960 import APDS9960
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils import hardware
+from utils.govee_groups import GROUP_PREFIX, resolve
+from utils.govee_pool import fan_out, make_session
+from utils.govee_queue import QuotaStore
+from utils.govee_registry import DeviceRegistry
+from utils.govee_router import DEVICE_CACHE, RouterClient
+from utils.govee_state import DeviceStateMirror
+from utils.govee_worker import IntentWorker
+from utils.scheduler import Scheduler
 
-i2c = busio.I2C(board.SCL, board.SDA)
+# ─── I2C DEVICES ───────────────────────────────────────────────────────────────
+# Real or simulated hardware, chosen by HARDWARE_BACKEND
+i2c = hardware.i2c()
 
 # Initialize sensors
-bme680 = adafruit_bme680.Adafruit_BME680_I2C(i2c)
-apds = APDS9960(i2c)
+bme680 = hardware.bme680(i2c)
+apds = hardware.apds9960(i2c)
 apds.enable_color = True
 apds.enable_proximity = True
 apds.enable_gesture = True
 # Initialize display
-display = Seg14x4(i2c, address=0x70)
+display = hardware.seg14x4(i2c, address=0x70)
 display.fill(0)
 # ─── ENVIRONMENT SETUP ─────────────────────────────────────────────────────────
 
 load_dotenv()
 API_KEY = os.getenv("GOVEE_API_KEY")
-BASE_URL = "https://openapi.api.govee.com"
 HEADERS = {
     "Govee-API-Key": API_KEY,
     "Content-Type": "application/json"
@@ -46,11 +53,30 @@ BUTTON_DEVICE_MAP: Dict[int, str] = {
     6: "kitchen",
     7: "kitchen tall boi",
     8: "Lamp boi",
-    9: "All",
-    10: "Basic Group Control",
+    9: "@all",          # every light mapped above
+    10: "@living room", # room from the groups file (see `lights --groups`)
 }
 
-device_states: Dict[str, bool] = {}
+# One worker and pooled connection per mapped light, so a swipe is one round trip
+FAN_OUT_WORKERS = len(BUTTON_DEVICE_MAP)
+SESSION = make_session(HEADERS, pool_size=FAN_OUT_WORKERS)
+
+# Daily request budget of the API key (shared with `lights`)
+QUOTA = QuotaStore(API_KEY)
+# Mirrored light state (shared with `lights`), persisted across restarts
+STATE = DeviceStateMirror(quota=QUOTA)
+# Govee calls run here so gesture polling never waits on HTTP
+WORKER = IntentWorker()
+
+# ─── TIMING ────────────────────────────────────────────────────────────────────
+
+GESTURE_INTERVAL = 0.02   # poll the APDS9960 gesture engine at 50 Hz
+SENSOR_INTERVAL = 10.0    # BME680 / light sample cadence, seconds
+SCROLL_DELAY = 0.4        # marquee step, seconds per character
+SCREEN_HOLD = 2.0         # pause on each reading once it has scrolled in
+
+# Latest environmental readings, refreshed by sample_sensors()
+readings: Dict[str, Optional[float]] = {}
 
 # ─── SAFE HELPERS ──────────────────────────────────────────────────────────────
 
@@ -61,131 +87,137 @@ def safe_call(sensor_func, fallback=None, label="sensor"):
         print(f"[Warning] {label} read failed: {e}")
         return fallback
 
-def format_and_display(display, label: str, value, unit: str):
+def format_reading(label: str, value, unit: str) -> str:
     if value is None:
-        msg = f"{label}: N/A"
-    else:
-        msg = f"{label} {value:.1f} {unit}"
-    display.marquee(msg + "    ", loop=False, delay=0.4)
+        return f"{label}: N/A"
+    return f"{label} {value:.1f} {unit}"
+
+class Marquee:
+    """
+    Non-blocking marquee: each step() shows the next 4-character window,
+    so the display can scroll while the main loop keeps polling gestures.
+    """
+
+    def __init__(self, display, width: int = 4):
+        self.display = display
+        self.width = width
+        self.text = ""
+        self.position = 0
+        self.hold_until = 0.0
+
+    def start(self, msg: str) -> None:
+        self.text = " " * self.width + msg + " " * self.width
+        self.position = 0
+
+    def done(self) -> bool:
+        return self.position > len(self.text) - self.width
+
+    def step(self) -> None:
+        if not self.done():
+            self.display.print(self.text[self.position:self.position + self.width])
+            self.position += 1
 
 # ─── GOVEE API ─────────────────────────────────────────────────────────────────
 
-def get_devices() -> List[Dict]:
-    try:
-        res = requests.get(f"{BASE_URL}/router/api/v1/user/devices", headers=HEADERS)
-        return res.json().get("data", []) if res.status_code == 200 else []
-    except Exception as e:
-        print(f"[Error] Failed to fetch devices: {e}")
-        return []
-
-def find_device(devices: List[Dict], name: str) -> Optional[Dict]:
-    return next((d for d in devices if d.get("deviceName") == name), None)
-
-def toggle_device(device: Dict, on: Optional[bool] = None) -> bool:
-    name = device.get("deviceName")
-    if name in EXCLUDED_DEVICES:
-        print(f"[Skip] Excluded: {name}")
-        return False
-
-    current_state = device_states.get(name, False)
-    new_state = on if on is not None else not current_state
-
-    payload = {
-        "requestId": "request-id",
-        "payload": {
-            "sku": device["sku"],
-            "device": device["device"],
-            "capability": {
-                "type": "devices.capabilities.on_off",
-                "instance": "powerSwitch",
-                "value": 1 if new_state else 0
-            }
-        }
-    }
+# On/off control through the Govee router, shared with the NeoTrellis switch
+ROUTER = RouterClient(SESSION, STATE, QUOTA, EXCLUDED_DEVICES)
+fetch_devices = ROUTER.fetch_devices
+fetch_state = ROUTER.fetch_state
+is_on = ROUTER.is_on
+toggle_device = ROUTER.toggle_device
 
-    try:
-        res = requests.post(f"{BASE_URL}/router/api/v1/device/control", headers=HEADERS, json=payload)
-        if res.status_code == 200:
-            print(f"[OK] {'On' if new_state else 'Off'}: {name}")
-            device_states[name] = new_state
-            return new_state
-        else:
-            print(f"[Fail] {res.status_code} for {name}")
-    except Exception as e:
-        print(f"[Error] Toggle failed for {name}: {e}")
-
-    return current_state
-
-def toggle_all_devices(on: bool) -> None:
-    devices = get_devices()
-    for name in BUTTON_DEVICE_MAP.values():
-        if name in EXCLUDED_DEVICES or name == "All":
-            continue
-        device = find_device(devices, name)
-        if device:
-            toggle_device(device, on=on)
+# Cached name/ID index of the router's devices, refreshed after its TTL
+REGISTRY = DeviceRegistry(fetch_devices, DEVICE_CACHE)
+
+def get_devices() -> List[Dict]:
+    """Devices from the cached index (fetched from the Govee API when empty or stale)."""
+    REGISTRY.ensure_fresh()
+    return REGISTRY.devices
+
+def toggle_all_devices(on: bool) -> int:
+    """Switch every mapped light concurrently; returns once all commands finish. Returns how many succeeded."""
+    names = [name for name in BUTTON_DEVICE_MAP.values()
+             if name not in EXCLUDED_DEVICES and not name.startswith(GROUP_PREFIX)]
+    get_devices()
+    devices, missing = resolve(names, REGISTRY.find)
+    for name in missing:
+        print(f"[Error] Device not found: {name}")
+
+    results = fan_out(lambda d: toggle_device(d, on=on), devices, workers=FAN_OUT_WORKERS)
+    done = sum(1 for result in results if result == on)
+    print(f"[All] {'On' if on else 'Off'}: {done}/{len(devices)}")
+    return done
             
 def gesture_check():
-       # ─── Gesture Check ─────────────────────────────────────
-    gesture = apds.gesture()
+    """Poll for a swipe and hand the light switch to the worker. Returns immediately."""
+    gesture = safe_call(apds.gesture, fallback=0, label="Gesture")
     if gesture == 0x01:
         print("[Gesture] Up → All lights ON")
-        toggle_all_devices(True)
+        WORKER.submit("all", lambda: toggle_all_devices(True))
     elif gesture == 0x02:
         print("[Gesture] Down → All lights OFF")
-        toggle_all_devices(False)
+        WORKER.submit("all", lambda: toggle_all_devices(False))
+
+# ─── SENSING & DISPLAY ─────────────────────────────────────────────────────────
+
+def sample_sensors() -> None:
+    readings["temperature"] = safe_call(lambda: bme680.temperature, label="Temperature")
+    readings["gas"] = safe_call(lambda: bme680.gas, label="Gas")
+    readings["pressure"] = safe_call(lambda: bme680.pressure, label="Pressure")
+    readings["humidity"] = safe_call(lambda: bme680.humidity, label="Humidity")
+    color_data = safe_call(lambda: apds.color_data, label="Light")
+    readings["light"] = color_data[3] if color_data else None
+
+def screens() -> List[str]:
+    """Messages the display rotates through, built from the latest readings."""
+    temperature = readings.get("temperature")
+    return [
+        format_reading("temp", temperature, "C"),
+        format_reading("temp", ((9/5)*temperature)+32 if temperature is not None else None, "F"),
+        format_reading("gas", readings.get("gas"), "k"),
+        format_reading("p", readings.get("pressure"), "h"),
+        format_reading("h", readings.get("humidity"), "%"),
+        # format_reading("light", readings.get("light"), "lux"),
+        format_reading("stay magical cunt", 420, "\_ ^_^)_/"),
+    ]
+
+def display_rotator(marquee: Marquee):
+    """Scroll task: steps the current message, holds it, then moves to the next screen."""
+    screen = 0
+
+    def step() -> None:
+        nonlocal screen
+        if not marquee.done():
+            marquee.step()
+            if marquee.done():
+                marquee.hold_until = time.monotonic() + SCREEN_HOLD
+        elif time.monotonic() >= marquee.hold_until:
+            messages = screens()
+            marquee.start(messages[screen % len(messages)])
+            screen += 1
+
+    return step
 
 # ─── MAIN ──────────────────────────────────────────────────────────────────────
 
 def main():
-
-
     print("[Start] Gesture + Sensor display loop. Swipe up = ON, down = OFF.")
 
-    try:
-        while True:
-            # ─── Sensor Readout ─────────────────────────────────────
-            temperature = safe_call(lambda: bme680.temperature, label="Temperature")
-            gas = safe_call(lambda: bme680.gas, label="Gas")
-            pressure = safe_call(lambda: bme680.pressure, label="Pressure")
-            humidity = safe_call(lambda: bme680.humidity, label="Humidity")
-            color_data = safe_call(lambda: apds.color_data, label="Light")
-            gesture_check()
-            # ─── Display Info ──────────────────────────────────────
-            format_and_display(display, "temp", temperature, "C")
-            time.sleep(2)
-            gesture_check()
-            if temperature is not None:
-                format_and_display(display, "temp", ((9/5)*temperature)+32, "F")
-            else:
-                format_and_display(display, "temp", None, "F")
-            time.sleep(2)
-            gesture_check()
-            format_and_display(display, "gas", gas, "k")
-            gesture_check()
-            time.sleep(2)
-            format_and_display(display, "p", pressure, "h")
-            gesture_check()
-
-            time.sleep(2)
-            gesture_check()
-
-            format_and_display(display, "h", humidity, "%")
-            time.sleep(2)
-            gesture_check()
-
-            # format_and_display(display, "light", color_data, "lux")
-            # time.sleep(2)
-            format_and_display(display, "stay magical cunt", 420 ,"\_ ^_^)_/")
-            time.sleep(2)
-            gesture_check()
-
-
-     
+    sample_sensors()
+    scheduler = Scheduler()
+    scheduler.every(GESTURE_INTERVAL, gesture_check, name="gesture")
+    scheduler.every(GESTURE_INTERVAL, WORKER.run_callbacks, name="callbacks")
+    scheduler.every(SENSOR_INTERVAL, sample_sensors, name="sensors", delay=SENSOR_INTERVAL)
+    scheduler.every(SCROLL_DELAY, display_rotator(Marquee(display)), name="display")
 
+    try:
+        scheduler.run()
     except KeyboardInterrupt:
         display.fill(0)
         print("[Exit] Program terminated by user.")
+        for name, stats in scheduler.stats().items():
+            print(f"[Timing] {name}: {stats['achieved_hz']}/{stats['target_hz']} Hz, "
+                  f"{stats['missed']} missed, worst {stats['max_late_ms']} ms late")
 
 # ─── RUN ───────────────────────────────────────────────────────────────────────
 
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import hardware
+from utils.acquisition import parse_rates, sensor_rates
+from utils.sensor_health import print_health
+from utils.sensor_hub import DEFAULT_ADDRESS, SensorHub
+
+from cmds.sensor_array import SensorInitializer, SensorReader
+
+GESTURE_RATE = 50.0   # same cadence sensor_display polls the gesture engine at
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Own the I2C sensors and publish their samples to local clients "
+                    "(point them at it with SENSOR_HUB=<address>).")
+    parser.add_argument("--address", default=hardware.HUB or DEFAULT_ADDRESS,
+                        help=f"Unix socket path or host:port (default: $SENSOR_HUB or {DEFAULT_ADDRESS})")
+    parser.add_argument("--frequency", type=float, default=50.0,
+                        help="Default sensor rate in Hz (BME680 and GPS stay at 1 Hz)")
+    parser.add_argument("--rates", type=parse_rates, default=None,
+                        help='Per-sensor rates, e.g. "lsm9ds1=100,apds9960=10"')
+    parser.add_argument("--gestures", action="store_true",
+                        help="Also run the APDS9960 gesture engine and publish swipes")
+    args = parser.parse_args()
+
+    # This process is the one that talks to the bus
+    hardware.own_sensors()
+    initializer = SensorInitializer()
+    initializer.configure_sensors()
+    sensors = initializer.sensors
+
+    readers = {
+        "lsm9ds1": lambda: SensorReader.read_lsm9ds1(sensors["lsm9ds1"]),
+        "apds9960": lambda: SensorReader.read_apds9960(sensors["apds9960"]),
+        "bme680": lambda: SensorReader.read_bme680(sensors["bme680"]),
+        "gps": lambda: SensorReader.read_gps(sensors["gps"]),
+    }
+    rates = sensor_rates(list(readers), args.frequency, args.rates)
+    if args.gestures:
+        sensors["apds9960"].enable_gesture = True
+
+        def read_gesture():
+            gesture = SensorReader.safe_read(sensors["apds9960"].gesture, name="gesture")
+            return (gesture,) if gesture else None
+        readers["gesture"] = read_gesture
+        rates["gesture"] = GESTURE_RATE
+
+    hub = SensorHub(readers, rates)
+    print(f"📡 Sensor hub on {args.address}: "
+          + ", ".join(f"{name} {rate:g} Hz" for name, rate in rates.items()))
+    try:
+        asyncio.run(hub.serve(args.address))
+    except KeyboardInterrupt:
+        print(f"\n🛑 Hub stopped after {hub.published} samples.")
+        print_health()
+
+
+if __name__ == "__main__":
+    main()
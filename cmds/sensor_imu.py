@@ -0,0 +1,45 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.sensor_file import CorruptRecording
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute tilt, heading, filtered orientation, steps and vibration from a recording's IMU data.")
+    parser.add_argument("input", help="sensor_data_*.csv or *.srec file")
+    parser.add_argument("output", nargs="?", help="Feature CSV (default: <input>_imu.csv)")
+    parser.add_argument("--alpha", type=float, default=None, help="Complementary filter gyro weight (default 0.98)")
+    parser.add_argument("--window", type=float, default=None, help="Rolling RMS window in seconds (default 1)")
+    parser.add_argument("--step-threshold", type=float, default=None,
+                        help="Dynamic acceleration (m/s²) a step peak must exceed (default 1.5)")
+    args = parser.parse_args()
+
+    try:
+        from utils.imu import write_features
+    except ImportError:
+        print("❌ IMU processing needs NumPy: pip install numpy")
+        sys.exit(1)
+
+    options = {key: value for key, value in (("alpha", args.alpha), ("window", args.window),
+                                             ("step_threshold", args.step_threshold)) if value is not None}
+    start = time.monotonic()
+    try:
+        summary = write_features(args.input, args.output, **options)
+    except (OSError, CorruptRecording, KeyError, ValueError) as e:
+        print(f"❌ Processing failed: {e}")
+        sys.exit(1)
+    elapsed = time.monotonic() - start
+
+    print(f"🧭 {summary['rows']:,} IMU rows ({summary['duration_s'] / 60:.1f} min) in {elapsed:.2f} s")
+    print(f"  👣 Steps: {summary['steps']} ({summary['cadence_spm']} per min)")
+    print(f"  📳 Peak vibration RMS: {summary['peak_accel_rms']} m/s²")
+    print(f"💾 Written to {summary['output']}")
+
+
+if __name__ == "__main__":
+    main()
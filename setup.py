@@ -8,6 +8,9 @@ setup(
         'requests',
         'python-dotenv'
     ],
+    extras_require={
+        'imu': ['numpy'],
+    },
     entry_points={
         'console_scripts': [
             'weather = cmds.weather:main',
@@ -16,8 +19,14 @@ setup(
             'sky = cmds.sky:main',
             'weather_log = cmds.weather_logger:main',
             'sensors = cmds.s_array:main',
+            'sensor_convert = cmds.sensor_convert:main',
+            'sensor_bench = cmds.sensor_bench:main',
+            'sensor_replay = cmds.sensor_replay:main',
+            'sensor_imu = cmds.sensor_imu:main',
+            'sensor_hub = cmds.sensor_hub:main',
             'lights = cmds.lights:main',
             'pollen = cmds.pollen:main',
+            'pollen_log = cmds.pollen_logger:main',
             'scan = cmds.scan_network:main',
             'nyc = cmds.might_take_awhile:main'
 
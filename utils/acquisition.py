@@ -0,0 +1,299 @@
+"""
+Multi-rate sensor acquisition shared by `s_array` and `sensor_array`.
+
+Every sensor is sampled at its own rate on a monotonic, deadline-based
+scheduler, and rows are emitted at the recording frequency from the latest
+sample of each sensor (slow sensors hold their last value between reads).
+"""
+import csv
+import math
+import time
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.events import EventWriter, parse_triggers
+from utils.ring_buffer import BlockWriter, RateLimitedPrinter, RingBuffer
+from utils.rollups import RollupWriter
+from utils.scheduler import Scheduler
+from utils.sensor_threads import SensorThread
+
+# ─── CSV layout ────────────────────────────────────────────────────────────────
+SENSOR_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "lsm9ds1": ("Accel_X", "Accel_Y", "Accel_Z", "Gyro_X", "Gyro_Y", "Gyro_Z",
+                "Mag_X", "Mag_Y", "Mag_Z", "Temp_LSM9DS1"),
+    "apds9960": ("Proximity", "Color_R", "Color_G", "Color_B", "Color_C"),
+    "bme680": ("BME680_Temp", "Gas", "Humidity", "Pressure"),
+    "gps": ("GPS_Latitude", "GPS_Longitude", "GPS_Speed"),
+}
+# Bit set in the Valid column for each sensor whose columns hold a real reading
+VALID_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(SENSOR_COLUMNS)}
+CSV_COLUMNS: List[str] = (["Timestamp"] + [c for columns in SENSOR_COLUMNS.values() for c in columns]
+                          + ["Valid"])
+# Counts, written without a trailing ".0"
+INT_COLUMNS = {"Proximity", "Color_R", "Color_G", "Color_B", "Color_C", "Gas", "Valid"}
+
+# Missing readings are written as empty (NaN) cells, never as fake zeros
+PLACEHOLDERS: Dict[str, Tuple[Any, ...]] = {name: (None,) * len(columns) for name, columns in SENSOR_COLUMNS.items()}
+
+# Sensors that change slowly; they are never sampled faster than this (Hz)
+DEFAULT_RATES: Dict[str, float] = {
+    "bme680": 1.0,
+    "gps": 1.0,
+}
+
+
+def flatten(name: str, reading: Optional[Sequence[Any]]) -> Tuple[Any, ...]:
+    """Turn a SensorReader/SensorSuite reading into its CSV columns."""
+    if reading is None:
+        return PLACEHOLDERS[name]
+    if name == "lsm9ds1":
+        accel, gyro, mag, temp = reading
+        return (*accel, *gyro, *mag, temp)
+    if name == "apds9960":
+        prox, color, _lux = reading
+        return (prox, *color)
+    return tuple(reading)
+
+
+def unflatten(name: str, values: Sequence[Any]) -> Tuple[Any, ...]:
+    """Inverse of flatten(): one sensor's CSV columns back into its reading."""
+    if name == "lsm9ds1":
+        return tuple(values[0:3]), tuple(values[3:6]), tuple(values[6:9]), values[9]
+    if name == "apds9960":
+        color = tuple(int(v) for v in values[1:5])
+        return int(values[0]), color, sum(color)
+    return tuple(values)
+
+
+def parse_rates(text: Optional[str]) -> Dict[str, float]:
+    """Parse "lsm9ds1=100,bme680=1" into per-sensor rates."""
+    rates: Dict[str, float] = {}
+    for part in (text or "").split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name not in SENSOR_COLUMNS:
+            raise ValueError(f"❌ Unknown sensor '{name}' (expected one of {', '.join(SENSOR_COLUMNS)})")
+        rates[name] = float(value)
+    return rates
+
+
+def sensor_rates(names: Sequence[str], frequency: float,
+                 rates: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Effective rate per sensor: explicit rate, else its default, capped at the row frequency."""
+    rates = rates or {}
+    return {name: rates.get(name, min(DEFAULT_RATES.get(name, frequency), frequency)) for name in names}
+
+
+# ─── Clock ─────────────────────────────────────────────────────────────────────
+class SampleClock:
+    """
+    Monotonic time mapped onto the wall clock once, at start, so timestamps have
+    sub-millisecond resolution and never jump when NTP adjusts the system time.
+    """
+
+    def __init__(self):
+        self.mono0 = time.monotonic()
+        self.wall0 = time.time()
+
+    @staticmethod
+    def now() -> float:
+        return time.monotonic()
+
+    def epoch(self, mono: float) -> float:
+        return self.wall0 + (mono - self.mono0)
+
+    def timestamp(self, mono: float) -> str:
+        return format_timestamp(self.epoch(mono))
+
+
+def format_timestamp(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch).isoformat(timespec="microseconds")
+
+
+def format_row(row: Sequence[float]) -> List[Any]:
+    """Numeric row (epoch seconds, floats with NaN for missing) → CSV values."""
+    out: List[Any] = [format_timestamp(row[0])]
+    for column, value in zip(CSV_COLUMNS[1:], row[1:]):
+        if math.isnan(value):
+            out.append(None)
+        elif column in INT_COLUMNS:
+            out.append(int(value))
+        else:
+            out.append(value)
+    return out
+
+
+# ─── Engine ────────────────────────────────────────────────────────────────────
+class AcquisitionEngine:
+    """
+    Samples each sensor on its own deadline and emits one row per recording tick.
+
+    `readers` maps a sensor name (see SENSOR_COLUMNS) to a zero-argument read
+    function returning its reading or None. `latest[name]` holds the most recent
+    (monotonic time, reading) pair.
+
+    With `threaded`, each sensor is polled on its own SensorThread and rows snapshot
+    whatever each thread last published, so a stalled sensor only holds its own
+    columns. Drivers sharing a bus must then be wrapped with `sensor_threads.locked`.
+    """
+
+    def __init__(self, readers: Dict[str, Callable[[], Optional[Sequence[Any]]]], frequency: float,
+                 rates: Optional[Dict[str, float]] = None, threaded: bool = True):
+        if frequency <= 0:
+            raise ValueError(f"❌ Frequency must be positive, got {frequency}")
+        self.readers = readers
+        self.frequency = frequency
+        self.rates = sensor_rates(list(readers), frequency, rates)
+        self.threaded = threaded
+        self.latest: Dict[str, Tuple[float, Optional[Sequence[Any]]]] = {}
+        self.clock = SampleClock()
+        self.scheduler = Scheduler()
+        self._row: List[Any] = [0.0] * len(CSV_COLUMNS)
+
+    def sample(self, name: str) -> None:
+        reading = self.readers[name]()
+        # One dict store: readers on other threads see the old or the new pair, never half
+        self.latest[name] = (self.clock.now(), reading)
+
+    def row(self) -> List[Any]:
+        """
+        Snapshot the latest reading of every sensor into one row in CSV_COLUMNS order,
+        with the timestamp as epoch seconds and a VALID_BITS mask last. The list is
+        reused on the next tick.
+        """
+        row = self._row
+        row[0] = self.clock.epoch(self.clock.now())
+        i = 1
+        valid = 0
+        for name in SENSOR_COLUMNS:
+            reading = self.latest.get(name, (0.0, None))[1]
+            if reading is not None:
+                valid |= VALID_BITS[name]
+            for value in flatten(name, reading):
+                row[i] = value
+                i += 1
+        row[i] = valid
+        return row
+
+    def run(self, duration: float, on_row: Callable[[List[Any]], None]) -> Dict[str, Dict[str, Any]]:
+        """
+        Record for `duration` seconds, calling `on_row` per tick (copy the row to keep it).
+        Returns per-task timing stats.
+        """
+        threads: List[SensorThread] = []
+        for name in self.readers:
+            if self.threaded:
+                threads.append(SensorThread(name, partial(self.sample, name), self.rates[name]))
+            else:
+                self.scheduler.every(1 / self.rates[name], partial(self.sample, name), name=name)
+        # Registered last so each row sees the samples taken on the same tick
+        self.scheduler.every(1 / self.frequency, lambda: on_row(self.row()), name="rows")
+
+        for thread in threads:
+            thread.start()
+        try:
+            self.scheduler.run(duration)
+        finally:
+            for thread in threads:
+                thread.stop()
+
+        stats = {thread.name: thread.stats() for thread in threads}
+        stats.update(self.scheduler.stats())
+        return stats
+
+    def stop(self) -> None:
+        """End run() early (safe from another thread)."""
+        self.scheduler.stop()
+
+
+class CsvSink:
+    """Writes numeric rows as the sensor CSV layout."""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_COLUMNS)
+
+    def write(self, rows: List[List[float]]) -> None:
+        self.writer.writerows([format_row(row) for row in rows])
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def open_sink(path: str, codec: str = "raw") -> Any:
+    """CSV sink, or a binary RecordingWriter for .srec paths."""
+    if path.endswith(".srec"):
+        from utils.sensor_file import RecordingWriter  # imports this module
+        return RecordingWriter(path, codec=codec)
+    return CsvSink(path)
+
+
+def record(engine: AcquisitionEngine, path: str, duration: float,
+           show: Optional[Callable[[List[Any]], None]] = None,
+           summary_every: float = 1.0, codec: str = "raw",
+           rollups: Optional[str] = None, raw: bool = True,
+           triggers: Optional[Sequence[str]] = None, pre: float = 5.0,
+           post: float = 5.0) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the engine into a ring buffer while a background writer encodes and writes
+    the file (CSV, or .srec) in blocks. `show(row)` gets at most one formatted row
+    per `summary_every` s.
+
+    `rollups` ("1s,1m,1h") also writes per-window channel statistics next to `path`
+    as `<path stem>_1s.csv`, ...; with `raw=False` only the rollups are kept.
+
+    `triggers` (see utils.events) keep `pre` seconds before and `post` seconds after
+    each event in `<path stem>_event_001.csv`, ..., indexed in `<path stem>_events.csv`.
+
+    If writing fails the engine is stopped and the error re-raised, rather than
+    sampling for the rest of `duration` into a dead sink.
+    """
+    # About ten seconds of rows, so a slow SD card write never stalls acquisition.
+    # Sources that are not real time (replays at max speed) wait for the writer instead.
+    buffer = RingBuffer(len(CSV_COLUMNS), capacity=max(4096, int(engine.frequency * 10)),
+                        blocking=not getattr(engine, "realtime", True))
+    printer = RateLimitedPrinter(lambda row: show(format_row(row)), summary_every) if show else None
+    sinks = [open_sink(path, codec)] if raw else []
+    if rollups:
+        stem = path.rsplit(".", 1)[0]
+        sinks.append(RollupWriter(stem, CSV_COLUMNS[1:-1], rollups, columns=CSV_COLUMNS))
+    if triggers:
+        extension = ".srec" if path.endswith(".srec") else ".csv"
+        sinks.append(EventWriter(path.rsplit(".", 1)[0], parse_triggers(triggers, CSV_COLUMNS),
+                                 round(pre * engine.frequency), round(post * engine.frequency),
+                                 partial(open_sink, codec=codec), extension))
+
+    def write(rows: List[List[float]]) -> None:
+        for sink in sinks:
+            sink.write(rows)
+        if printer:
+            printer(rows)
+
+    block_writer = BlockWriter(buffer, write, on_error=lambda e: engine.stop())
+    try:
+        stats = engine.run(duration, buffer.append)
+    finally:
+        block_writer.stop()
+        for sink in sinks:
+            sink.close()
+
+    if block_writer.error is not None:
+        raise block_writer.error
+
+    if buffer.overruns:
+        print(f"⚠️ Writer fell behind: {buffer.overruns} rows dropped")
+    return stats
+
+
+def print_report(stats: Dict[str, Dict[str, Any]]) -> None:
+    """Achieved vs target rate and missed deadlines, one line per sensor."""
+    print("📊 Acquisition report:")
+    for name, s in stats.items():
+        flag = "✅" if s["missed"] == 0 else "⚠️"
+        print(f"  {flag} {name:<9} {s['achieved_hz']:>8.2f} / {s['target_hz']:<8g} Hz  "
+              f"missed: {s['missed']:<5} worst late: {s['max_late_ms']:.1f} ms  "
+              f"busy: {s['busy_ms']:.0f} ms")
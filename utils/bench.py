@@ -0,0 +1,106 @@
+"""
+Timing probes for benchmarking the acquisition loop (see cmds/sensor_bench.py).
+
+`LatencyHistogram` keeps every sample of one read function, so percentiles are
+exact; runs are seconds to minutes long, so that is at most a few hundred
+thousand floats. `TickJitter` records when each row tick actually ran.
+"""
+import math
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+# Histogram bucket upper bounds in microseconds: 16 µs ... ~1 s, doubling
+BUCKETS_US: List[int] = [16 * 2 ** i for i in range(17)]
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear-interpolated percentile `q` (0-100) of an already sorted sequence."""
+    if not ordered:
+        return math.nan
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3) if seconds == seconds else None
+
+
+# ──────────────────────────────────────────────────────────────
+# ⏱️ Read latency
+# ──────────────────────────────────────────────────────────────
+class LatencyHistogram:
+    """Durations of one read function, in seconds."""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def timed(self, fn: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap `fn` so every call's wall time is recorded (list.append is thread safe)."""
+        record = self.samples.append
+        clock = time.perf_counter
+
+        def call() -> Any:
+            start = clock()
+            try:
+                return fn()
+            finally:
+                record(clock() - start)
+        return call
+
+    def buckets(self) -> Dict[str, int]:
+        """Counts per "≤N µs" bucket, skipping empty ones."""
+        counts = [0] * (len(BUCKETS_US) + 1)
+        for sample in self.samples:
+            us = sample * 1e6
+            for i, bound in enumerate(BUCKETS_US):
+                if us <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"<={bound}us" for bound in BUCKETS_US] + [f">{BUCKETS_US[-1]}us"]
+        return {label: count for label, count in zip(labels, counts) if count}
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+        return {
+            "reads": len(ordered),
+            "mean_ms": _ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50_ms": _ms(percentile(ordered, 50)),
+            "p95_ms": _ms(percentile(ordered, 95)),
+            "p99_ms": _ms(percentile(ordered, 99)),
+            "max_ms": _ms(ordered[-1]) if ordered else None,
+            "histogram": self.buckets(),
+        }
+
+
+# ──────────────────────────────────────────────────────────────
+# 📏 Loop jitter
+# ──────────────────────────────────────────────────────────────
+class TickJitter:
+    """Intervals between consecutive ticks compared with the target period."""
+
+    def __init__(self, frequency: float):
+        self.period = 1 / frequency
+        self.ticks: List[float] = []
+
+    def tick(self) -> None:
+        self.ticks.append(time.monotonic())
+
+    def summary(self) -> Dict[str, Any]:
+        intervals = [b - a for a, b in zip(self.ticks, self.ticks[1:])]
+        if not intervals:
+            return {"ticks": len(self.ticks)}
+        mean = sum(intervals) / len(intervals)
+        std = math.sqrt(sum((i - mean) ** 2 for i in intervals) / len(intervals))
+        errors = sorted(abs(i - self.period) for i in intervals)
+        return {
+            "ticks": len(self.ticks),
+            "period_ms": _ms(self.period),
+            "mean_interval_ms": _ms(mean),
+            "std_ms": _ms(std),
+            "p99_error_ms": _ms(percentile(errors, 99)),
+            "max_error_ms": _ms(errors[-1]),
+        }
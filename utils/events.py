@@ -0,0 +1,174 @@
+"""
+Event-triggered capture: keep full-rate rows only around interesting moments.
+
+Trigger expressions are evaluated on every row, e.g.
+
+    approach: Proximity > 50
+    gas: d_Gas < -5000
+    shake: abs(Accel_Z - 9.8) > 4 and Valid & 1
+
+Names are CSV columns (see acquisition.CSV_COLUMNS); `d_<Column>` is the change
+since the previous row. Operators: comparisons, and/or/not, + - * /, & and
+abs/min/max. An optional "name:" prefix labels the trigger in the event index.
+Missing readings are NaN, so comparisons on them are false.
+
+`EventWriter` is a record() sink. It holds the last `pre` rows in memory; when a
+trigger goes from false to true it writes them plus the following `post` rows to
+`<base>_event_001.csv` (or .srec), and appends a line to `<base>_events.csv`.
+A trigger that fires again during the post window extends the same event.
+"""
+import ast
+import csv
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+INDEX_COLUMNS = ["Event", "Triggers", "Start", "Trigger_Time", "End", "Rows", "File"]
+
+_FUNCTIONS = {"abs": abs, "min": min, "max": max}
+_NODES = (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+          ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.BitAnd, ast.Compare, ast.Gt, ast.GtE,
+          ast.Lt, ast.LtE, ast.Eq, ast.NotEq, ast.Name, ast.Load, ast.Constant, ast.Call)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎯 Triggers
+# ──────────────────────────────────────────────────────────────
+class Trigger:
+    """A boolean expression over one row's columns, compiled once."""
+
+    def __init__(self, text: str, columns: Sequence[str]):
+        name, sep, expression = text.partition(":")
+        if not sep:
+            name, expression = "", text
+        self.expression = expression.strip()
+        self.name = name.strip() or self.expression
+        try:
+            tree = ast.parse(self.expression, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"❌ Bad trigger '{text}': {e.msg}") from None
+
+        self.names: List[str] = []
+        for node in ast.walk(tree):
+            if not isinstance(node, _NODES):
+                raise ValueError(f"❌ Bad trigger '{text}': {type(node).__name__} is not allowed")
+            if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name)
+                                                   and node.func.id in _FUNCTIONS):
+                raise ValueError(f"❌ Bad trigger '{text}': only {', '.join(_FUNCTIONS)} can be called")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+                raise ValueError(f"❌ Bad trigger '{text}': only numbers are allowed")
+            if isinstance(node, ast.Name) and node.id not in _FUNCTIONS:
+                column = node.id[2:] if node.id.startswith("d_") else node.id
+                if column not in columns:
+                    raise ValueError(f"❌ Bad trigger '{text}': unknown column '{column}'")
+                self.names.append(node.id)
+        self.code = compile(tree, f"<trigger {self.name}>", "eval")
+        self.index = {name: columns.index(name[2:] if name.startswith("d_") else name)
+                      for name in self.names}
+        self.active = False
+
+    def fired(self, row: Sequence[float], previous: Optional[Sequence[float]]) -> bool:
+        """Whether the expression is true on `row` and was false on the row before."""
+        scope: Dict[str, Any] = dict(_FUNCTIONS)
+        for name, i in self.index.items():
+            if name.startswith("d_"):
+                scope[name] = row[i] - previous[i] if previous is not None else math.nan
+            elif name == "Valid":
+                scope[name] = int(row[i])   # a bit mask, for &
+            else:
+                scope[name] = row[i]
+        try:
+            value = bool(eval(self.code, {"__builtins__": {}}, scope))
+        except (ArithmeticError, TypeError):   # / 0, NaN & 1, ...
+            value = False
+        fired = value and not self.active
+        self.active = value
+        return fired
+
+
+def parse_triggers(texts: Optional[Sequence[str]], columns: Sequence[str]) -> List[Trigger]:
+    return [Trigger(text, columns) for text in texts or []]
+
+
+# ──────────────────────────────────────────────────────────────
+# 💾 Event files
+# ──────────────────────────────────────────────────────────────
+class EventWriter:
+    """
+    record() sink that persists `pre` rows before and `post` rows after each trigger.
+    `open_sink(path)` opens one event file (CSV or .srec, by extension).
+    """
+
+    def __init__(self, base_path: str, triggers: Sequence[Trigger], pre: int, post: int,
+                 open_sink: Any, extension: str = ".csv"):
+        self.base_path = base_path
+        self.triggers = list(triggers)
+        self.post = max(post, 0)
+        self.open_sink = open_sink
+        self.extension = extension
+        self.history: Deque[List[float]] = deque(maxlen=max(pre, 0))
+        self.previous: Optional[List[float]] = None
+        self.events = 0
+        self.sink: Any = None
+        self.event: Dict[str, Any] = {}
+        self.remaining = 0
+
+        self.index_path = f"{base_path}_events.csv"
+        self.index_file = open(self.index_path, "w", newline="")
+        self.index = csv.writer(self.index_file)
+        self.index.writerow(INDEX_COLUMNS)
+
+    def _open(self, row: List[float], fired: List[Trigger]) -> None:
+        from utils.acquisition import format_timestamp  # imports this module
+        self.events += 1
+        path = f"{self.base_path}_event_{self.events:03d}{self.extension}"
+        rows = list(self.history)
+        self.history.clear()
+        self.sink = self.open_sink(path)
+        self.event = {
+            "path": path,
+            "triggers": [t.name for t in fired],
+            "start": (rows[0] if rows else row)[0],
+            "trigger_time": row[0],
+            "rows": len(rows),
+        }
+        print(f"🎯 Event {self.events} at {format_timestamp(row[0])}: {', '.join(self.event['triggers'])}")
+        if rows:
+            self.sink.write(rows)
+
+    def _close(self) -> None:
+        from utils.acquisition import format_timestamp
+        event = self.event
+        self.sink.close()
+        self.sink = None
+        self.index.writerow([self.events, "; ".join(dict.fromkeys(event["triggers"])),
+                             format_timestamp(event["start"]), format_timestamp(event["trigger_time"]),
+                             format_timestamp(event["end"]), event["rows"], event["path"]])
+        self.index_file.flush()
+
+    def write(self, rows: Sequence[List[float]]) -> None:
+        for row in rows:
+            fired = [t for t in self.triggers if t.fired(row, self.previous)]
+            self.previous = row
+            if self.sink is None:
+                if not fired:
+                    self.history.append(row)
+                    continue
+                self._open(row, fired)
+            elif fired:
+                self.event["triggers"] += [t.name for t in fired]
+            if fired:
+                self.remaining = self.post
+            else:
+                self.remaining -= 1
+            self.sink.write([row])
+            self.event["rows"] += 1
+            self.event["end"] = row[0]
+            if self.remaining <= 0:
+                self._close()
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self._close()
+        self.index_file.close()
+        print(f"🎯 {self.events} event(s) captured, index: {self.index_path}")
@@ -0,0 +1,228 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.govee_queue import TokenBucket
+
+RGB = Tuple[int, int, int]
+Lab = Tuple[float, float, float]
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Constants
+# ──────────────────────────────────────────────────────────────
+# Smallest OKLab distance worth a command (~1 just-noticeable difference)
+COLOR_THRESHOLD: float = 0.02
+# Smallest brightness step (percent) worth a command
+BRIGHTNESS_THRESHOLD: int = 5
+# Never evaluate curves faster than this, even with quota to spare
+MAX_FPS: float = 2.0
+# Fraction of the daily quota effects must leave untouched
+DAILY_RESERVE: float = 0.2
+
+WARM_AMBER: RGB = (255, 147, 41)
+WHITE: RGB = (255, 255, 255)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎨 OKLab color space
+# ──────────────────────────────────────────────────────────────
+def _to_linear(c: float) -> float:
+    c /= 255
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _from_linear(c: float) -> int:
+    c = max(0.0, min(1.0, c))
+    v = 12.92 * c if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+    return int(round(max(0.0, min(1.0, v)) * 255))
+
+
+def _cbrt(x: float) -> float:
+    return math.copysign(abs(x) ** (1 / 3), x)
+
+
+def rgb_to_oklab(rgb: RGB) -> Lab:
+    """sRGB (0–255) → OKLab."""
+    r, g, b = (_to_linear(c) for c in rgb)
+    l_ = _cbrt(0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b)
+    m_ = _cbrt(0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b)
+    s_ = _cbrt(0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b)
+    return (
+        0.2104542553 * l_ + 0.7936177850 * m_ - 0.0040720468 * s_,
+        1.9779984951 * l_ - 2.4285922050 * m_ + 0.4505937099 * s_,
+        0.0259040371 * l_ + 0.7827717662 * m_ - 0.8086757660 * s_,
+    )
+
+
+def oklab_to_rgb(lab: Lab) -> RGB:
+    """OKLab → sRGB (0–255), clipped to the gamut."""
+    L, a, b = lab
+    l = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return (
+        _from_linear(4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s),
+        _from_linear(-1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s),
+        _from_linear(-0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s),
+    )
+
+
+def mix(a: RGB, b: RGB, t: float) -> RGB:
+    """Interpolate two colors perceptually (in OKLab). t=0 → a, t=1 → b."""
+    la, lb = rgb_to_oklab(a), rgb_to_oklab(b)
+    return oklab_to_rgb(tuple(x + (y - x) * t for x, y in zip(la, lb)))
+
+
+def shift(rgb: RGB, lightness: float = 1.0, hue_degrees: float = 0.0) -> RGB:
+    """Scale OKLab lightness and rotate hue."""
+    L, a, b = rgb_to_oklab(rgb)
+    angle = math.radians(hue_degrees)
+    cos, sin = math.cos(angle), math.sin(angle)
+    return oklab_to_rgb((L * lightness, a * cos - b * sin, a * sin + b * cos))
+
+
+def delta_e(a: RGB, b: RGB) -> float:
+    """Perceptual distance between two colors (OKLab Euclidean)."""
+    return math.dist(rgb_to_oklab(a), rgb_to_oklab(b))
+
+
+# ──────────────────────────────────────────────────────────────
+# 🌊 Effect curves
+# ──────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Frame:
+    rgb: RGB
+    brightness: int
+
+
+def _wave(t: float, period: float) -> float:
+    """Raised cosine, 0 → 1 → 0 over one period."""
+    return (1 - math.cos(2 * math.pi * t / period)) / 2
+
+
+def _noise(t: float, cell: float) -> float:
+    """Smooth deterministic value noise in [0, 1]."""
+    x = t / cell
+    i, f = math.floor(x), x - math.floor(x)
+    h0 = (math.sin(i * 12.9898) * 43758.5453) % 1
+    h1 = (math.sin((i + 1) * 12.9898) * 43758.5453) % 1
+    f = f * f * (3 - 2 * f)
+    return h0 + (h1 - h0) * f
+
+
+def _between(low: int, high: int, t: float) -> int:
+    return int(round(low + (high - low) * t))
+
+
+# The cloud API allows ~10 commands/minute per device, so periods are
+# tuned in tens of seconds: faster curves would only alias.
+EFFECTS: Dict[str, Callable[[float, RGB], Frame]] = {
+    "breathe": lambda t, c: Frame(c, _between(25, 100, _wave(t, 60))),
+    "pulse": lambda t, c: Frame(c, _between(40, 100, _wave(t, 30) ** 3)),
+    "glow": lambda t, c: Frame(c, _between(60, 100, _wave(t, 90))),
+    "soft": lambda t, c: Frame(c, _between(55, 75, _wave(t, 120))),
+    "flash": lambda t, c: Frame(c, 100 if (t % 20) < 10 else 15),
+    "fade": lambda t, c: Frame(mix(c, shift(c, 0.75, 60), _wave(t, 120)), 100),
+    "warmth": lambda t, c: Frame(mix(c, WARM_AMBER, 0.5 * _wave(t, 180)), 90),
+    "shine": lambda t, c: Frame(mix(c, WHITE, 0.4 * _wave(t, 45)), 100),
+    "glimmer": lambda t, c: Frame(shift(c, 0.9 + 0.15 * _noise(t, 15)), _between(70, 100, _noise(t + 7, 15))),
+    "sparkle": lambda t, c: Frame(mix(c, WHITE, 0.6 if _noise(t, 10) > 0.75 else 0.0),
+                                  _between(60, 100, _noise(t + 3, 10))),
+}
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎞️ Frame scheduler
+# ──────────────────────────────────────────────────────────────
+class FrameScheduler:
+    """
+    Samples an effect curve and sends only frames that differ meaningfully from
+    the last one sent. The frame rate follows the quota: a frame goes out only when
+    every device bucket has room for it and the daily bucket stays above its reserve.
+
+    `send(rgb, brightness)` pushes one frame to all devices; either part is None
+    when it has not changed enough to be worth a command.
+    """
+
+    def __init__(self, effect: str, base: RGB, buckets: List[TokenBucket],
+                 send: Callable[[Optional[RGB], Optional[int]], None],
+                 account: Optional[TokenBucket] = None,
+                 color_threshold: float = COLOR_THRESHOLD,
+                 brightness_threshold: int = BRIGHTNESS_THRESHOLD,
+                 max_fps: float = MAX_FPS, reserve: float = DAILY_RESERVE,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if effect not in EFFECTS:
+            raise ValueError(f"Unknown effect: {effect}")
+        self.curve = EFFECTS[effect]
+        self.base = base
+        self.buckets = buckets
+        self.account = account
+        self.send = send
+        self.color_threshold = color_threshold
+        self.brightness_threshold = brightness_threshold
+        self.max_fps = max_fps
+        self.reserve = reserve
+        self.clock = clock
+        self.sleep = sleep
+        self.last: Optional[Frame] = None
+
+    def changes(self, frame: Frame) -> Tuple[bool, bool]:
+        """(color changed, brightness changed) relative to the last frame sent."""
+        if self.last is None:
+            return True, True
+        return (delta_e(frame.rgb, self.last.rgb) >= self.color_threshold,
+                abs(frame.brightness - self.last.brightness) >= self.brightness_threshold)
+
+    def wait_time(self, commands: int) -> float:
+        """Seconds until every device can take `commands` more commands."""
+        now = time.time()
+        wait = max((b.wait_time(now, amount=commands) for b in self.buckets), default=0.0)
+        if self.account is not None:
+            wait = max(wait, self.account.wait_time(now, amount=commands * len(self.buckets),
+                                                    floor=self.reserve * self.account.capacity))
+        return wait
+
+    def run(self, duration: float) -> Dict[str, float]:
+        """Play the effect for `duration` seconds. Returns frame statistics."""
+        start = self.clock()
+        computed = sent = commands = 0
+
+        while True:
+            t = self.clock() - start
+            if t >= duration:
+                break
+
+            frame = self.curve(t, self.base)
+            computed += 1
+            color_changed, brightness_changed = self.changes(frame)
+
+            if color_changed or brightness_changed:
+                needed = color_changed + brightness_changed
+                wait = self.wait_time(needed)
+                if wait > 0:
+                    if wait == float("inf"):
+                        print("⏳ Not enough quota left to animate; stopping effect.")
+                        break
+                    # Recompute after waiting so the frame sent is current
+                    self.sleep(min(wait, duration - t))
+                    continue
+
+                self.send(frame.rgb if color_changed else None,
+                          frame.brightness if brightness_changed else None)
+                self.last = Frame(frame.rgb if color_changed else self.last.rgb,
+                                  frame.brightness if brightness_changed else self.last.brightness)
+                sent += 1
+                commands += needed * len(self.buckets)
+
+            self.sleep(1 / self.max_fps)
+
+        elapsed = self.clock() - start
+        return {
+            "elapsed": elapsed,
+            "frames_computed": computed,
+            "frames_sent": sent,
+            "commands": commands,
+            "fps": sent / elapsed if elapsed else 0.0,
+        }
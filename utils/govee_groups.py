@@ -0,0 +1,106 @@
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Constants
+# ──────────────────────────────────────────────────────────────
+GROUPS_FILE: Path = Path(os.getenv("GOVEE_GROUPS_FILE", Path.home() / ".config" / "govee_groups.json"))
+
+# Button maps and group members refer to another group as "@name"
+GROUP_PREFIX: str = "@"
+# Built-in group: every device the caller knows about
+ALL: str = "all"
+
+SCENE_ACTIONS = ("state", "color", "brightness")
+
+
+# ──────────────────────────────────────────────────────────────
+# 🏠 Rooms and scenes
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class GroupConfig:
+    """
+    Named rooms (lists of device names or "@other room") and scenes
+    (a room plus state/color/brightness), loaded from a JSON file:
+
+        {
+          "rooms":  {"living room": ["couch", "parlor floor", "tall boy"]},
+          "scenes": {"living room warm 40%": {"room": "living room", "state": "on",
+                                              "color": "warm", "brightness": 40}}
+        }
+    """
+    rooms: Dict[str, List[str]] = field(default_factory=dict)
+    scenes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def members(self, name: str, everything: Iterable[str] = ()) -> List[str]:
+        """
+        Expand a room to device names, following nested "@room" references.
+        Order follows the config, duplicates are dropped. Raises KeyError if unknown.
+        """
+        everything = list(everything)
+        result: List[str] = []
+        seen = set()
+
+        def expand(room: str, trail: Tuple[str, ...]) -> None:
+            key = room.casefold()
+            if key in trail:
+                return  # ignore reference cycles
+            if key == ALL and key not in self.rooms:
+                entries = everything
+            else:
+                entries = self.rooms[key]
+            for entry in entries:
+                if entry.startswith(GROUP_PREFIX):
+                    expand(entry[len(GROUP_PREFIX):], trail + (key,))
+                elif entry.casefold() not in seen:
+                    seen.add(entry.casefold())
+                    result.append(entry)
+
+        expand(name.lstrip(GROUP_PREFIX), ())
+        return result
+
+    def scene(self, name: str, everything: Iterable[str] = ()) -> Tuple[List[str], Dict[str, Any]]:
+        """Return (device names, {"state", "color", "brightness"}) for a scene. Raises KeyError if unknown."""
+        scene = self.scenes[name.casefold()]
+        room = scene.get("room", ALL)
+        names = self.members(room, everything) if isinstance(room, str) else list(room)
+        return names, {k: scene[k] for k in SCENE_ACTIONS if scene.get(k) is not None}
+
+
+def load_groups(path: Path = GROUPS_FILE) -> GroupConfig:
+    """Load rooms and scenes; a missing file means no groups."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return GroupConfig()
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Could not parse {path}: {e}")
+        return GroupConfig()
+
+    return GroupConfig(
+        rooms={k.casefold(): list(v) for k, v in raw.get("rooms", {}).items()},
+        scenes={k.casefold(): dict(v) for k, v in raw.get("scenes", {}).items()},
+    )
+
+
+def resolve(names: Iterable[str], lookup: Callable[[str], Optional[Dict[str, Any]]]
+            ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Map device names to devices through an index lookup.
+    Returns (devices in name order without duplicates, names that were not found).
+    """
+    devices: List[Dict[str, Any]] = []
+    missing: List[str] = []
+    seen = set()
+    for name in names:
+        device = lookup(name)
+        if device is None:
+            missing.append(name)
+        elif device.get("device") not in seen:
+            seen.add(device.get("device"))
+            devices.append(device)
+    return devices, missing
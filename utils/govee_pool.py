@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Defaults
+# ──────────────────────────────────────────────────────────────
+DEFAULT_WORKERS: int = 8
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔌 Keep-alive session
+# ──────────────────────────────────────────────────────────────
+def make_session(headers: Optional[Dict[str, str]] = None, pool_size: int = DEFAULT_WORKERS) -> requests.Session:
+    """
+    Build a requests.Session whose connection pool is large enough for `pool_size`
+    concurrent workers, so every command reuses an open TLS connection to Govee.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+# ──────────────────────────────────────────────────────────────
+# 🚀 Concurrent fan-out
+# ──────────────────────────────────────────────────────────────
+def fan_out(fn: Callable[[T], R], items: Iterable[T], workers: int = DEFAULT_WORKERS) -> List[R]:
+    """
+    Run `fn` over `items` on a thread pool and return the results in input order.
+    Exceptions are re-raised from the first failing item, matching a plain loop.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if workers <= 1 or len(items) == 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(fn, items))
@@ -0,0 +1,300 @@
+import json
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.govee_pool import DEFAULT_WORKERS, fan_out
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Govee developer API quotas
+# ──────────────────────────────────────────────────────────────
+PER_DEVICE_PER_MINUTE: int = 10
+DAILY_LIMIT: int = 10000
+QUOTA_FILE: Path = Path.home() / ".cache" / "govee_quota.json"
+
+# Give up on a command rather than block the caller for longer than this
+MAX_WAIT: float = 120.0
+
+# A send callable returns the HTTP response (anything with status_code/headers) or None on network error
+Sender = Callable[[], Any]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🪣 Token bucket
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class TokenBucket:
+    """Classic token bucket: `capacity` burst, refilled at `rate` tokens per second."""
+    rate: float
+    capacity: float
+    tokens: float = -1.0
+    updated: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.tokens < 0:
+            self.tokens = self.capacity
+        if not self.updated:
+            self.updated = time.time()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: Optional[float] = None, amount: float = 1, floor: float = 0) -> float:
+        """Seconds until `amount` tokens can be taken without dropping below `floor` (0 if now)."""
+        now = time.time() if now is None else now
+        self._refill(now)
+        needed = amount + floor
+        if needed > self.capacity:
+            return float("inf")
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+    def take(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain_to(self, remaining: float, now: Optional[float] = None) -> None:
+        """Clamp local tokens to what the server says is left."""
+        self._refill(time.time() if now is None else now)
+        self.tokens = min(self.tokens, remaining)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"tokens": self.tokens, "updated": self.updated}
+
+
+# ──────────────────────────────────────────────────────────────
+# 💾 Persistent quota state
+# ──────────────────────────────────────────────────────────────
+class QuotaStore:
+    """
+    Persists per-API-key daily usage, per-device bucket levels and server-imposed
+    back-off deadlines, so quota accounting survives restarts.
+    The API key is stored only as a short hash.
+    """
+
+    def __init__(self, api_key: str, path: Path = QUOTA_FILE,
+                 per_minute: int = PER_DEVICE_PER_MINUTE, daily_limit: int = DAILY_LIMIT):
+        self.path = path
+        self.key = hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+        self.per_minute = per_minute
+        self.daily_limit = daily_limit
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # concurrent savers share one tmp file
+
+        state = self._load().get(self.key, {})
+        today = date.today().isoformat()
+        self.day: str = state.get("day", today)
+        self.used: int = state.get("used", 0) if self.day == today else 0
+        self.day = today
+        self.blocked_until: Dict[str, float] = state.get("blocked_until", {})
+        self.buckets: Dict[str, TokenBucket] = {
+            device: self._bucket(**saved) for device, saved in state.get("devices", {}).items()
+        }
+        # The daily quota is one bucket per key that refills over a day
+        self.account = TokenBucket(rate=daily_limit / 86400, capacity=daily_limit,
+                                   tokens=max(0.0, daily_limit - self.used))
+
+    def _bucket(self, **saved: float) -> TokenBucket:
+        return TokenBucket(rate=self.per_minute / 60, capacity=self.per_minute, **saved)
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def bucket(self, device: str) -> TokenBucket:
+        with self.lock:
+            if device not in self.buckets:
+                self.buckets[device] = self._bucket()
+            return self.buckets[device]
+
+    def record_use(self) -> None:
+        with self.lock:
+            today = date.today().isoformat()
+            if today != self.day:
+                self.day, self.used = today, 0
+            self.used += 1
+            self.account.take()
+
+    def save(self) -> None:
+        """Write state atomically, keeping entries for other API keys intact."""
+        now = time.time()
+        with self.save_lock:
+            with self.lock:
+                everything = self._load()
+                everything[self.key] = {
+                    "day": self.day,
+                    "used": self.used,
+                    "blocked_until": {k: v for k, v in self.blocked_until.items() if v > now},
+                    "devices": {k: b.to_dict() for k, b in self.buckets.items()},
+                }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(everything, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+
+
+# ──────────────────────────────────────────────────────────────
+# 📨 Rate-limit headers
+# ──────────────────────────────────────────────────────────────
+def retry_after(headers: Dict[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Return the epoch time the server asked us to wait until, if any."""
+    now = time.time() if now is None else now
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return now + float(value)
+        except ValueError:
+            try:
+                return parsedate_to_datetime(value).timestamp()
+            except (TypeError, ValueError):
+                pass
+    for name in ("API-RateLimit-Reset", "X-RateLimit-Reset"):
+        value = headers.get(name)
+        if value:
+            try:
+                reset = float(value)
+            except ValueError:
+                continue
+            # Govee sends an epoch timestamp; tolerate a delta in seconds too
+            return reset if reset > 1e9 else now + reset
+    return None
+
+
+def remaining(headers: Dict[str, str]) -> Tuple[Optional[float], Optional[float]]:
+    """(per-device remaining, per-account remaining) as reported by the server."""
+    def number(name: str) -> Optional[float]:
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+    return number("API-RateLimit-Remaining"), number("X-RateLimit-Remaining")
+
+
+# ──────────────────────────────────────────────────────────────
+# 🧵 Command queue
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class Command:
+    device: str
+    kind: str
+    send: Sender
+    label: str = ""
+    attempts: int = 0
+    submitted: float = field(default_factory=time.time)
+
+
+class CommandQueue:
+    """
+    Queue in front of the Govee control endpoint.
+
+    - Commands are coalesced per (device, kind): color A then color B only sends B.
+      A superseding command moves to the back so the device ends in the latest state.
+    - Each send waits on a per-device bucket and the per-key daily bucket.
+    - 429 / Retry-After / rate-limit reset headers block that device (or the key)
+      until the server's deadline; the command is then retried.
+    """
+
+    def __init__(self, store: QuotaStore, max_wait: float = MAX_WAIT, max_attempts: int = 3,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.store = store
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.pending: "OrderedDict[Tuple[str, str], Command]" = OrderedDict()
+        self.coalesced = 0
+        self.lock = threading.Lock()
+
+    def submit(self, device: str, kind: str, send: Sender, label: str = "") -> None:
+        """Queue a command, replacing any pending command of the same kind for the device."""
+        key = (device, kind)
+        with self.lock:
+            if key in self.pending:
+                self.coalesced += 1
+                del self.pending[key]
+            self.pending[key] = Command(device, kind, send, label or kind)
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def _wait_for_slot(self, device: str) -> Optional[float]:
+        """Seconds to wait before `device` may send, or None if it should be dropped."""
+        now = time.time()
+        bucket = self.store.bucket(device)
+        with self.store.lock:
+            wait = max(
+                bucket.wait_time(now),
+                self.store.account.wait_time(now),
+                self.store.blocked_until.get(device, 0) - now,
+                self.store.blocked_until.get("*", 0) - now,
+                0.0,
+            )
+        return wait if wait <= self.max_wait else None
+
+    def _send(self, command: Command) -> bool:
+        while command.attempts < self.max_attempts:
+            wait = self._wait_for_slot(command.device)
+            if wait is None:
+                print(f"⏳ Quota exhausted, dropping {command.label} for {command.device}")
+                return False
+            if wait:
+                self.sleep(wait)
+
+            command.attempts += 1
+            self.store.bucket(command.device).take()
+            self.store.record_use()
+
+            response = command.send()
+            if response is None:
+                return False
+
+            headers = getattr(response, "headers", {}) or {}
+            device_left, account_left = remaining(headers)
+            with self.store.lock:
+                if device_left is not None:
+                    self.store.buckets[command.device].drain_to(device_left)
+                if account_left is not None:
+                    self.store.account.drain_to(account_left)
+
+            if response.status_code != 429:
+                return response.status_code == 200
+
+            until = retry_after(headers) or time.time() + 60 / self.store.per_minute
+            scope = "*" if account_left == 0 else command.device
+            with self.store.lock:
+                self.store.blocked_until[scope] = max(until, self.store.blocked_until.get(scope, 0))
+            print(f"🐢 Rate limited on {command.device}, retrying in {max(0, until - time.time()):.0f}s")
+        return False
+
+    def drain(self, workers: int = DEFAULT_WORKERS) -> List[Tuple[str, str, bool]]:
+        """
+        Send everything pending. Devices drain concurrently; commands for one device
+        go out in submission order. Returns [(device, label, ok), ...] in queue order.
+        """
+        with self.lock:
+            commands = list(self.pending.values())
+            self.pending.clear()
+
+        by_device: "OrderedDict[str, List[Command]]" = OrderedDict()
+        for command in commands:
+            by_device.setdefault(command.device, []).append(command)
+
+        def run(batch: List[Command]) -> List[Tuple[str, str, bool]]:
+            return [(c.device, c.label, self._send(c)) for c in batch]
+
+        try:
+            results = fan_out(run, list(by_device.values()), workers=workers)
+        finally:
+            self.store.save()
+        return [result for batch in results for result in batch]
@@ -0,0 +1,156 @@
+import bisect
+import json
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Constants
+# ──────────────────────────────────────────────────────────────
+# Refresh the device list in the background once it is older than this
+DEVICE_TTL: float = 24 * 3600
+# A lookup miss forces a refresh, but not more often than this
+MISS_REFRESH_INTERVAL: float = 60.0
+
+
+def model_of(device: Dict[str, Any]) -> Optional[str]:
+    """The developer API calls it `model`, the OpenAPI router calls it `sku`."""
+    return device.get("model") or device.get("sku")
+
+
+# ──────────────────────────────────────────────────────────────
+# 📇 Device registry
+# ──────────────────────────────────────────────────────────────
+class DeviceRegistry:
+    """
+    Govee device list indexed by name, ID and model.
+
+    - Name lookups are case-insensitive; a unique prefix also matches.
+    - The cache records when it was fetched. Past `ttl` it is refreshed in a
+      background thread while lookups keep using the current index.
+    - A lookup miss triggers a synchronous refresh, so a renamed or new device
+      does not fail just because the cache is old.
+    - The cache file is replaced atomically.
+    """
+
+    def __init__(self, fetch: Callable[[], Optional[List[Dict[str, Any]]]], cache_file: Path,
+                 ttl: float = DEVICE_TTL):
+        self.fetch = fetch
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()  # background and miss-path refreshes share one tmp file
+        self.refreshing: Optional[threading.Thread] = None
+        self.last_refresh_attempt = 0.0
+        self.fetched_at = 0.0
+        self.devices: List[Dict[str, Any]] = []
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_model: Dict[str, List[Dict[str, Any]]] = {}
+        self.sorted_names: List[str] = []
+        self._load()
+
+    # ── Index ─────────────────────────────────────────────────
+    def _index(self, devices: List[Dict[str, Any]], fetched_at: float) -> None:
+        by_name: Dict[str, Dict[str, Any]] = {}
+        by_id: Dict[str, Dict[str, Any]] = {}
+        by_model: Dict[str, List[Dict[str, Any]]] = {}
+        for device in devices:
+            if device.get("deviceName"):
+                by_name[device["deviceName"].casefold()] = device
+            if device.get("device"):
+                by_id[device["device"]] = device
+            by_model.setdefault(model_of(device) or "-", []).append(device)
+
+        # Swap in the whole index at once so readers never see a partial build
+        with self.lock:
+            self.devices = devices
+            self.by_name, self.by_id, self.by_model = by_name, by_id, by_model
+            self.sorted_names = sorted(by_name)
+            self.fetched_at = fetched_at
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            print("⚠️ Cache corrupted, refetching from API...")
+            return
+
+        # Older caches were a bare list with no timestamp: index it but treat as stale
+        if isinstance(cached, list):
+            self._index(cached, 0.0)
+        else:
+            self._index(cached.get("devices", []), cached.get("fetched_at", 0.0))
+
+    def _save(self) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "devices": self.devices}, f, separators=(",", ":"))
+        os.replace(tmp, self.cache_file)
+
+    # ── Refresh ───────────────────────────────────────────────
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+
+    def refresh(self) -> bool:
+        """Fetch the device list now. Keeps the current index if the fetch fails."""
+        with self.refresh_lock:
+            self.last_refresh_attempt = time.time()
+            devices = self.fetch()
+            if devices is None:
+                return False
+            self._index(devices, time.time())
+            self._save()
+            return True
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh thread unless one is already running."""
+        with self.lock:
+            if self.refreshing and self.refreshing.is_alive():
+                return
+            # Daemon, so a hung HTTP call can't hold up interpreter exit
+            self.refreshing = threading.Thread(target=self.refresh, name="govee-registry-refresh",
+                                               daemon=True)
+            self.refreshing.start()
+
+    def ensure_fresh(self, force: bool = False) -> None:
+        """Refresh synchronously if empty or forced, in the background if stale."""
+        if force or not self.devices:
+            self.refresh()
+        elif self.stale:
+            self.refresh_in_background()
+
+    # ── Lookup ────────────────────────────────────────────────
+    def _find(self, query: str) -> Optional[Dict[str, Any]]:
+        key = query.casefold()
+        with self.lock:
+            device = self.by_name.get(key) or self.by_id.get(query)
+            if device:
+                return device
+            # Unique prefix match over the sorted names
+            start = bisect.bisect_left(self.sorted_names, key)
+            matches = []
+            for name in self.sorted_names[start:start + 2]:
+                if name.startswith(key):
+                    matches.append(name)
+            return self.by_name[matches[0]] if len(matches) == 1 else None
+
+    def find(self, query: str) -> Optional[Dict[str, Any]]:
+        """Look a device up by name (any case, or unique prefix) or device ID."""
+        device = self._find(query)
+        if device is None and time.time() - self.last_refresh_attempt > MISS_REFRESH_INTERVAL:
+            if self.refresh():
+                device = self._find(query)
+        return device
+
+    def model(self, model: str) -> List[Dict[str, Any]]:
+        """All devices of a given model/SKU."""
+        with self.lock:
+            return list(self.by_model.get(model, []))
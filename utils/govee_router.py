@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+
+from utils.govee_queue import QuotaStore
+from utils.govee_state import DeviceStateMirror, parse_router_capabilities
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Govee OpenAPI router
+# ──────────────────────────────────────────────────────────────
+BASE_URL: str = "https://openapi.api.govee.com"
+# Router device list shared by the NeoTrellis switch and the sensor display
+DEVICE_CACHE: Path = Path.home() / ".cache" / "govee_router_devices.json"
+
+
+# ──────────────────────────────────────────────────────────────
+# 💡 Power control for the physical front ends
+# ──────────────────────────────────────────────────────────────
+class RouterClient:
+    """
+    On/off control of Govee lights through the OpenAPI router, backed by the shared
+    state mirror. Control and device-list calls are charged to the API key's daily
+    quota here; state reads are charged by the mirror's reconcile.
+    """
+
+    def __init__(self, session: requests.Session, state: DeviceStateMirror, quota: QuotaStore,
+                 excluded: Iterable[str] = ()):
+        self.session = session
+        self.state = state
+        self.quota = quota
+        self.excluded = set(excluded)
+
+    def fetch_devices(self) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the list of devices from the Govee API, or None on failure."""
+        try:
+            self.quota.record_use()
+            res = self.session.get(f"{BASE_URL}/router/api/v1/user/devices")
+            if res.status_code == 200:
+                return res.json().get("data", [])
+            print(f"[Fail] {res.status_code} fetching devices")
+        except Exception as e:
+            print(f"[Error] Failed to fetch devices: {e}")
+        return None
+
+    def fetch_state(self, device: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Read the device's real power/brightness/color from Govee, or None on failure."""
+        payload = {"requestId": "request-id", "payload": {"sku": device["sku"], "device": device["device"]}}
+        try:
+            res = self.session.post(f"{BASE_URL}/router/api/v1/device/state", json=payload)
+            if res.status_code == 200:
+                return parse_router_capabilities(res.json().get("payload", {}).get("capabilities", []))
+        except Exception as e:
+            print(f"[Error] State query failed for {device.get('deviceName')}: {e}")
+        return None
+
+    def is_on(self, device: Dict[str, Any]) -> bool:
+        """Mirrored power state, reconciled from Govee when the mirror is stale."""
+        device_id = device["device"]
+        if self.state.is_stale(device_id) and self.state.reconcile(device_id, lambda: self.fetch_state(device)):
+            self.state.save()
+            self.quota.save()
+        return self.state.get(device_id, "power") == "on"
+
+    def toggle_device(self, device: Dict[str, Any], on: Optional[bool] = None) -> bool:
+        """Toggle a device on/off (or set it with `on`). Returns the new state (True if on)."""
+        name = device.get("deviceName")
+        if name in self.excluded:
+            print(f"[Skip] Excluded: {name}")
+            return False
+
+        current_state = self.is_on(device)
+        new_state = on if on is not None else not current_state
+        if on is not None and new_state == current_state:
+            print(f"[Skip] Already {'on' if new_state else 'off'}: {name}")
+            return current_state
+
+        payload = {
+            "requestId": "request-id",
+            "payload": {
+                "sku": device["sku"],
+                "device": device["device"],
+                "capability": {
+                    "type": "devices.capabilities.on_off",
+                    "instance": "powerSwitch",
+                    "value": 1 if new_state else 0
+                }
+            }
+        }
+
+        try:
+            self.quota.record_use()
+            res = self.session.post(f"{BASE_URL}/router/api/v1/device/control", json=payload)
+            if res.status_code == 200:
+                print(f"[OK] {'On' if new_state else 'Off'}: {name}")
+                self.state.update(device["device"], power="on" if new_state else "off")
+                self.state.save()
+                return new_state
+            print(f"[Fail] {res.status_code} for {name}")
+        except Exception as e:
+            print(f"[Error] Toggle failed for {name}: {e}")
+        finally:
+            self.quota.save()
+
+        return current_state  # Revert to previous state if failed
@@ -0,0 +1,164 @@
+import json
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# ──────────────────────────────────────────────────────────────
+# ⚙️ Constants
+# ──────────────────────────────────────────────────────────────
+STATE_FILE: Path = Path.home() / ".cache" / "govee_state.json"
+
+# Re-read a device's real state from Govee after this many seconds
+RECONCILE_AFTER: float = 600.0
+
+# Mirrored fields and the Govee command names that change them
+FIELDS = ("power", "brightness", "color")
+COMMAND_FIELDS: Dict[str, str] = {"turn": "power", "brightness": "brightness", "color": "color"}
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔍 Parsing Govee state responses
+# ──────────────────────────────────────────────────────────────
+def parse_v1_properties(properties: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Parse `data.properties` from the developer API's GET /devices/state."""
+    state: Dict[str, Any] = {}
+    for prop in properties:
+        if "powerState" in prop:
+            state["power"] = prop["powerState"]
+        elif "brightness" in prop:
+            state["brightness"] = prop["brightness"]
+        elif "color" in prop:
+            state["color"] = dict(prop["color"])
+    return state
+
+
+def parse_router_capabilities(capabilities: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Parse `payload.capabilities` from the OpenAPI router's POST /device/state."""
+    state: Dict[str, Any] = {}
+    for cap in capabilities:
+        instance = cap.get("instance")
+        value = (cap.get("state") or {}).get("value")
+        if value is None or value == "":
+            continue
+        if instance == "powerSwitch":
+            state["power"] = "on" if value else "off"
+        elif instance == "brightness":
+            state["brightness"] = value
+        elif instance == "colorRgb":
+            state["color"] = {"r": (value >> 16) & 0xFF, "g": (value >> 8) & 0xFF, "b": value & 0xFF}
+    return state
+
+
+# ──────────────────────────────────────────────────────────────
+# 🪞 Device-state mirror
+# ──────────────────────────────────────────────────────────────
+class DeviceStateMirror:
+    """
+    Persistent mirror of each device's power, brightness and color, keyed by device ID.
+    Updated from successful commands and reconciled from Govee's state endpoint once
+    an entry is older than `reconcile_after`, so commands that would not change
+    anything can be skipped.
+
+    With a `quota` (QuotaStore), every reconcile fetch is charged to the API key's
+    daily bucket, and reconciling is skipped while that bucket is empty.
+    """
+
+    def __init__(self, path: Path = STATE_FILE, reconcile_after: float = RECONCILE_AFTER,
+                 quota: Optional[Any] = None):
+        self.path = path
+        self.reconcile_after = reconcile_after
+        self.quota = quota
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # concurrent savers share one tmp file
+        self.devices: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _freshness(entry: Dict[str, Any]) -> float:
+        return max(entry.get("updated", 0), entry.get("reconciled", 0))
+
+    def save(self) -> None:
+        """
+        Write the mirror atomically. Other processes (`lights`, the NeoTrellis switch,
+        the sensor display) share the file, so it is re-read first and, per device,
+        the newer of the two entries wins, both on disk and in memory.
+        """
+        with self.save_lock:
+            with self.lock:
+                for device_id, entry in self._load().items():
+                    mine = self.devices.get(device_id)
+                    if mine is None or self._freshness(entry) > self._freshness(mine):
+                        self.devices[device_id] = entry
+                snapshot = json.dumps(self.devices, separators=(",", ":"))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp, self.path)
+
+    def get(self, device_id: str, field: str) -> Any:
+        with self.lock:
+            return self.devices.get(device_id, {}).get(field)
+
+    def would_change(self, device_id: str, field: str, value: Any) -> bool:
+        """True unless the mirror is sure the device already has this value."""
+        with self.lock:
+            entry = self.devices.get(device_id)
+            if not entry or field not in entry:
+                return True
+            return entry[field] != value
+
+    def update(self, device_id: str, **fields: Any) -> None:
+        """Record known values for a device (from a successful command)."""
+        with self.lock:
+            entry = self.devices.setdefault(device_id, {})
+            entry.update({k: v for k, v in fields.items() if k in FIELDS})
+            entry["updated"] = time.time()
+
+    def record_command(self, device_id: str, name: str, value: Any) -> None:
+        """Record the effect of a successful Govee command (`turn`, `brightness`, `color`)."""
+        field = COMMAND_FIELDS.get(name)
+        if field:
+            self.update(device_id, **{field: value})
+
+    def is_stale(self, device_id: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self.lock:
+            entry = self.devices.get(device_id)
+            return not entry or now - entry.get("reconciled", 0) > self.reconcile_after
+
+    def reconcile(self, device_id: str, fetch: Callable[[], Optional[Dict[str, Any]]]) -> bool:
+        """
+        Replace the mirrored entry with the state `fetch` reports.
+        `fetch` returns a parsed state dict or None on failure; fields it does not
+        report are forgotten, because they can no longer be trusted.
+        """
+        if self.quota is not None:
+            with self.quota.lock:
+                exhausted = self.quota.account.wait_time() > 0
+            if exhausted:
+                return False
+            self.quota.record_use()
+        state = fetch()
+        if state is None:
+            return False
+        now = time.time()
+        with self.lock:
+            self.devices[device_id] = {
+                **{k: v for k, v in state.items() if k in FIELDS},
+                "updated": now,
+                "reconciled": now,
+            }
+        return True
+
+    def stale(self, device_ids: Iterable[str]) -> List[str]:
+        now = time.time()
+        return [d for d in device_ids if self.is_stale(d, now)]
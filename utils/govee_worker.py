@@ -0,0 +1,70 @@
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+Callback = Callable[[Any], None]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🧵 Background intent worker
+# ──────────────────────────────────────────────────────────────
+class IntentWorker:
+    """
+    Runs slow work (Govee HTTP calls) on a background thread so input loops never block.
+
+    - `submit(key, fn, on_done)` queues an intent. A pending intent with the same key
+      is replaced, so rapid presses collapse to the latest one.
+    - `on_done(result)` (or `on_done(None)` if fn raised) is *not* run on the worker:
+      it is queued until the owning loop calls `run_callbacks()`, so callbacks can
+      touch hardware that is not thread-safe (I2C LEDs, displays).
+    """
+
+    def __init__(self, name: str = "govee-worker"):
+        self.pending: "OrderedDict[Hashable, tuple[Callable[[], Any], Optional[Callback]]]" = OrderedDict()
+        self.ready = threading.Condition()
+        self.completed: "queue.SimpleQueue[tuple[Callback, Any]]" = queue.SimpleQueue()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, key: Hashable, fn: Callable[[], Any], on_done: Optional[Callback] = None) -> None:
+        with self.ready:
+            self.pending.pop(key, None)
+            self.pending[key] = (fn, on_done)
+            self.ready.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self.ready:
+                while self.running and not self.pending:
+                    self.ready.wait()
+                if not self.running and not self.pending:
+                    return
+                _, (fn, on_done) = self.pending.popitem(last=False)
+
+            try:
+                result = fn()
+            except Exception as e:
+                print(f"[Error] Background task failed: {e}")
+                result = None
+            if on_done:
+                self.completed.put((on_done, result))
+
+    def run_callbacks(self) -> int:
+        """Run finished intents' callbacks on the caller's thread. Returns how many ran."""
+        count = 0
+        while True:
+            try:
+                on_done, result = self.completed.get_nowait()
+            except queue.Empty:
+                return count
+            on_done(result)
+            count += 1
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Finish pending intents, then stop the thread."""
+        with self.ready:
+            self.running = False
+            self.ready.notify()
+        self.thread.join(timeout)
@@ -0,0 +1,120 @@
+"""
+Background NMEA reader for the GPS module.
+
+`update()` parses at most one pending sentence, and the module sends several a
+second (GGA, GSA, RMC, ...) into a small buffer. Called once per recording tick
+it falls behind: fixes lag and the buffer overflows. `GpsReader` drains the
+module on its own thread instead, sleeping only once nothing is waiting, and
+publishes a new immutable `GpsFix` after every sentence. Swapping that one
+reference is atomic, so the recorder reads the latest fix without touching the
+bus or taking a lock.
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from utils.sensor_health import guarded_read
+
+# ─── Defaults ──────────────────────────────────────────────────────────────────
+IDLE_WAIT = 0.05       # seconds between polls once the module's buffer is empty
+MAX_BURST = 8          # sentences parsed before waiting anyway (virtual GPSes never run dry)
+STALE_AFTER = 3.0      # a fix older than this (seconds) is not reported
+# Sentences that carry a position; the others (GSA, GSV, ...) don't refresh a fix
+POSITION_SENTENCES = ("GGA", "RMC", "GLL")
+
+
+# ──────────────────────────────────────────────────────────────
+# 📍 Fix record
+# ──────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class GpsFix:
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    speed_knots: Optional[float] = None
+    fix_quality: int = 0
+    satellites: Optional[int] = None
+    hdop: Optional[float] = None
+    updated: float = -math.inf     # monotonic time the last sentence was parsed
+    fixed: float = -math.inf       # ... and the last one with a valid position
+
+    @property
+    def has_fix(self) -> bool:
+        return self.fix_quality >= 1 and self.latitude is not None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last valid position. A receiver that lost its fix keeps talking."""
+        return time.monotonic() - self.fixed
+
+
+NO_FIX = GpsFix()
+
+
+# ──────────────────────────────────────────────────────────────
+# 🛰️ Reader thread
+# ──────────────────────────────────────────────────────────────
+class GpsReader:
+    """
+    Drains `gps` (an Adafruit GPS driver, or a sim/virtual one) on a daemon thread.
+    Bus errors go through the "gps" circuit breaker, like any other sensor read.
+    """
+
+    def __init__(self, gps: Any, idle: float = IDLE_WAIT, stale_after: float = STALE_AFTER):
+        self.gps = gps
+        self.idle = idle
+        self.stale_after = stale_after
+        self.latest: GpsFix = NO_FIX
+        self.sentences = 0
+        self.wake = threading.Event()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="gps-reader", daemon=True)
+        self.thread.start()
+
+    def _snapshot(self) -> GpsFix:
+        gps = self.gps
+        now = time.monotonic()
+        quality = gps.fix_quality or 0
+        # Virtual GPSes have no sentences; every update is a position
+        sentence = getattr(gps, "nmea_sentence", None)
+        positional = sentence is None or sentence[3:6] in POSITION_SENTENCES
+        fixed = now if positional and quality >= 1 and gps.latitude is not None else self.latest.fixed
+        return GpsFix(gps.latitude, gps.longitude, gps.speed_knots, quality,
+                      gps.satellites, gps.horizontal_dilution, now, fixed)
+
+    def _run(self) -> None:
+        burst = 0
+        while self.running:
+            # Drain everything pending, then wait for the module to send more
+            fix = guarded_read("gps", lambda: self._snapshot() if self.gps.update() else None,
+                               count_none=False)
+            if fix is not None:
+                self.sentences += 1
+                self.latest = fix
+                burst += 1
+                if burst < MAX_BURST:
+                    continue
+            burst = 0
+            self.wake.wait(self.idle)
+
+    def reading(self) -> Optional[Tuple[float, float, float]]:
+        """Latitude, longitude and speed in knots of a current fix, else None. Never blocks."""
+        fix = self.latest
+        if not fix.has_fix or fix.age > self.stale_after:
+            return None
+        return fix.latitude, fix.longitude, fix.speed_knots
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.running = False
+        self.wake.set()
+        self.thread.join(timeout)
+
+    def describe(self) -> str:
+        fix = self.latest
+        if fix is NO_FIX:
+            return "no sentences yet"
+        return (f"{self.sentences} sentences, fix quality {fix.fix_quality}, "
+                f"{fix.satellites if fix.satellites is not None else '-'} satellites, "
+                f"HDOP {fix.hdop if fix.hdop is not None else '-'}, "
+                + (f"position {fix.age:.1f} s old" if fix.fixed > -math.inf else "no position yet"))
@@ -0,0 +1,155 @@
+"""
+Hardware abstraction layer for the Pi sensors, NeoTrellis keypad and 14-segment display.
+
+Set HARDWARE_BACKEND to choose what the factories return:
+    pi      (default) the real board/busio/Adafruit drivers
+    sim     deterministic fakes from utils.sim_hardware, usable on any Linux box
+    replay  sensors play back REPLAY_FILE (a sensor_data_*.csv or .srec) through
+            utils.replay at REPLAY_SPEED (default 1); bus, keypad and display are simulated
+
+Independently of the backend, SENSOR_HUB=<socket path or host:port> makes the
+sensor factories return drivers fed by a running sensor hub (cmds/sensor_hub.py),
+so several processes can share one acquisition instead of fighting over the bus.
+
+Driver imports happen inside the factories, so importing this module never
+touches the I2C bus or requires the Adafruit libraries.
+"""
+import os
+from typing import Any, Optional
+
+BACKEND: str = os.getenv("HARDWARE_BACKEND", "pi").strip().lower()
+BACKENDS = ("pi", "sim", "replay")
+
+if BACKEND not in BACKENDS:
+    raise ValueError(f"❌ Unknown HARDWARE_BACKEND '{BACKEND}' (expected one of {', '.join(BACKENDS)})")
+
+# Address of a sensor hub to read sensors from; None opens them directly
+HUB: Optional[str] = os.getenv("SENSOR_HUB") or None
+
+# Standard-mode I2C; the Pi's default bus speed
+DEFAULT_I2C_FREQUENCY: int = 100_000
+
+
+def simulated() -> bool:
+    """Whether the bus, keypad and display are fakes (sim and replay backends)."""
+    return BACKEND in ("sim", "replay")
+
+
+def replayed() -> bool:
+    return BACKEND == "replay"
+
+
+def hub() -> bool:
+    return HUB is not None
+
+
+def own_sensors() -> None:
+    """For the hub itself: open the sensors from the backend even when SENSOR_HUB is set."""
+    global HUB
+    HUB = None
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔌 Bus
+# ──────────────────────────────────────────────────────────────
+def i2c(frequency: Optional[int] = None) -> Any:
+    """Open the I2C bus on SCL/SDA."""
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimI2C(frequency or DEFAULT_I2C_FREQUENCY)
+
+    import board
+    import busio
+    if frequency:
+        return busio.I2C(board.SCL, board.SDA, frequency=frequency)
+    return busio.I2C(board.SCL, board.SDA)
+
+
+# ──────────────────────────────────────────────────────────────
+# 📡 Sensors
+# ──────────────────────────────────────────────────────────────
+def lsm9ds1(bus: Any) -> Any:
+    """9-DoF IMU: acceleration, gyro, magnetic, temperature."""
+    if hub():
+        from utils import sensor_hub, virtual_sensors
+        return virtual_sensors.VirtualLSM9DS1(sensor_hub.shared())
+    if replayed():
+        from utils import replay, virtual_sensors
+        return virtual_sensors.VirtualLSM9DS1(replay.shared())
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimLSM9DS1(bus)
+
+    import adafruit_lsm9ds1
+    return adafruit_lsm9ds1.LSM9DS1_I2C(bus)
+
+
+def apds9960(bus: Any) -> Any:
+    """Proximity, color and gesture sensor."""
+    if hub():
+        from utils import sensor_hub, virtual_sensors
+        return virtual_sensors.VirtualAPDS9960(sensor_hub.shared())
+    if replayed():
+        from utils import replay, virtual_sensors
+        return virtual_sensors.VirtualAPDS9960(replay.shared())
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimAPDS9960(bus)
+
+    from adafruit_apds9960.apds9960 import APDS9960
+    return APDS9960(bus)
+
+
+def bme680(bus: Any) -> Any:
+    """Temperature, gas resistance, humidity and pressure."""
+    if hub():
+        from utils import sensor_hub, virtual_sensors
+        return virtual_sensors.VirtualBME680(sensor_hub.shared())
+    if replayed():
+        from utils import replay, virtual_sensors
+        return virtual_sensors.VirtualBME680(replay.shared())
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimBME680(bus)
+
+    import adafruit_bme680
+    return adafruit_bme680.Adafruit_BME680_I2C(bus)
+
+
+def gps(bus: Any) -> Any:
+    """GPS module on the I2C bus."""
+    if hub():
+        from utils import sensor_hub, virtual_sensors
+        return virtual_sensors.VirtualGPS(sensor_hub.shared())
+    if replayed():
+        from utils import replay, virtual_sensors
+        return virtual_sensors.VirtualGPS(replay.shared())
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimGPS(bus)
+
+    import adafruit_gps
+    return adafruit_gps.GPS_GtopI2C(bus, debug=False)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎛️ Keypad & display
+# ──────────────────────────────────────────────────────────────
+def neotrellis(bus: Any) -> Any:
+    """4x4 NeoTrellis keypad with RGB LEDs."""
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimNeoTrellis(bus)
+
+    from adafruit_neotrellis.neotrellis import NeoTrellis
+    return NeoTrellis(bus)
+
+
+def seg14x4(bus: Any, address: int = 0x70) -> Any:
+    """HT16K33 14-segment, 4-character display."""
+    if simulated():
+        from utils import sim_hardware
+        return sim_hardware.SimSeg14x4(bus, address=address)
+
+    from adafruit_ht16k33.segments import Seg14x4
+    return Seg14x4(bus, address=address)
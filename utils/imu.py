@@ -0,0 +1,270 @@
+"""
+Vectorized LSM9DS1 post-processing over sensor recordings (needs NumPy).
+
+Recordings are read column-wise, chunk by chunk (straight from the .srec
+chunks, or in CHUNK_ROWS slices of a CSV), and every feature is computed with
+array operations. State that spans chunks (filter angles, rolling windows,
+the last step) is carried in `ImuProcessor`, so results do not depend on the
+chunk size. Whether a row is a step peak depends on the row after it, so each
+chunk's last row is held back until the next chunk (or `flush()`). Rows without
+a valid LSM9DS1 reading are skipped.
+
+Per row:
+    Roll, Pitch          tilt from gravity (degrees)
+    Heading              tilt-compensated magnetic heading (degrees, 0-360)
+    Roll_Filtered, ...   complementary filter of gyro rates and tilt
+    Dynamic_Accel        |acceleration| minus 1 g (m/s²)
+    Accel_RMS, Gyro_RMS  rolling RMS of Dynamic_Accel and |gyro| over `window` s
+    Step                 1 where a step peak was detected
+"""
+import csv
+import itertools
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from utils.acquisition import SENSOR_COLUMNS, VALID_BITS
+from utils.sensor_file import EXTENSION, RecordingReader
+
+GRAVITY = 9.80665
+CHUNK_ROWS = 65536
+IMU_COLUMNS = SENSOR_COLUMNS["lsm9ds1"][:9]   # acceleration, gyro, magnetic
+FEATURE_COLUMNS = ["Timestamp", "Roll", "Pitch", "Heading", "Roll_Filtered", "Pitch_Filtered",
+                   "Dynamic_Accel", "Accel_RMS", "Gyro_RMS", "Step"]
+
+# ─── Defaults ──────────────────────────────────────────────────────────────────
+ALPHA = 0.98            # complementary filter: weight of the integrated gyro
+RMS_WINDOW = 1.0        # seconds
+STEP_THRESHOLD = 1.5    # m/s² of dynamic acceleration
+STEP_MIN_GAP = 0.3      # seconds between steps (~200 steps/min at most)
+MAX_DT = 0.5            # longest gap the gyro is integrated across
+
+Chunk = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+# ──────────────────────────────────────────────────────────────
+# 📥 Loading
+# ──────────────────────────────────────────────────────────────
+def _imu_only(t: np.ndarray, values: np.ndarray, valid: np.ndarray) -> Chunk:
+    keep = (valid.astype(np.int64) & VALID_BITS["lsm9ds1"]) != 0
+    values = values[keep]
+    return t[keep], values[:, 0:3], values[:, 3:6], values[:, 6:9]
+
+
+def imu_chunks(path: str, rows: int = CHUNK_ROWS) -> Iterator[Chunk]:
+    """(epoch seconds, acceleration, gyro, magnetic) arrays per chunk of a recording."""
+    if path.endswith(EXTENSION):
+        with RecordingReader(path) as reader:
+            for columns in reader.iter_columns(["Timestamp", *IMU_COLUMNS, "Valid"]):
+                t = np.frombuffer(columns[0], dtype=np.float64)
+                values = np.column_stack([np.frombuffer(c, dtype=np.float32) for c in columns[1:-1]])
+                yield _imu_only(t, values.astype(np.float64), np.frombuffer(columns[-1], dtype=np.uint8))
+        return
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        index = [header.index(name) for name in IMU_COLUMNS]
+        valid_index = header.index("Valid") if "Valid" in header else None
+        while True:
+            block = list(itertools.islice(reader, rows))
+            if not block:
+                return
+            cells = np.array([row for row in block if row], dtype=object)
+            t = np.array([datetime.fromisoformat(s).timestamp() for s in cells[:, header.index("Timestamp")]])
+            raw = cells[:, index]
+            raw[(raw == "") | (raw == "None")] = "nan"
+            values = raw.astype(np.float64)
+            if valid_index is not None:
+                valid = cells[:, valid_index].astype(np.int64)
+            else:
+                # Recordings from before the Valid column: valid when every IMU cell is present
+                valid = np.where(np.isnan(values).any(axis=1), 0, VALID_BITS["lsm9ds1"])
+            yield _imu_only(t, values, valid)
+
+
+# ──────────────────────────────────────────────────────────────
+# 📐 Vectorized kernels
+# ──────────────────────────────────────────────────────────────
+def tilt(acc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Roll and pitch (radians) from the gravity direction."""
+    ax, ay, az = acc.T
+    return np.arctan2(ay, az), np.arctan2(-ax, np.hypot(ay, az))
+
+
+def heading(mag: np.ndarray, roll: np.ndarray, pitch: np.ndarray) -> np.ndarray:
+    """Tilt-compensated magnetic heading in degrees, 0-360."""
+    mx, my, mz = mag.T
+    sr, cr, sp, cp = np.sin(roll), np.cos(roll), np.sin(pitch), np.cos(pitch)
+    xh = mx * cp + mz * sp
+    yh = mx * sr * sp + my * cr - mz * sr * cp
+    return np.degrees(np.arctan2(-yh, xh)) % 360
+
+
+def first_order(u: np.ndarray, alpha: float, y0: float) -> np.ndarray:
+    """
+    y[n] = alpha * y[n-1] + u[n] without a Python loop: y = alpha^(n+1)·y0 + alpha^n·cumsum(u·alpha^-k),
+    in blocks short enough that alpha^-k stays well inside float range.
+    """
+    y = np.empty_like(u)
+    block = max(1, int(8 * math.log(10) / -math.log(alpha))) if 0 < alpha < 1 else len(u) or 1
+    for start in range(0, len(u), block):
+        seg = u[start:start + block]
+        powers = alpha ** np.arange(len(seg))
+        y[start:start + len(seg)] = alpha * powers * y0 + powers * np.cumsum(seg / powers)
+        y0 = y[start + len(seg) - 1]
+    return y
+
+
+def rolling_rms(x: np.ndarray, width: int, tail: np.ndarray) -> np.ndarray:
+    """RMS over the last `width` samples, `tail` being the squares carried from earlier chunks."""
+    squares = np.concatenate([tail, x * x])
+    sums = np.cumsum(np.concatenate([[0.0], squares]))
+    end = np.arange(len(tail) + 1, len(squares) + 1)
+    start = np.maximum(end - width, 0)
+    return np.sqrt((sums[end] - sums[start]) / (end - start))
+
+
+# ──────────────────────────────────────────────────────────────
+# 🧭 Processor
+# ──────────────────────────────────────────────────────────────
+class ImuProcessor:
+    """Computes FEATURE_COLUMNS chunk by chunk, carrying state across chunk boundaries."""
+
+    def __init__(self, alpha: float = ALPHA, window: float = RMS_WINDOW,
+                 step_threshold: float = STEP_THRESHOLD, step_gap: float = STEP_MIN_GAP):
+        self.alpha = alpha
+        self.window = window
+        self.step_threshold = step_threshold
+        self.step_gap = step_gap
+        self.width: Optional[int] = None   # RMS window in samples, from the first chunk's rate
+        self.last_t: Optional[float] = None
+        self.angles: Optional[np.ndarray] = None   # filtered roll, pitch (radians)
+        self.accel_tail = np.empty(0)
+        self.gyro_tail = np.empty(0)
+        self.last_dynamic = -math.inf   # Dynamic_Accel of the row before the held-back one
+        self.last_step = -math.inf
+        self.held: Optional[Dict[str, np.ndarray]] = None   # last row, its step not yet decided
+        self.rows = 0
+        self.steps = 0
+        self.start: Optional[float] = None
+
+    def process(self, t: np.ndarray, acc: np.ndarray, gyro: np.ndarray, mag: np.ndarray) -> Dict[str, np.ndarray]:
+        """Features of the held-back row and all of this chunk's rows but its last."""
+        if not len(t):
+            return {name: np.empty(0) for name in FEATURE_COLUMNS}
+        if self.width is None:
+            rate = 1 / np.median(np.diff(t)) if len(t) > 1 else 1.0
+            self.width = max(1, round(self.window * rate))
+            self.start = t[0]
+
+        roll, pitch = tilt(acc)
+        dt = np.diff(t, prepend=t[0] if self.last_t is None else self.last_t)
+        dt = np.clip(dt, 0, MAX_DT)
+
+        # Complementary filter: angle[n] = a·(angle[n-1] + rate·dt) + (1-a)·tilt[n]
+        a = self.alpha
+        if self.angles is None:
+            self.angles = np.array([roll[0], pitch[0]])
+        rates = np.radians(gyro[:, 0:2])
+        filtered = [first_order(a * rates[:, i] * dt + (1 - a) * measured, a, self.angles[i])
+                    for i, measured in enumerate((roll, pitch))]
+        self.angles = np.array([f[-1] for f in filtered])
+
+        # Vibration
+        dynamic = np.linalg.norm(acc, axis=1) - GRAVITY
+        spin = np.linalg.norm(gyro, axis=1)
+        accel_rms = rolling_rms(dynamic, self.width, self.accel_tail)
+        gyro_rms = rolling_rms(spin, self.width, self.gyro_tail)
+        keep = self.width - 1
+        self.accel_tail = np.concatenate([self.accel_tail, dynamic ** 2])[-keep:] if keep else np.empty(0)
+        self.gyro_tail = np.concatenate([self.gyro_tail, spin ** 2])[-keep:] if keep else np.empty(0)
+
+        self.last_t = t[-1]
+        self.rows += len(t)
+
+        features = {
+            "Timestamp": t,
+            "Roll": np.degrees(roll),
+            "Pitch": np.degrees(pitch),
+            "Heading": heading(mag, roll, pitch),
+            "Roll_Filtered": np.degrees(filtered[0]),
+            "Pitch_Filtered": np.degrees(filtered[1]),
+            "Dynamic_Accel": dynamic,
+            "Accel_RMS": accel_rms,
+            "Gyro_RMS": gyro_rms,
+        }
+        if self.held is not None:
+            features = {name: np.concatenate([self.held[name], values]) for name, values in features.items()}
+        self.held = {name: values[-1:] for name, values in features.items()}
+        return self._steps(features, len(features["Timestamp"]) - 1)
+
+    def features(self, chunks: Iterable[Chunk]) -> Iterator[Dict[str, np.ndarray]]:
+        """Features of every chunk, ending with the held-back last row."""
+        for chunk in chunks:
+            yield self.process(*chunk)
+        yield self.flush()
+
+    def flush(self) -> Dict[str, np.ndarray]:
+        """Features of the held-back last row, once the recording has ended."""
+        if self.held is None:
+            return {name: np.empty(0) for name in FEATURE_COLUMNS}
+        features, self.held = self.held, None
+        return self._steps(features, 1)
+
+    def _steps(self, features: Dict[str, np.ndarray], rows: int) -> Dict[str, np.ndarray]:
+        """
+        The first `rows` rows of `features` with their Step column: local maxima of dynamic
+        acceleration above the threshold, at least step_gap after the last accepted step.
+        Rows past `rows` only serve as the following sample (the end of the recording counts as -inf).
+        """
+        t, dynamic = features["Timestamp"], features["Dynamic_Accel"]
+        previous = np.concatenate([[self.last_dynamic], dynamic[:-1]])
+        following = np.concatenate([dynamic[1:], [-math.inf]])
+        candidates = np.flatnonzero((dynamic > self.step_threshold) & (dynamic > previous) & (dynamic >= following))
+        # Gaps count from the last accepted step, so greedily; there are few candidates
+        step = np.zeros(len(t))
+        for i in candidates.tolist():
+            if i < rows and t[i] - self.last_step >= self.step_gap:
+                step[i] = 1
+                self.last_step = t[i]
+                self.steps += 1
+        if rows:
+            self.last_dynamic = dynamic[rows - 1]
+        return {**{name: values[:rows] for name, values in features.items()}, "Step": step[:rows]}
+
+    def summary(self) -> Dict[str, Any]:
+        duration = (self.last_t - self.start) if self.rows else 0.0
+        return {
+            "rows": self.rows,
+            "duration_s": round(duration, 3),
+            "steps": self.steps,
+            "cadence_spm": round(self.steps / duration * 60, 1) if duration else 0.0,
+        }
+
+
+def write_features(path: str, out_path: Optional[str] = None, chunk_rows: int = CHUNK_ROWS,
+                   **options: Any) -> Dict[str, Any]:
+    """Process a recording into `<stem>_imu.csv` (or `out_path`). Returns the summary."""
+    out_path = out_path or path.rsplit(".", 1)[0] + "_imu.csv"
+    processor = ImuProcessor(**options)
+    peak_rms = 0.0
+    line = ",".join(["%s"] + ["%.6g"] * (len(FEATURE_COLUMNS) - 1))
+    with open(out_path, "w", newline="") as f:
+        f.write(",".join(FEATURE_COLUMNS) + "\n")
+        for features in processor.features(imu_chunks(path, chunk_rows)):
+            if not len(features["Timestamp"]):
+                continue
+            # Local time, like the recordings' own timestamps
+            t = features["Timestamp"]
+            offset = datetime.fromtimestamp(t[0]).astimezone().utcoffset().total_seconds()
+            stamps = np.datetime_as_string(((t + offset) * 1e6).astype("datetime64[us]"))
+            columns = [features[name].tolist() for name in FEATURE_COLUMNS[1:]]
+            f.writelines(line % values + "\n" for values in zip(stamps.tolist(), *columns))
+            peak_rms = max(peak_rms, float(np.nanmax(features["Accel_RMS"])))
+    summary = processor.summary()
+    summary["peak_accel_rms"] = round(peak_rms, 4)
+    summary["output"] = out_path
+    return summary
@@ -0,0 +1,114 @@
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+RGB = Tuple[int, int, int]
+Frame = List[RGB]
+
+OFF: RGB = (0, 0, 0)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎞️ Animations
+# ──────────────────────────────────────────────────────────────
+class Animation:
+    """
+    A sequence of (frame, seconds) steps, optionally looped, or a function of
+    elapsed time returning a frame (None when finished).
+    """
+
+    def __init__(self, steps: Sequence[Tuple[Frame, float]] = (),
+                 fn: Optional[Callable[[float], Optional[Frame]]] = None, loop: bool = False):
+        self.steps = list(steps)
+        self.fn = fn
+        self.loop = loop
+        self.total = sum(seconds for _, seconds in self.steps)
+        self.started: Optional[float] = None
+
+    def frame_at(self, elapsed: float) -> Optional[Frame]:
+        """Frame to show `elapsed` seconds in, or None once the animation is over."""
+        if self.fn is not None:
+            return self.fn(elapsed)
+        if not self.steps or (elapsed >= self.total and not self.loop):
+            return None
+        elapsed %= self.total or 1
+        for frame, seconds in self.steps:
+            if elapsed < seconds:
+                return frame
+            elapsed -= seconds
+        return self.steps[-1][0]
+
+
+def rows(colors: Sequence[RGB], width: int = 4, height: int = 4) -> Frame:
+    """Frame with one color per row, cycling through `colors`."""
+    return [colors[(i // width) % len(colors)] for i in range(width * height)]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🖼️ Frame buffer
+# ──────────────────────────────────────────────────────────────
+class FrameBuffer:
+    """
+    Composes LED frames in memory and pushes them in one batch.
+
+    Turns auto-write off, writes only the pixels that differ from what is already
+    lit, then latches them with a single show(). Nothing is sent when the frame is
+    unchanged. A playing Animation overlays the base frame until it finishes.
+    """
+
+    def __init__(self, pixels: Any, size: int = 16, width: int = 4):
+        self.pixels = pixels
+        self.size = size
+        self.width = width
+        pixels.auto_write = False
+        self.frame: Frame = [OFF] * size   # base layer, e.g. light states
+        self.shown: Optional[Frame] = None  # what the LEDs show (unknown until first push)
+        self.animation: Optional[Animation] = None
+        self.pushes = 0
+
+    # ── Composition ──────────────────────────────────────────
+    def set(self, index: int, color: RGB) -> None:
+        self.frame[index] = tuple(color)
+
+    def set_xy(self, x: int, y: int, color: RGB) -> None:
+        self.set(y * self.width + x, color)
+
+    def fill(self, color: RGB) -> None:
+        self.frame = [tuple(color)] * self.size
+
+    def play(self, animation: Animation, now: Optional[float] = None) -> None:
+        """Show an animation on top of the base frame, starting now."""
+        animation.started = time.monotonic() if now is None else now
+        self.animation = animation
+
+    # ── Output ───────────────────────────────────────────────
+    def push(self, frame: Optional[Frame] = None) -> bool:
+        """Write `frame` (default: the base frame) if it differs from what is lit."""
+        frame = list(frame if frame is not None else self.frame)
+        if frame == self.shown:
+            return False
+
+        previous = self.shown or [None] * self.size
+        for i, color in enumerate(frame):
+            if color != previous[i]:
+                self.pixels[i] = color
+        self.pixels.show()
+        self.shown = frame
+        self.pushes += 1
+        return True
+
+    def tick(self, now: Optional[float] = None) -> bool:
+        """Push the current animation frame, or the base frame once it ends. Call once per loop."""
+        if self.animation is not None:
+            now = time.monotonic() if now is None else now
+            frame = self.animation.frame_at(now - self.animation.started)
+            if frame is not None:
+                return self.push(frame)
+            self.animation = None
+        return self.push()
+
+    def run(self, animation: Animation, fps: float = 30.0, sleep: Callable[[float], None] = time.sleep) -> None:
+        """Play an animation to the end, blocking. Looping animations need tick() instead."""
+        self.play(animation)
+        while self.animation is not None:
+            self.tick()
+            sleep(1 / fps)
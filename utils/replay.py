@@ -0,0 +1,206 @@
+"""
+Replay recorded sensor data (sensor_data_*.csv or .srec) as if it were live.
+
+Two ways in:
+
+- `HARDWARE_BACKEND=replay` with `REPLAY_FILE` (and optionally `REPLAY_SPEED`,
+  `REPLAY_LOOP`): the hardware factories return utils.virtual_sensors drivers
+  reading `shared()` at the replay clock, so every command runs unchanged. A sensor
+  that was not valid in the recorded row raises OSError, like a failed read.
+- `ReplaySource` directly: `readers()` plugs into AcquisitionEngine, and
+  `run(duration, on_row)` stands in for the engine itself so `acquisition.record`
+  can push a recording through the writers and rollups at 1×, N× or max speed.
+"""
+import csv
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.acquisition import CSV_COLUMNS, SENSOR_COLUMNS, VALID_BITS, unflatten
+from utils.sensor_file import EXTENSION, RecordingReader, parse_csv_row
+
+MAX_SPEED = 0.0
+
+# Column slice of each sensor within a numeric row
+_SLICES: Dict[str, slice] = {}
+_start = 1
+for _name, _columns in SENSOR_COLUMNS.items():
+    _SLICES[_name] = slice(_start, _start + len(_columns))
+    _start += len(_columns)
+VALID_INDEX = len(CSV_COLUMNS) - 1
+
+
+def parse_speed(text: str) -> float:
+    """ "1", "10x" or "max" → playback speed (MAX_SPEED for as fast as possible)."""
+    text = text.strip().lower()
+    if text == "max":
+        return MAX_SPEED
+    speed = float(text[:-1] if text.endswith("x") else text)
+    if speed <= 0:
+        raise ValueError(f"❌ Speed must be positive or 'max', got {text}")
+    return speed
+
+
+def load_rows(path: str) -> Iterator[List[float]]:
+    """Numeric rows (epoch timestamp first, NaN for missing, Valid last) from a CSV or .srec file."""
+    if path.endswith(EXTENSION):
+        with RecordingReader(path) as reader:
+            yield from reader.iter_rows()
+        return
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows)
+        for cells in rows:
+            if cells:
+                yield parse_csv_row(header, cells)
+
+
+def row_reading(name: str, row: Sequence[float]) -> Optional[Tuple[Any, ...]]:
+    """One sensor's reading from a numeric row, or None if its Valid bit is off."""
+    if not int(row[VALID_INDEX]) & VALID_BITS[name]:
+        return None
+    return unflatten(name, row[_SLICES[name]])
+
+
+# ──────────────────────────────────────────────────────────────
+# ⏯️ Replay source
+# ──────────────────────────────────────────────────────────────
+class ReplaySource:
+    """
+    Plays a recording against the monotonic clock at `speed` × real time
+    (MAX_SPEED: as fast as rows can be consumed). With `loop`, it restarts at the end.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.rows = load_rows(path)
+        self.row = next(self.rows, None)
+        if self.row is None:
+            raise ValueError(f"❌ {path} has no rows to replay")
+        self.next_row = next(self.rows, None)
+        self.t0 = self.row[0]
+        self.mono0 = time.monotonic()
+        self.finished = False
+        self.running = False
+        self.played = 0.0   # recording seconds replayed, across loops
+        self.lock = threading.Lock()   # reader threads share the cursor
+        self.frequency = self._estimate_rate()
+
+    def _estimate_rate(self) -> float:
+        if self.next_row is None or self.next_row[0] <= self.row[0]:
+            return 1.0
+        return 1 / (self.next_row[0] - self.row[0])
+
+    def _advance(self) -> bool:
+        """Move to the next row; False at the end of a non-looping recording."""
+        if self.next_row is None:
+            if not self.loop:
+                self.finished = True
+                return False
+            # Restart one row period after the last row, shifting the clock to match
+            span = self.row[0] - self.t0 + 1 / self.frequency
+            self.rows = load_rows(self.path)
+            self.next_row = next(self.rows)
+            self.mono0 += span / self.speed if self.speed else 0.0
+            self.played += 1 / self.frequency
+        else:
+            self.played += self.next_row[0] - self.row[0]
+        self.row, self.next_row = self.next_row, next(self.rows, None)
+        return True
+
+    @property
+    def realtime(self) -> bool:
+        """False at MAX_SPEED: rows are produced as fast as they are consumed, none may be dropped."""
+        return bool(self.speed)
+
+    def recording_time(self) -> float:
+        return self.t0 + (time.monotonic() - self.mono0) * self.speed
+
+    def current(self) -> List[float]:
+        """The row that is "live" now on the replay clock."""
+        if not self.speed:
+            return self.row
+        with self.lock:
+            while not self.finished:
+                due = self.next_row[0] if self.next_row is not None else self.row[0] + 1 / self.frequency
+                if due > self.recording_time() or not self._advance():
+                    break
+            return self.row
+
+    def reading(self, name: str) -> Optional[Tuple[Any, ...]]:
+        return row_reading(name, self.current())
+
+    def gesture(self) -> int:
+        return 0  # gestures are not recorded
+
+    def readers(self) -> Dict[str, Callable[[], Optional[Tuple[Any, ...]]]]:
+        """Read functions for AcquisitionEngine, one per sensor in the recording."""
+        if not self.speed:
+            raise ValueError("❌ Live readers need a finite speed; use run() for max speed")
+        return {name: (lambda name=name: self.reading(name)) for name in SENSOR_COLUMNS}
+
+    # ── Engine stand-in ────────────────────────────────────────
+    def run(self, duration: Optional[float], on_row: Callable[[List[float]], None]) -> Dict[str, Dict[str, Any]]:
+        """
+        Emit recorded rows to `on_row`, paced by `speed` (unpaced at MAX_SPEED), until the
+        recording ends or `duration` seconds pass. Returns stats shaped like the engine's.
+        """
+        start = time.monotonic()
+        self.mono0 = start - (self.row[0] - self.t0) / self.speed if self.speed else start
+        end = math.inf if duration is None else start + duration
+        rows, max_late, busy = 0, 0.0, 0.0
+        self.running = True
+        while self.running and not self.finished:
+            now = time.monotonic()
+            if now >= end:
+                break
+            if self.speed:
+                due = self.mono0 + (self.row[0] - self.t0) / self.speed
+                if due > now:
+                    time.sleep(min(due - now, end - now))
+                    continue
+                max_late = max(max_late, now - due)
+            tick = time.monotonic()
+            on_row(self.row)
+            busy += time.monotonic() - tick
+            rows += 1
+            if not self._advance():
+                break
+
+        elapsed = time.monotonic() - start
+        return {"replay": {
+            "target_hz": round(self.frequency * self.speed, 3) if self.speed else math.inf,
+            "achieved_hz": round(rows / elapsed, 3) if elapsed > 0 else 0.0,
+            "runs": rows,
+            "missed": 0,
+            "max_late_ms": round(max_late * 1000, 3),
+            "busy_ms": round(busy * 1000, 3),
+        }}
+
+    def stop(self) -> None:
+        """End run() early (safe from another thread)."""
+        self.running = False
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔌 Shared source (HARDWARE_BACKEND=replay)
+# ──────────────────────────────────────────────────────────────
+_SHARED: Optional[ReplaySource] = None
+
+
+def shared() -> ReplaySource:
+    """The process-wide source configured by REPLAY_FILE / REPLAY_SPEED / REPLAY_LOOP."""
+    global _SHARED
+    if _SHARED is None:
+        path = os.getenv("REPLAY_FILE")
+        if not path:
+            raise ValueError("❌ HARDWARE_BACKEND=replay needs REPLAY_FILE=<recording.csv|.srec>")
+        speed = parse_speed(os.getenv("REPLAY_SPEED", "1"))
+        if not speed:
+            raise ValueError("❌ REPLAY_SPEED=max only works with sensor_replay, not live drivers")
+        _SHARED = ReplaySource(path, speed, loop=os.getenv("REPLAY_LOOP", "1") == "1")
+    return _SHARED
@@ -0,0 +1,157 @@
+"""
+Preallocated, typed ring buffer for sensor rows and a background block writer.
+
+The acquisition loop only copies numbers into a fixed `array('d')`; formatting,
+disk I/O and console output happen on the writer thread, in blocks.
+"""
+import math
+import threading
+import time
+from array import array
+from typing import Any, Callable, List, Optional, Sequence
+
+NAN = float("nan")
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔁 Ring buffer
+# ──────────────────────────────────────────────────────────────
+class RingBuffer:
+    """
+    Fixed-capacity buffer of float rows, stored row-major in one `array('d')`.
+
+    `append` never allocates a new buffer. None becomes NaN. If the reader falls a
+    full buffer behind, the oldest rows are overwritten and counted in `overruns`.
+    With `blocking` (for offline sources such as replays), `append` waits up to
+    `FULL_TIMEOUT` s for the reader to make room first.
+    """
+
+    FULL_TIMEOUT = 1.0
+
+    def __init__(self, width: int, capacity: int = 4096, typecode: str = "d", blocking: bool = False):
+        self.width = width
+        self.capacity = capacity
+        self.blocking = blocking
+        self.data = array(typecode, [NAN]) * (width * capacity)
+        self.written = 0   # rows ever appended
+        self.read = 0      # rows ever consumed
+        self.overruns = 0
+        self.closed = False
+        self.ready = threading.Condition()
+
+    def __len__(self) -> int:
+        return self.written - self.read
+
+    def append(self, values: Sequence[Optional[float]]) -> None:
+        with self.ready:
+            if self.blocking:
+                self.ready.wait_for(lambda: self.written - self.read < self.capacity, self.FULL_TIMEOUT)
+            base = (self.written % self.capacity) * self.width
+            for i, value in enumerate(values):
+                self.data[base + i] = NAN if value is None else value
+            self.written += 1
+            if self.written - self.read > self.capacity:
+                self.overruns += 1
+                self.read += 1
+            self.ready.notify()
+
+    def take(self, limit: Optional[int] = None) -> array:
+        """Remove up to `limit` rows (default: all) and return them as one flat array."""
+        with self.ready:
+            count = len(self) if limit is None else min(limit, len(self))
+            start = self.read % self.capacity
+            end = start + count
+            if end <= self.capacity:
+                block = self.data[start * self.width:end * self.width]
+            else:
+                block = self.data[start * self.width:] + self.data[:(end - self.capacity) * self.width]
+            self.read += count
+            if self.blocking:
+                self.ready.notify_all()
+            return block
+
+    def wait(self, rows: int, timeout: float) -> None:
+        """Block until `rows` rows are buffered, `timeout` passes or the buffer is closed."""
+        with self.ready:
+            self.ready.wait_for(lambda: len(self) >= rows or self.closed, timeout)
+
+    def close(self) -> None:
+        """Wake any waiting reader; buffered rows can still be taken."""
+        with self.ready:
+            self.closed = True
+            self.ready.notify_all()
+
+    def rows(self, block: array) -> List[List[float]]:
+        """Split a flat block from take() into rows."""
+        w = self.width
+        return [block[i:i + w].tolist() for i in range(0, len(block), w)]
+
+
+# ──────────────────────────────────────────────────────────────
+# 💾 Background writer
+# ──────────────────────────────────────────────────────────────
+class BlockWriter:
+    """
+    Drains a RingBuffer on a background thread and hands `write(rows)` whole blocks:
+    every `block` rows, or whatever is buffered after `interval` seconds.
+    `stop()` flushes the rest. If a write raises, the thread stops, keeps the
+    exception in `error` and calls `on_error(error)`.
+    """
+
+    def __init__(self, buffer: RingBuffer, write: Callable[[List[List[float]]], None],
+                 block: int = 256, interval: float = 1.0,
+                 on_error: Optional[Callable[[BaseException], None]] = None):
+        self.buffer = buffer
+        self.write = write
+        self.on_error = on_error
+        self.block = block
+        self.interval = interval
+        self.running = True
+        self.blocks = 0
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, name="block-writer", daemon=True)
+        self.thread.start()
+
+    def _flush(self, limit: Optional[int]) -> None:
+        block = self.buffer.take(limit)
+        if block:
+            self.write(self.buffer.rows(block))
+            self.blocks += 1
+
+    def _run(self) -> None:
+        try:
+            while self.running:
+                self.buffer.wait(self.block, self.interval)
+                self._flush(self.block)
+            while len(self.buffer):
+                self._flush(self.block)
+        except Exception as e:
+            self.error = e
+            print(f"❌ Writer stopped: {e}")
+            if self.on_error:
+                self.on_error(e)
+
+    def stop(self) -> None:
+        self.running = False
+        self.buffer.close()
+        self.thread.join()
+
+
+# ──────────────────────────────────────────────────────────────
+# 🖨️ Console summary
+# ──────────────────────────────────────────────────────────────
+class RateLimitedPrinter:
+    """Calls `show(row)` with the newest row at most once per `every` seconds (0 disables)."""
+
+    def __init__(self, show: Callable[[List[Any]], None], every: float = 1.0):
+        self.show = show
+        self.every = every
+        self.last = -math.inf
+
+    def __call__(self, rows: List[List[Any]]) -> None:
+        if not self.every or not rows:
+            return
+        now = time.monotonic()
+        if now - self.last >= self.every:
+            self.last = now
+            self.show(rows[-1])
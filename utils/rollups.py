@@ -0,0 +1,265 @@
+"""
+Streaming per-channel statistics and multi-resolution rollups.
+
+Every channel keeps O(1) state per window: Welford mean/variance, min/max and
+P² percentile estimators. When a sample crosses into a new window (by its own
+timestamp, so replays roll up the same as live data) the finished window is
+emitted as one row per channel:
+
+    Window_Start, Channel, Count, Mean, Std, Min, Max, P50, P95, P99
+
+Coarser windows merge the finished finer ones for count, mean, std, min and max,
+which stays exact. Percentiles do not merge, so every window's P² estimators
+are fed the raw samples directly.
+"""
+import csv
+import math
+import re
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+PERCENTILES: Tuple[float, ...] = (0.5, 0.95, 0.99)
+DEFAULT_WINDOWS = "1s,1m,1h"
+ROLLUP_COLUMNS = ["Window_Start", "Channel", "Count", "Mean", "Std", "Min", "Max"] + \
+                 [f"P{round(p * 100)}" for p in PERCENTILES]
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_windows(text: str) -> List[Tuple[str, float]]:
+    """Parse "1s,1m,1h" into [(label, seconds), ...]."""
+    windows = []
+    for part in text.split(","):
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd])\s*", part)
+        if not match:
+            raise ValueError(f"❌ Bad rollup window '{part}' (expected e.g. 1s, 5m, 1h)")
+        windows.append((part.strip(), float(match.group(1)) * _UNITS[match.group(2)]))
+    return windows
+
+
+# ──────────────────────────────────────────────────────────────
+# 📐 Estimators
+# ──────────────────────────────────────────────────────────────
+class P2Quantile:
+    """
+    P² streaming quantile estimate (Jain & Chlamtac, 1985): five markers whose
+    heights are nudged with piecewise-parabolic interpolation. O(1) memory.
+    """
+
+    def __init__(self, p: float):
+        self.p = p
+        self.heights: List[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        q = self.heights
+        if not q:
+            return math.nan
+        if len(q) < 5:
+            return q[round(self.p * (len(q) - 1))]
+        return q[2]
+
+
+class ChannelStats:
+    """Welford mean/variance, min/max and P² percentiles of one channel. NaNs are skipped."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max", "quantiles")
+
+    def __init__(self, percentiles: Sequence[float] = PERCENTILES):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.quantiles = [P2Quantile(p) for p in percentiles]
+
+    def add(self, x: float) -> None:
+        if x != x:  # NaN: no reading
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        for q in self.quantiles:
+            q.add(x)
+
+    def add_quantiles(self, x: float) -> None:
+        """Feed only the percentile estimators (for windows whose moments are merged)."""
+        if x != x:
+            return
+        for q in self.quantiles:
+            q.add(x)
+
+    def merge(self, other: "ChannelStats") -> None:
+        """
+        Fold in a finished finer window's moments (Chan et al. parallel variance).
+        Percentiles are not mergeable; they come from add_quantiles().
+        """
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def summary(self) -> List[Any]:
+        """[Count, Mean, Std, Min, Max, percentiles...], empty cells when there was no data."""
+        if not self.count:
+            return [0] + [None] * (4 + len(self.quantiles))
+        return [self.count, self.mean, self.std, self.min, self.max] + [q.value() for q in self.quantiles]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🪟 Windows
+# ──────────────────────────────────────────────────────────────
+class Rollup:
+    """
+    Aggregates into fixed `seconds` windows and calls `on_close(start, stats)` as each
+    one closes. Fed raw values with add(), or finished finer windows with merge()
+    plus the raw values' percentiles with add_quantiles().
+    """
+
+    def __init__(self, channels: Sequence[str], seconds: float,
+                 on_close: Callable[[float, List[ChannelStats]], None]):
+        self.channels = list(channels)
+        self.seconds = seconds
+        self.on_close = on_close
+        self.window: Optional[int] = None
+        self.stats: List[ChannelStats] = []
+
+    def _at(self, t: float) -> None:
+        window = int(t // self.seconds)
+        if window != self.window:
+            self.close()
+            self.window = window
+            self.stats = [ChannelStats() for _ in self.channels]
+
+    def add(self, t: float, values: Sequence[float]) -> None:
+        self._at(t)
+        for stats, value in zip(self.stats, values):
+            stats.add(value)
+
+    def add_quantiles(self, t: float, values: Sequence[float]) -> None:
+        self._at(t)
+        for stats, value in zip(self.stats, values):
+            stats.add_quantiles(value)
+
+    def merge(self, t: float, finer: Sequence[ChannelStats]) -> None:
+        self._at(t)
+        for stats, other in zip(self.stats, finer):
+            stats.merge(other)
+
+    def close(self) -> None:
+        """Emit the window in progress (if any)."""
+        if self.window is None:
+            return
+        window, self.window = self.window, None
+        self.on_close(window * self.seconds, self.stats)
+
+
+class RollupWriter:
+    """
+    Feeds numeric rows (epoch timestamp first) through a chain of Rollups, finest
+    first, and writes each resolution to its own CSV: `<base>_1s.csv`, `<base>_1m.csv`, ...
+    Each window should be a multiple of the next finer one.
+    """
+
+    def __init__(self, base_path: str, channels: Sequence[str], windows: str = DEFAULT_WINDOWS,
+                 columns: Optional[Sequence[str]] = None):
+        self.channels = list(channels)
+        # Positions of the channels in incoming rows (default: right after the timestamp)
+        columns = list(columns) if columns is not None else ["Timestamp"] + self.channels
+        self.index = [columns.index(c) for c in self.channels]
+        self.files = []
+        self.paths: List[str] = []
+        self.rollups: List[Rollup] = []
+
+        parent: Optional[Rollup] = None
+        for label, seconds in sorted(parse_windows(windows), key=lambda w: -w[1]):
+            path = f"{base_path}_{label}.csv"
+            file = open(path, "w", newline="")
+            writer = csv.writer(file)
+            writer.writerow(ROLLUP_COLUMNS)
+            self.files.append(file)
+            self.paths.append(path)
+            parent = Rollup(self.channels, seconds, self._emitter(writer, file, parent))
+            self.rollups.insert(0, parent)
+
+    def _emitter(self, writer: Any, file: Any,
+                 parent: Optional[Rollup]) -> Callable[[float, List[ChannelStats]], None]:
+        def on_close(start: float, stats: List[ChannelStats]) -> None:
+            label = datetime.fromtimestamp(start).isoformat(timespec="seconds")
+            writer.writerows([label, channel, *s.summary()] for channel, s in zip(self.channels, stats))
+            file.flush()
+            if parent is not None:
+                parent.merge(start, stats)
+        return on_close
+
+    def write(self, rows: Sequence[Sequence[float]]) -> None:
+        finest, coarser = self.rollups[0], self.rollups[1:]
+        index = self.index
+        for row in rows:
+            values = [row[i] for i in index]
+            # Finest first: a window it closes is merged up before the parent moves on
+            finest.add(row[0], values)
+            for rollup in coarser:
+                rollup.add_quantiles(row[0], values)
+
+    def close(self) -> None:
+        # Finest first, so each closing window is merged before its parent closes
+        for rollup in self.rollups:
+            rollup.close()
+        for file in self.files:
+            file.close()
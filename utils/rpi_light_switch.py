@@ -1,22 +1,32 @@
 import os
+import sys
 import time
-import board
-import busio
-import requests
 import random
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
-from adafruit_neotrellis.neotrellis import NeoTrellis
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils import hardware
+from utils.govee_groups import GROUP_PREFIX, load_groups, resolve
+from utils.govee_pool import fan_out, make_session
+from utils.govee_queue import QuotaStore
+from utils.govee_registry import DeviceRegistry
+from utils.govee_router import DEVICE_CACHE, RouterClient
+from utils.govee_state import DeviceStateMirror
+from utils.govee_worker import IntentWorker
+from utils.led_frame import OFF, Animation, FrameBuffer, rows
 
 # ─── ENVIRONMENT SETUP ─────────────────────────────────────────────────────────
 
 load_dotenv()
 API_KEY = os.getenv("GOVEE_API_KEY")
-BASE_URL = "https://openapi.api.govee.com"
 HEADERS = {
     "Govee-API-Key": API_KEY,
     "Content-Type": "application/json"
 }
+SESSION = make_session(HEADERS)
 
 # ─── EXCLUSIONS & DEVICE MAPPING ───────────────────────────────────────────────
 
@@ -33,97 +43,124 @@ BUTTON_DEVICE_MAP: Dict[int, str] = {
     6: "kitchen",
     7: "kitchen tall boi",
     8: "Lamp boi",
-    9: "All",
-    10: "Basic Group Control",
+    9: "@all",          # every light mapped above
+    10: "@living room", # room from the groups file (see `lights --groups`)
 }
 
-# Stores light on/off state
-device_states: Dict[str, bool] = {}
+# Daily request budget of the API key (shared with `lights`)
+QUOTA = QuotaStore(API_KEY)
+# Mirrored light state (shared with `lights`), persisted across restarts
+STATE = DeviceStateMirror(quota=QUOTA)
+
+# On/off control through the Govee router, shared with the sensor display
+ROUTER = RouterClient(SESSION, STATE, QUOTA, EXCLUDED_DEVICES)
+fetch_devices = ROUTER.fetch_devices
+fetch_state = ROUTER.fetch_state
+is_on = ROUTER.is_on
+toggle_device = ROUTER.toggle_device
+
+# Rooms and scenes shared with `lights`
+GROUPS = load_groups()
+
+# All HTTP work happens here; the sync loop only queues intents
+WORKER = IntentWorker()
+
+# What each button's LED currently shows, and how many times it was pressed
+led_states: Dict[int, bool] = {}
+press_counts: Dict[int, int] = {}
 
 # ─── TRELLIS INITIALIZATION ────────────────────────────────────────────────────
 
-i2c = busio.I2C(board.SCL, board.SDA)
-trellis = NeoTrellis(i2c)
+# Real or simulated keypad, chosen by HARDWARE_BACKEND
+i2c = hardware.i2c()
+trellis = hardware.neotrellis(i2c)
 
 for i in range(16):
-    trellis.activate_key(i, NeoTrellis.EDGE_RISING)
+    trellis.activate_key(i, trellis.EDGE_RISING)
     trellis.set_callback(i, lambda e: on_button_pressed(e))
-    trellis.pixels[i] = (0, 0, 0)
+
+# All LED writes go through one frame buffer, pushed once per loop iteration
+leds = FrameBuffer(trellis.pixels)
+leds.push()
 
 # ─── HELPERS ───────────────────────────────────────────────────────────────────
 
 def show_trans_flag() -> None:
-    """Display a simple trans flag pattern (blue-white-pink stripes)."""
+    """Show a trans flag (blue-white-pink stripes) for 2 s, then the light states. Non-blocking."""
     colors = [(91, 206, 250), (255, 255, 255), (245, 169, 184)]  # blue, white, pink
-    for y in range(4):
-        row_color = colors[y % 3]
-        for x in range(4):
-            trellis.pixels[y * 4 + x] = row_color
-    time.sleep(2)
-    clear_all_leds()
+    leds.play(Animation([(rows(colors), 2.0)]))
 
 def clear_all_leds() -> None:
     """Turn off all Trellis LEDs."""
-    for i in range(16):
-        trellis.pixels[i] = (0, 0, 0)
+    leds.animation = None
+    leds.fill(OFF)
+    leds.push()
 
 def update_led(index: int, is_on: bool) -> None:
-    """Change LED color based on light state."""
-    trellis.pixels[index] = (random.randint(0,255), random.randint(0,255), random.randint(0,255)) if is_on else (0, 0, 0)
+    """Change LED color based on light state (shown on the next frame push)."""
+    leds.set(index, (random.randint(0,255), random.randint(0,255), random.randint(0,255)) if is_on else OFF)
+
+def set_led(index: int, is_on: bool) -> None:
+    """Show a light state on a button and remember it."""
+    led_states[index] = is_on
+    update_led(index, is_on)
+
+# Cached name/ID index of the router's devices, refreshed after its TTL
+REGISTRY = DeviceRegistry(fetch_devices, DEVICE_CACHE)
 
 def get_devices() -> List[Dict]:
-    """Fetch the list of devices from the Govee API."""
+    """Devices from the cached index (fetched from the Govee API when empty or stale)."""
+    REGISTRY.ensure_fresh()
+    return REGISTRY.devices
+
+def toggle_group(label: str, on: Optional[bool] = None) -> bool:
+    """Toggle (or set) every light in a group as one concurrent batch. Returns the group's new state."""
+    everything = [name for name in BUTTON_DEVICE_MAP.values() if not name.startswith(GROUP_PREFIX)]
     try:
-        res = requests.get(f"{BASE_URL}/router/api/v1/user/devices", headers=HEADERS)
-        return res.json().get("data", []) if res.status_code == 200 else []
-    except Exception as e:
-        print(f"[Error] Failed to fetch devices: {e}")
-        return []
-
-def find_device(devices: List[Dict], name: str) -> Optional[Dict]:
-    """Find a device by name in the list."""
-    return next((d for d in devices if d.get("deviceName") == name), None)
-
-def toggle_device(device: Dict) -> bool:
-    """Toggle a device on/off. Returns the new state (True if on)."""
-    name = device.get("deviceName")
-    if name in EXCLUDED_DEVICES:
-        print(f"[Skip] Excluded: {name}")
+        names = GROUPS.members(label, everything)
+    except KeyError:
+        print(f"[Note] Unknown group: {label}")
         return False
 
-    current_state = device_states.get(name, False)
-    new_state = not current_state
-
-    payload = {
-        "requestId": "request-id",
-        "payload": {
-            "sku": device["sku"],
-            "device": device["device"],
-            "capability": {
-                "type": "devices.capabilities.on_off",
-                "instance": "powerSwitch",
-                "value": 1 if new_state else 0
-            }
-        }
-    }
+    get_devices()
+    members, missing = resolve(names, REGISTRY.find)
+    members = [d for d in members if d.get("deviceName") not in EXCLUDED_DEVICES]
+    for name in missing:
+        print(f"[Error] Device not found: {name}")
+    if not members:
+        return False
 
-    try:
-        res = requests.post(f"{BASE_URL}/router/api/v1/device/control", headers=HEADERS, json=payload)
-        if res.status_code == 200:
-            print(f"[OK] {'On' if new_state else 'Off'}: {name}")
-            device_states[name] = new_state
-            return new_state
-        else:
-            print(f"[Fail] {res.status_code} for {name}")
-    except Exception as e:
-        print(f"[Error] Toggle failed for {name}: {e}")
-
-    return current_state  # Revert to previous state if failed
+    # The group counts as on if any member is on, so one press turns everything off
+    new_state = on if on is not None else not any(is_on(d) for d in members)
+    results = fan_out(lambda d: toggle_device(d, on=new_state), members)
+    done = sum(1 for result in results if result == new_state)
+    print(f"[Group] {label} {'On' if new_state else 'Off'}: {done}/{len(members)}")
+    return new_state if done else not new_state
 
 # ─── BUTTON HANDLER ────────────────────────────────────────────────────────────
 
+def apply_intent(label: str, on: bool) -> Optional[bool]:
+    """Runs on the worker: bring a device or group to the wanted state. Returns the real state."""
+    if label.startswith(GROUP_PREFIX):
+        return toggle_group(label, on=on)
+
+    get_devices()
+    device = REGISTRY.find(label)
+    if not device:
+        print(f"[Error] Device not found: {label}")
+        return None
+    return toggle_device(device, on=on)
+
+def confirm_led(index: int, press: int, wanted: bool, result: Optional[bool]) -> None:
+    """Runs on the sync loop: revert an optimistic LED if the command did not stick."""
+    if press != press_counts.get(index):
+        return  # a newer press owns this LED now
+    if result != wanted:
+        print(f"[Revert] Button {index}")
+        set_led(index, bool(result))
+
 def on_button_pressed(event) -> None:
-    """Toggle light and update LED on button press."""
+    """Flip the LED immediately and queue the light change for the worker."""
     index = event.number
     label = BUTTON_DEVICE_MAP.get(index)
 
@@ -131,24 +168,40 @@ def on_button_pressed(event) -> None:
         print(f"[Note] No mapping for button {index}")
         return
 
-    devices = get_devices()
-    device = find_device(devices, label)
-    if not device:
-        print(f"[Error] Device not found: {label}")
-        return
-
-    new_state = toggle_device(device)
-    update_led(index, new_state)
+    wanted = not led_states.get(index, False)
+    set_led(index, wanted)
+    press = press_counts[index] = press_counts.get(index, 0) + 1
+    WORKER.submit(index, lambda: apply_intent(label, wanted),
+                  on_done=lambda result: confirm_led(index, press, wanted, result))
+
+def load_led_states() -> Dict[int, bool]:
+    """Runs on the worker: mirrored power state of every mapped single-device button."""
+    get_devices()
+    states = {}
+    for index, label in BUTTON_DEVICE_MAP.items():
+        device = None if label.startswith(GROUP_PREFIX) else REGISTRY.find(label)
+        if device:
+            states[index] = STATE.get(device["device"], "power") == "on"
+    return states
+
+def restore_leds(states: Optional[Dict[int, bool]]) -> None:
+    for index, is_on in (states or {}).items():
+        if index not in press_counts:
+            set_led(index, is_on)
 
 # ─── MAIN LOOP ─────────────────────────────────────────────────────────────────
 
 def main() -> None:
     """Main loop for NeoTrellis interaction."""
+    # Warm the device index in the background while the flag shows
+    WORKER.submit("leds", load_led_states, on_done=restore_leds)
     show_trans_flag()
     print("[Ready] NeoTrellis initialized. Listening for input...")
     try:
         while True:
             trellis.sync()
+            WORKER.run_callbacks()
+            leds.tick()
             time.sleep(0.05)
     except KeyboardInterrupt:
         clear_all_leds()
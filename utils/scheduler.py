@@ -0,0 +1,118 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+# ──────────────────────────────────────────────────────────────
+# ⏱️ Periodic tasks
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class Task:
+    """A callable run every `interval` seconds, with timing stats."""
+    name: str
+    interval: float
+    fn: Callable[[], Any]
+    due: float
+    runs: int = 0
+    missed: int = 0        # whole periods skipped because the loop fell behind
+    max_late: float = 0.0  # worst lateness of a run, seconds
+    busy: float = 0.0      # total time spent inside fn, seconds
+    first_run: float = 0.0  # clock time the first and latest runs started
+    last_run: float = 0.0
+
+    def rate(self, elapsed: float) -> float:
+        """Runs per second: intervals between the first and latest run, not run count over elapsed."""
+        if self.runs >= 2 and self.last_run > self.first_run:
+            return (self.runs - 1) / (self.last_run - self.first_run)
+        return self.runs / elapsed if elapsed > 0 else 0.0
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "target_hz": round(1 / self.interval, 3),
+            "achieved_hz": round(self.rate(elapsed), 3),
+            "runs": self.runs,
+            "missed": self.missed,
+            "max_late_ms": round(self.max_late * 1000, 3),
+            "busy_ms": round(self.busy * 1000, 3),
+        }
+
+
+class Scheduler:
+    """
+    Runs tasks at independent rates on one thread, against monotonic deadlines.
+
+    Each deadline is the previous deadline plus the interval (not "now" plus the
+    interval), so slow runs don't accumulate drift. A task that falls more than a
+    whole period behind skips the lost periods instead of bursting to catch up,
+    and counts them in `missed`. Between deadlines the loop sleeps.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self.tasks: List[Task] = []
+        self.running = False
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def every(self, interval: float, fn: Callable[[], Any], name: Optional[str] = None,
+              delay: float = 0.0) -> Task:
+        """Run `fn` every `interval` seconds, first after `delay`."""
+        if interval <= 0:
+            raise ValueError(f"❌ Interval must be positive, got {interval}")
+        task = Task(name or getattr(fn, "__name__", "task"), interval, fn, self.clock() + delay)
+        self.tasks.append(task)
+        return task
+
+    def run_pending(self, now: Optional[float] = None) -> float:
+        """Run every task that is due. Returns seconds until the next deadline."""
+        now = self.clock() if now is None else now
+        for task in self.tasks:
+            if now < task.due:
+                continue
+            task.max_late = max(task.max_late, now - task.due)
+            start = self.clock()
+            task.fn()
+            end = self.clock()
+            if not task.runs:
+                task.first_run = start
+            task.last_run = start
+            task.runs += 1
+            task.busy += end - start
+
+            task.due += task.interval
+            if end >= task.due:
+                skipped = int((end - task.due) // task.interval) + 1
+                task.missed += skipped
+                task.due += skipped * task.interval
+            now = end
+        return min(task.due for task in self.tasks) - self.clock() if self.tasks else 0.0
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """Run until stop() is called or `duration` seconds pass."""
+        self.running = True
+        self.started = self.clock()
+        self.finished = None
+        end = None if duration is None else self.started + duration
+        while self.running:
+            if end is not None and self.clock() >= end:
+                break
+            wait = self.run_pending()
+            if end is not None:
+                wait = min(wait, end - self.clock())
+            if wait > 0:
+                self.sleep(wait)
+        self.running = False
+        self.finished = self.clock()
+
+    def stop(self) -> None:
+        self.running = False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-task achieved vs target rate, missed periods and lateness over the last run()."""
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished if self.finished is not None else self.clock()) - self.started
+        return {task.name: task.summary(elapsed) for task in self.tasks}
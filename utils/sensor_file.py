@@ -0,0 +1,335 @@
+"""
+Chunked binary sensor recordings (.srec).
+
+Layout (little or big endian, as recorded in the header):
+
+    header   MAGIC | u32 schema length | schema JSON | u32 crc32(schema)
+    chunk    b"CHNK" | u32 rows | per column: u32 length, u32 crc32 | u32 crc32(rows + table)
+             | column blocks, column-major, each encoded by the file's codec
+
+The schema lists every column with its array typecode. Each chunk is fsync'd
+as it is written, so a power cut loses at most the chunk in progress; readers
+trust a chunk's block lengths once its table checksum matches and stop at the
+first torn chunk. Reading one column touches only that column's blocks through
+mmap, and each block's checksum is checked as it is read.
+"""
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from utils import gorilla
+from utils.acquisition import CSV_COLUMNS, SENSOR_COLUMNS, VALID_BITS, format_row
+
+MAGIC = b"SREC\x00\x01\r\n"   # \r\n catches files mangled by text-mode transfers
+CHUNK_MAGIC = b"CHNK"
+VERSION = 1
+EXTENSION = ".srec"
+CHUNK_ROWS = 1024
+
+# float32 is plenty for the sensors; time and position keep float64
+COLUMN_TYPES: Dict[str, str] = {"Timestamp": "d", "GPS_Latitude": "d", "GPS_Longitude": "d", "Valid": "B"}
+SENSOR_SCHEMA: List[Tuple[str, str]] = [(name, COLUMN_TYPES.get(name, "f")) for name in CSV_COLUMNS]
+
+Column = Tuple[str, str]
+
+
+# ──────────────────────────────────────────────────────────────
+# 🗜️ Codecs
+# ──────────────────────────────────────────────────────────────
+def _raw_encode(values: array) -> bytes:
+    return values.tobytes()
+
+
+def _raw_decode(data: bytes, typecode: str, rows: int) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+# name → (encode(array) → bytes, decode(bytes, typecode, rows) → array)
+CODECS: Dict[str, Tuple[Callable[[array], bytes], Callable[[bytes, str, int], array]]] = {
+    "raw": (_raw_encode, _raw_decode),
+    "gorilla": (gorilla.encode, gorilla.decode),
+}
+# Codecs whose blocks are in the writer's byte order (gorilla's bit stream is portable)
+NATIVE_ORDER_CODECS = {"raw"}
+
+
+# ──────────────────────────────────────────────────────────────
+# ✍️ Writer
+# ──────────────────────────────────────────────────────────────
+class RecordingWriter:
+    """
+    Appends rows and writes them as checksummed, column-major chunks of
+    `chunk_rows`, fsync'ing after each one.
+    """
+
+    def __init__(self, path: str, columns: Sequence[Column] = SENSOR_SCHEMA, codec: str = "raw",
+                 chunk_rows: int = CHUNK_ROWS):
+        if codec not in CODECS:
+            raise ValueError(f"❌ Unknown codec '{codec}' (expected one of {', '.join(CODECS)})")
+        self.path = path
+        self.columns = list(columns)
+        self.codec = codec
+        self.encode = CODECS[codec][0]
+        self.chunk_rows = chunk_rows
+        self.pending = [array(typecode) for _, typecode in self.columns]
+        self.rows = 0
+        self.chunks = 0
+        self.file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self) -> None:
+        schema = json.dumps({
+            "version": VERSION,
+            "byteorder": sys.byteorder,
+            "codec": self.codec,
+            "columns": self.columns,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(schema)) + schema + struct.pack("<I", zlib.crc32(schema)))
+        self._sync()
+
+    def _sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def append(self, row: Sequence[Any]) -> None:
+        for values, (_, typecode), value in zip(self.pending, self.columns, row):
+            values.append(int(value) if typecode in "bBhHiIlLqQ" else value)
+        if len(self.pending[0]) >= self.chunk_rows:
+            self.flush()
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def flush(self) -> None:
+        """Write buffered rows as one chunk and fsync it."""
+        rows = len(self.pending[0])
+        if not rows:
+            return
+        blocks = [self.encode(values) for values in self.pending]
+        table = struct.pack("<I", rows) + b"".join(struct.pack("<II", len(b), zlib.crc32(b)) for b in blocks)
+        self.file.write(CHUNK_MAGIC + table + struct.pack("<I", zlib.crc32(table)) + b"".join(blocks))
+        self._sync()
+        self.rows += rows
+        self.chunks += 1
+        self.pending = [array(typecode) for _, typecode in self.columns]
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self) -> "RecordingWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# ──────────────────────────────────────────────────────────────
+# 📖 Reader
+# ──────────────────────────────────────────────────────────────
+class CorruptRecording(ValueError):
+    pass
+
+
+class RecordingReader:
+    """
+    Memory-maps a recording and indexes its chunks by their table checksums.
+    Everything from the first torn chunk on (e.g. a power cut mid-write) is ignored
+    and counted in `dropped_bytes`. Column blocks are checked as they are read;
+    the iterators skip a chunk with a corrupt block (e.g. a bad SD card sector)
+    and record its index in `skipped_chunks`, so later good chunks still read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._read_header()
+        self.decode = CODECS[self.codec][1]
+        # per chunk: (rows, [(offset, length, crc) per column])
+        self.chunks: List[Tuple[int, List[Tuple[int, int, int]]]] = []
+        self.dropped_bytes = 0
+        self.skipped_chunks: Set[int] = set()
+        self._index()
+
+    def _read_header(self) -> None:
+        m = self.map
+        if len(m) < len(MAGIC) + 4 or m[:len(MAGIC)] != MAGIC:
+            raise CorruptRecording(f"❌ {self.path} is not a sensor recording")
+        start = len(MAGIC) + 4
+        (length,) = struct.unpack_from("<I", m, len(MAGIC))
+        schema = bytes(m[start:start + length])
+        if len(m) < start + length + 4 or struct.unpack_from("<I", m, start + length)[0] != zlib.crc32(schema):
+            raise CorruptRecording(f"❌ {self.path} has a corrupt header")
+        meta = json.loads(schema)
+        self.version = meta["version"]
+        self.codec = meta["codec"]
+        if self.codec not in CODECS:
+            raise CorruptRecording(f"❌ {self.path} uses unknown codec '{self.codec}'")
+        self.swap = meta["byteorder"] != sys.byteorder and self.codec in NATIVE_ORDER_CODECS
+        self.columns: List[Column] = [tuple(c) for c in meta["columns"]]
+        self.names = [name for name, _ in self.columns]
+        self.created = meta.get("created")
+        self.data_start = start + length + 4
+
+    def _index(self) -> None:
+        m, pos, end = self.map, self.data_start, len(self.map)
+        ncols = len(self.columns)
+        table_size = 4 + 8 * ncols
+        while pos < end:
+            head = pos + len(CHUNK_MAGIC)
+            if m[pos:head] != CHUNK_MAGIC or head + table_size + 4 > end:
+                break
+            table = bytes(m[head:head + table_size])
+            if struct.unpack_from("<I", m, head + table_size)[0] != zlib.crc32(table):
+                break
+            (rows,) = struct.unpack_from("<I", table)
+            offset = head + table_size + 4
+            blocks = []
+            for i in range(ncols):
+                length, crc = struct.unpack_from("<II", table, 4 + 8 * i)
+                blocks.append((offset, length, crc))
+                offset += length
+            if offset > end:
+                break
+            self.chunks.append((rows, blocks))
+            pos = offset
+        self.dropped_bytes = end - pos
+
+    @property
+    def rows(self) -> int:
+        return sum(rows for rows, _ in self.chunks)
+
+    def _block(self, chunk: Tuple[int, List[Tuple[int, int, int]]], index: int, verify: bool = True) -> array:
+        """One column's values from one chunk."""
+        rows, blocks = chunk
+        name, typecode = self.columns[index]
+        offset, length, crc = blocks[index]
+        data = self.map[offset:offset + length]
+        if verify and zlib.crc32(data) != crc:
+            raise CorruptRecording(f"❌ Checksum mismatch in column {name} at byte {offset}")
+        block = self.decode(data, typecode, rows)
+        if self.swap:
+            block.byteswap()
+        return block
+
+    def _blocks(self, number: int, indexes: Sequence[int], verify: bool) -> Optional[List[array]]:
+        """These columns' values from chunk `number`, or None (and skipped) if a block is corrupt."""
+        try:
+            return [self._block(self.chunks[number], index, verify) for index in indexes]
+        except CorruptRecording:
+            self.skipped_chunks.add(number)
+            return None
+
+    def column(self, name: str, verify: bool = True) -> array:
+        """All values of one column, reading only that column's blocks."""
+        index = self.names.index(name)
+        values = array(self.columns[index][1])
+        for number in range(len(self.chunks)):
+            blocks = self._blocks(number, [index], verify)
+            if blocks is not None:
+                values.extend(blocks[0])
+        return values
+
+    def iter_columns(self, names: Sequence[str], verify: bool = True) -> Iterator[List[array]]:
+        """Per chunk, the values of just these columns. Chunks with a corrupt block are skipped."""
+        indexes = [self.names.index(name) for name in names]
+        for number in range(len(self.chunks)):
+            blocks = self._blocks(number, indexes, verify)
+            if blocks is not None:
+                yield blocks
+
+    def iter_rows(self) -> Iterator[List[Any]]:
+        """Rows in order, decoded one chunk at a time."""
+        for columns in self.iter_columns(self.names):
+            yield from (list(row) for row in zip(*columns))
+
+    def close(self) -> None:
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self) -> "RecordingReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔄 CSV conversion
+# ──────────────────────────────────────────────────────────────
+def parse_csv_row(header: Sequence[str], cells: Sequence[str]) -> List[float]:
+    """A sensor CSV row (any column order, ISO timestamp, empty = missing) → numeric row in CSV_COLUMNS order."""
+    values = dict(zip(header, cells))
+    row: List[float] = [datetime.fromisoformat(values["Timestamp"]).timestamp()]
+    for name in CSV_COLUMNS[1:-1]:
+        cell = values.get(name, "")
+        row.append(float(cell) if cell not in ("", "None") else float("nan"))
+    valid = values.get("Valid")
+    if valid:
+        row.append(int(valid))
+    else:
+        # Recordings from before the Valid column: a sensor counts if all its cells are present
+        mask, i = 0, 1
+        for sensor, columns in SENSOR_COLUMNS.items():
+            if all(row[j] == row[j] for j in range(i, i + len(columns))):
+                mask |= VALID_BITS[sensor]
+            i += len(columns)
+        row.append(mask)
+    return row
+
+
+def csv_to_recording(csv_path: str, out_path: str, codec: str = "raw") -> int:
+    """Convert a sensor_data_*.csv file to a recording. Returns the row count."""
+    with open(csv_path, newline="") as f, RecordingWriter(out_path, codec=codec) as writer:
+        reader = csv.reader(f)
+        header = next(reader)
+        for cells in reader:
+            if cells:
+                writer.append(parse_csv_row(header, cells))
+        writer.flush()
+        return writer.rows
+
+
+def shortest_float32(value: float) -> float:
+    """The shortest decimal that reads back as the same float32 (at most 9 digits)."""
+    for digits in range(6, 9):
+        short = float(f"{value:.{digits}g}")
+        if struct.unpack("f", struct.pack("f", short))[0] == value:
+            return short
+    return float(f"{value:.9g}")
+
+
+def recording_to_csv(path: str, csv_path: str) -> int:
+    """Convert a recording back to the sensor CSV layout. Returns the row count."""
+    count = 0
+    with RecordingReader(path) as reader:
+        if reader.names != CSV_COLUMNS:
+            raise CorruptRecording(f"❌ {path} does not use the sensor column layout")
+        # float32 columns print as their shortest exact decimal, not as widened doubles
+        narrow = [i for i, (_, typecode) in enumerate(reader.columns) if typecode == "f"]
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for row in reader.iter_rows():
+                for i in narrow:
+                    row[i] = shortest_float32(row[i])
+                writer.writerow(format_row(row))
+                count += 1
+        if reader.skipped_chunks:
+            print(f"⚠️ Skipped {len(reader.skipped_chunks)} chunk(s) with corrupt column data")
+    return count
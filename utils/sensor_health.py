@@ -0,0 +1,143 @@
+"""
+Per-sensor health tracking and circuit breaking for sensor reads.
+
+A read is retried with exponential backoff. After FAILURE_THRESHOLD failures in a
+row the sensor's circuit opens: reads return None immediately and a single probe
+is attempted every PROBE_INTERVAL seconds (doubling up to MAX_PROBE_INTERVAL
+while it stays dead). A successful probe closes the circuit.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+# ─── Defaults ──────────────────────────────────────────────────────────────────
+MAX_RETRIES = 3
+BASE_BACKOFF = 0.05        # first retry delay, doubled per attempt
+MAX_BACKOFF = 0.5
+FAILURE_THRESHOLD = 5      # consecutive failed attempts before the circuit opens
+PROBE_INTERVAL = 5.0
+MAX_PROBE_INTERVAL = 60.0
+
+
+# ──────────────────────────────────────────────────────────────
+# 🩺 Health
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class SensorHealth:
+    name: str
+    reads: int = 0
+    failures: int = 0          # failed attempts, including retries
+    skipped: int = 0           # reads not attempted because the circuit was open
+    consecutive: int = 0
+    trips: int = 0             # times the circuit has opened
+    failed_probes: int = 0     # probes failed since it last opened
+    open_until: float = 0.0    # while open: monotonic time of the next probe
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    last_error: Optional[str] = None
+
+    @property
+    def open(self) -> bool:
+        return self.consecutive >= FAILURE_THRESHOLD
+
+    def allow(self, now: float) -> bool:
+        """Whether a read may be attempted now (always when closed; one probe when due)."""
+        if not self.open:
+            return True
+        if now >= self.open_until:
+            return True
+        self.skipped += 1
+        return False
+
+    def success(self, latency: float, count: bool = True) -> None:
+        """A working read; with `count=False` it only closes the circuit (e.g. an idle poll)."""
+        if self.open:
+            print(f"✅ {self.name} recovered after {self.failed_probes + 1} probe(s)")
+        self.consecutive = 0
+        if not count:
+            return
+        self.reads += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def failure(self, error: Exception, now: float) -> None:
+        was_open = self.open
+        self.failures += 1
+        self.consecutive += 1
+        self.last_error = str(error)
+        if not self.open:
+            return
+        if was_open:
+            self.failed_probes += 1
+        else:
+            self.trips += 1
+            self.failed_probes = 0
+            print(f"🔌 {self.name} circuit open after {self.consecutive} failures ({error})")
+        self.open_until = now + min(PROBE_INTERVAL * 2 ** self.failed_probes, MAX_PROBE_INTERVAL)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": "open" if self.open else "ok",
+            "reads": self.reads,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "trips": self.trips,
+            "avg_latency_ms": round(self.latency_total / self.reads * 1000, 3) if self.reads else None,
+            "max_latency_ms": round(self.latency_max * 1000, 3),
+            "last_error": self.last_error,
+        }
+
+
+HEALTH: Dict[str, SensorHealth] = {}
+_HEALTH_LOCK = threading.Lock()
+
+
+def health(name: str) -> SensorHealth:
+    with _HEALTH_LOCK:
+        return HEALTH.setdefault(name, SensorHealth(name))
+
+
+# ──────────────────────────────────────────────────────────────
+# 🛡️ Guarded reads
+# ──────────────────────────────────────────────────────────────
+def guarded_read(name: str, func: Callable[[], Any], retries: int = MAX_RETRIES,
+                 count_none: bool = True) -> Optional[Any]:
+    """
+    Read through `name`'s circuit breaker: None if the circuit is open or every
+    attempt failed. An open circuit gets one probe attempt, without retries.
+    With `count_none=False`, a read that returns None (nothing to read yet) is
+    not counted in the sensor's reads and latency.
+    """
+    state = health(name)
+    if not state.allow(time.monotonic()):
+        return None
+
+    attempts = 1 if state.open else retries
+    for attempt in range(1, attempts + 1):
+        start = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            now = time.monotonic()
+            state.failure(e, now)
+            if state.open:
+                return None
+            print(f"⚠️ Error reading {name}: {e} (Attempt {attempt}/{attempts})")
+            if attempt < attempts:
+                time.sleep(min(BASE_BACKOFF * 2 ** (attempt - 1), MAX_BACKOFF))
+            continue
+        state.success(time.monotonic() - start, count=count_none or result is not None)
+        return result
+    return None
+
+
+def print_health() -> None:
+    """One line per sensor: state, reads, failures and latency."""
+    print("🩺 Sensor health:")
+    for name, state in HEALTH.items():
+        s = state.summary()
+        flag = "✅" if s["state"] == "ok" and not s["failures"] else ("🔌" if s["state"] == "open" else "⚠️")
+        latency = f"{s['avg_latency_ms']:.1f}" if s["avg_latency_ms"] is not None else "-"
+        print(f"  {flag} {name:<9} reads: {s['reads']:<6} failures: {s['failures']:<5} "
+              f"skipped: {s['skipped']:<5} latency avg/max: {latency}/{s['max_latency_ms']:.1f} ms")
@@ -0,0 +1,347 @@
+"""
+Sensor hub: one process owns the I2C sensors and publishes their samples to any
+number of local clients over a Unix socket (or TCP), so the display, recorder
+and dashboards share one acquisition instead of fighting over the bus.
+
+Frames are `u8 type | u16 payload length | payload`:
+
+    HELLO      hub → client   JSON {"channels": {name: [columns]}, "rates": {name: hz}}
+    SUBSCRIBE  client → hub   JSON {name: hz}; 0 = every sample, absent = not wanted
+    SAMPLE     hub → client   u8 channel | f64 epoch | one value per column (NaN = missing)
+    NOTICE     hub → client   JSON, e.g. {"dropped": n} before a slow client is cut off
+
+Sample values use the .srec column types (float32, float64 for time and position).
+Publishing never waits on a client: each has a bounded queue, samples that don't
+fit are dropped, and a client whose queue stays full for SLOW_CLIENT_TIMEOUT
+seconds is disconnected.
+"""
+import asyncio
+import json
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from utils.acquisition import SENSOR_COLUMNS, flatten, parse_rates, unflatten
+from utils.sensor_file import COLUMN_TYPES
+
+DEFAULT_ADDRESS = "/tmp/sensor_hub.sock"
+CHANNELS: Dict[str, Tuple[str, ...]] = {**SENSOR_COLUMNS, "gesture": ("Gesture",)}
+NAMES: List[str] = list(CHANNELS)
+
+HELLO, SUBSCRIBE, SAMPLE, NOTICE = 1, 2, 3, 4
+HEADER = struct.Struct("<BH")
+FORMATS: List[struct.Struct] = [
+    struct.Struct("<Bd" + "".join(COLUMN_TYPES.get(column, "f") for column in columns))
+    for columns in CHANNELS.values()
+]
+
+# ─── Defaults ──────────────────────────────────────────────────────────────────
+QUEUE_FRAMES = 256           # per client, on top of the socket's own buffer
+SLOW_CLIENT_TIMEOUT = 5.0    # seconds a client's queue may stay full
+RATE_TOLERANCE = 0.25        # a sample up to this fraction of a period early still counts
+STALE_AFTER = 5.0            # client: older samples read as missing
+CONNECT_TIMEOUT = 3.0
+MAX_BACKOFF = 10.0
+
+
+def frame(kind: int, payload: bytes) -> bytes:
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def json_frame(kind: int, message: Any) -> bytes:
+    return frame(kind, json.dumps(message, separators=(",", ":")).encode())
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """ "host:port" → ("tcp", (host, port)); anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+# ──────────────────────────────────────────────────────────────
+# 📡 Hub
+# ──────────────────────────────────────────────────────────────
+class _Client:
+    """One connection: its subscriptions and the frames waiting to be sent."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        peer = writer.get_extra_info("peername")
+        self.peer = f"{peer[0]}:{peer[1]}" if isinstance(peer, tuple) else "local client"
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(QUEUE_FRAMES)
+        self.intervals: Dict[int, float] = {}   # channel → seconds between samples (0 = all)
+        self.due: Dict[int, float] = {}
+        self.sent = 0
+        self.dropped = 0
+        self.full_since: Optional[float] = None
+        self.closed = False
+
+    def subscribe(self, rates: Dict[str, float]) -> None:
+        self.intervals = {NAMES.index(name): (1 / hz if hz > 0 else 0.0)
+                          for name, hz in rates.items() if name in CHANNELS}
+        self.due = dict.fromkeys(self.intervals, 0.0)
+
+    def offer(self, index: int, data: bytes, now: float) -> None:
+        """Queue a sample if the client wants this channel now; never blocks."""
+        interval = self.intervals.get(index)
+        if interval is None or self.closed:
+            return
+        if interval:
+            due = self.due[index]
+            if now < due - interval * RATE_TOLERANCE:
+                return
+            # Stay on the client's grid; resync after a gap
+            self.due[index] = due + interval if now - due < interval else now + interval
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.full_since is None:
+                self.full_since = now
+            elif now - self.full_since > SLOW_CLIENT_TIMEOUT:
+                self.close({"dropped": self.dropped, "reason": "too slow"})
+            return
+        self.full_since = None
+
+    def close(self, notice: Optional[Dict[str, Any]] = None) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if notice:
+            print(f"🐢 Cutting off {self.peer}: {notice}")
+            self.writer.write(json_frame(NOTICE, notice))
+        self.writer.close()
+        # A client that isn't reading would never let the buffered frames flush
+        asyncio.get_running_loop().call_later(1.0, self.writer.transport.abort)
+
+
+class SensorHub:
+    """
+    Polls each reader on a worker thread at its own rate and fans the samples out
+    to subscribed clients. `readers` map channel names to SensorReader-style read
+    functions (None when there is nothing to publish).
+    """
+
+    def __init__(self, readers: Dict[str, Callable[[], Optional[Any]]], rates: Dict[str, float]):
+        unknown = set(readers) - set(CHANNELS)
+        if unknown:
+            raise ValueError(f"❌ Unknown hub channel(s): {', '.join(sorted(unknown))}")
+        self.readers = readers
+        self.rates = rates
+        self.clients: Set[_Client] = set()
+        self.published = 0
+        # One worker per sensor, so a slow read only delays its own channel
+        self.pool = ThreadPoolExecutor(max_workers=len(readers), thread_name_prefix="hub-read")
+        self.hello = json_frame(HELLO, {"channels": CHANNELS, "rates": rates})
+
+    def publish(self, name: str, timestamp: float, reading: Any) -> None:
+        index = NAMES.index(name)
+        values = [math.nan if v is None else v for v in flatten(name, reading)]
+        data = frame(SAMPLE, FORMATS[index].pack(index, timestamp, *values))
+        now = time.monotonic()
+        for client in list(self.clients):
+            client.offer(index, data, now)
+        self.published += 1
+
+    async def _sample(self, name: str, read: Callable[[], Optional[Any]], rate: float) -> None:
+        loop = asyncio.get_running_loop()
+        interval = 1 / rate
+        due = loop.time()
+        while True:
+            try:
+                reading = await loop.run_in_executor(self.pool, read)
+            except Exception as e:
+                print(f"⚠️ Hub read of {name} failed: {e}")
+                reading = None
+            if reading is not None:
+                self.publish(name, time.time(), reading)
+            due += interval
+            now = loop.time()
+            if due < now:
+                due = now  # fell behind: skip the lost periods
+            await asyncio.sleep(due - now)
+
+    async def _send(self, client: _Client) -> None:
+        writer = client.writer
+        while not client.closed:
+            writer.write(await client.queue.get())
+            client.sent += 1
+            while not client.queue.empty():
+                writer.write(client.queue.get_nowait())
+                client.sent += 1
+            await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer)
+        writer.write(self.hello)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._send(client))
+        print(f"🔗 {client.peer} connected ({len(self.clients)} client(s))")
+        try:
+            while True:
+                kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                payload = await reader.readexactly(length)
+                if kind == SUBSCRIBE:
+                    client.subscribe(json.loads(payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            client.close()
+            print(f"👋 {client.peer} left: {client.sent} sent, {client.dropped} dropped")
+
+    async def serve(self, address: str = DEFAULT_ADDRESS) -> None:
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)  # left over from a hub that didn't shut down cleanly
+            server = await asyncio.start_unix_server(self._handle, path=target)
+        else:
+            server = await asyncio.start_server(self._handle, *target)
+        samplers = [asyncio.create_task(self._sample(name, read, self.rates[name]))
+                    for name, read in self.readers.items()]
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in samplers:
+                task.cancel()
+            self.pool.shutdown(wait=False)
+            if kind == "unix" and os.path.exists(target):
+                os.unlink(target)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔌 Client
+# ──────────────────────────────────────────────────────────────
+def _read_frame(stream: Any) -> Tuple[int, bytes]:
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ConnectionError("hub closed the connection")
+    kind, length = HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise ConnectionError("hub closed the connection")
+    return kind, payload
+
+
+class HubClient:
+    """
+    Subscribes to a hub from a background thread (reconnecting as needed) and keeps
+    the latest reading per channel. `rates` maps sensor names to Hz (0 = every
+    sample); None subscribes to everything. Gestures are always delivered.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, rates: Optional[Dict[str, float]] = None,
+                 stale_after: float = STALE_AFTER):
+        self.address = address
+        self.rates = rates
+        self.stale_after = stale_after
+        self.latest: Dict[str, Tuple[float, float, Tuple[Any, ...]]] = {}   # name → (mono, epoch, reading)
+        self.gestures: Deque[int] = deque(maxlen=16)
+        self.ready = threading.Event()
+        self.running = True
+        self.sock: Optional[socket.socket] = None
+        self.thread = threading.Thread(target=self._run, name="hub-client", daemon=True)
+        self.thread.start()
+
+    def _connect(self) -> socket.socket:
+        kind, target = parse_address(self.address)
+        if kind == "tcp":
+            return socket.create_connection(target, timeout=CONNECT_TIMEOUT)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(target)
+        return sock
+
+    def _run(self) -> None:
+        backoff, warned = 0.5, False
+        while self.running:
+            try:
+                with self._connect() as sock:
+                    sock.settimeout(None)
+                    self.sock = sock
+                    backoff, warned = 0.5, False
+                    self._session(sock)
+            except (OSError, ValueError) as e:
+                if self.running and not warned:
+                    print(f"⚠️ Sensor hub {self.address} unavailable ({e}); retrying")
+                    warned = True
+            if self.running:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def _session(self, sock: socket.socket) -> None:
+        stream = sock.makefile("rb")
+        kind, payload = _read_frame(stream)
+        if kind != HELLO:
+            raise ValueError("not a sensor hub")
+        offered = json.loads(payload)["channels"]
+        wanted = {name: 0.0 for name in offered} if self.rates is None else {**self.rates, "gesture": 0.0}
+        sock.sendall(json_frame(SUBSCRIBE, wanted))
+        pending = {name for name in wanted if name in SENSOR_COLUMNS}
+
+        while self.running:
+            kind, payload = _read_frame(stream)
+            if kind == NOTICE:
+                print(f"⚠️ Sensor hub: {json.loads(payload)}")
+                continue
+            if kind != SAMPLE:
+                continue
+            index, timestamp, *values = FORMATS[payload[0]].unpack(payload)
+            name = NAMES[index]
+            if name == "gesture":
+                self.gestures.append(int(values[0]))
+                continue
+            self.latest[name] = (time.monotonic(), timestamp, unflatten(name, values))
+            if pending:
+                pending.discard(name)
+                if not pending:
+                    self.ready.set()
+
+    def reading(self, name: str) -> Optional[Tuple[Any, ...]]:
+        """The latest reading for `name`, or None if there is none or it is stale."""
+        entry = self.latest.get(name)
+        if entry is None or time.monotonic() - entry[0] > self.stale_after:
+            return None
+        return entry[2]
+
+    def gesture(self) -> int:
+        """The oldest undelivered gesture, or 0."""
+        try:
+            return self.gestures.popleft()
+        except IndexError:
+            return 0
+
+    def close(self) -> None:
+        self.running = False
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.thread.join(1.0)
+
+
+_SHARED: Optional[HubClient] = None
+
+
+def shared() -> HubClient:
+    """The process-wide client for SENSOR_HUB (rates from SENSOR_HUB_RATES, default: everything)."""
+    global _SHARED
+    if _SHARED is None:
+        from utils import hardware
+        rates = parse_rates(os.getenv("SENSOR_HUB_RATES")) or None
+        _SHARED = HubClient(hardware.HUB or DEFAULT_ADDRESS, rates)
+        # Give slow channels (1 Hz BME680/GPS) a chance to arrive before the first read
+        _SHARED.ready.wait(CONNECT_TIMEOUT)
+    return _SHARED
@@ -0,0 +1,91 @@
+"""
+Per-sensor reader threads sharing one I2C bus.
+
+Each sensor is polled on its own thread and rate, so a slow or retrying device
+only delays its own samples. Drivers are wrapped in `LockedDevice`, which holds
+a per-bus lock for every property read or method call, so transactions from
+different threads never interleave on the wire.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from utils.scheduler import Scheduler
+
+_BUS_LOCKS: Dict[int, threading.RLock] = {}
+_BUS_LOCKS_GUARD = threading.Lock()
+
+
+def bus_lock(bus: Any) -> threading.RLock:
+    """The lock shared by every device on `bus`."""
+    with _BUS_LOCKS_GUARD:
+        return _BUS_LOCKS.setdefault(id(bus), threading.RLock())
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔒 Bus-locked driver proxy
+# ──────────────────────────────────────────────────────────────
+class LockedDevice:
+    """
+    Proxy for a sensor driver: attribute reads, writes and method calls run under
+    the bus lock. Locking is per access (e.g. one `acceleration` read), so retry
+    sleeps in the caller never hold the bus.
+    """
+
+    def __init__(self, device: Any, lock: threading.RLock):
+        object.__setattr__(self, "_device", device)
+        object.__setattr__(self, "_lock", lock)
+
+    def __getattr__(self, name: str) -> Any:
+        with self._lock:
+            value = getattr(self._device, name)
+        if not callable(value):
+            return value
+
+        def locked(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return value(*args, **kwargs)
+        return locked
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        with self._lock:
+            setattr(self._device, name, value)
+
+
+def locked(device: Any, bus: Any) -> LockedDevice:
+    return LockedDevice(device, bus_lock(bus))
+
+
+# ──────────────────────────────────────────────────────────────
+# 🧵 Reader threads
+# ──────────────────────────────────────────────────────────────
+class SensorThread:
+    """Calls `sample()` every `1/rate` seconds on a daemon thread until stopped."""
+
+    def __init__(self, name: str, sample: Callable[[], Any], rate: float):
+        self.name = name
+        self.wake = threading.Event()
+        self.scheduler = Scheduler(sleep=self.wake.wait)
+        self.task = self.scheduler.every(1 / rate, sample, name=name)
+        self.thread = threading.Thread(target=self._run, name=f"sensor-{name}", daemon=True)
+
+    def _run(self) -> None:
+        try:
+            self.scheduler.run()
+        except Exception as e:
+            print(f"❌ {self.name} reader stopped: {e}")
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop polling. A read stuck past `timeout` is abandoned (the thread is a daemon)."""
+        deadline = time.monotonic() + timeout
+        # Repeat until the thread exits, in case it was still starting up
+        while self.thread.is_alive() and time.monotonic() < deadline:
+            self.scheduler.stop()
+            self.wake.set()
+            self.thread.join(0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.scheduler.stats()[self.name]
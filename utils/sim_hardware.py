@@ -0,0 +1,484 @@
+"""
+Simulated I2C hardware for running and benchmarking the sensor and keypad code off a Pi.
+
+Readings are smooth functions of elapsed time plus seeded noise, so runs are repeatable.
+Behaviour is tuned with environment variables:
+
+    SIM_SEED           noise seed (default 42)
+    SIM_LATENCY        seconds per bus transaction at 100 kHz; a number for every device,
+                       "name=value,..." per device, or "realistic" for measured-ish defaults
+    SIM_FAILURE_RATE   probability a transaction raises OSError; number or "name=value,..."
+    SIM_GESTURE_RATE   random APDS9960 swipes per second (default 0)
+    SIM_KEY_RATE       random NeoTrellis presses per second (default 0)
+    SIM_DISPLAY_ECHO   print what the 14-segment display shows (default 0)
+"""
+import errno
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Per-transaction transfer time at 100 kHz, roughly what the real drivers cost
+REALISTIC_LATENCY: Dict[str, float] = {
+    "lsm9ds1": 0.0008,
+    "apds9960": 0.0005,
+    "bme680": 0.0006,
+    "gps": 0.0030,
+    "neotrellis": 0.0005,
+    "seg14x4": 0.0015,
+}
+
+BASE_FREQUENCY = 100_000
+
+# Somewhere in Brooklyn
+HOME = (40.6782, -73.9442)
+
+
+def _per_device(name: str, default: float = 0.0) -> Dict[str, float]:
+    """Parse "0.01" or "bme680=0.2,gps=0.01" (with "*" as the fallback) into a lookup."""
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return {"*": default}
+    if raw == "realistic" and name == "SIM_LATENCY":
+        return {**REALISTIC_LATENCY, "*": 0.0}
+    if "=" not in raw:
+        return {"*": float(raw)}
+    values = {"*": default}
+    for part in raw.split(","):
+        key, _, value = part.partition("=")
+        values[key.strip().lower()] = float(value)
+    return values
+
+
+LATENCY = _per_device("SIM_LATENCY")
+FAILURE_RATE = _per_device("SIM_FAILURE_RATE")
+SEED = int(os.getenv("SIM_SEED", "42"))
+
+
+# ──────────────────────────────────────────────────────────────
+# 🔌 Bus
+# ──────────────────────────────────────────────────────────────
+class SimI2C:
+    """
+    Stand-in for busio.I2C. Every device access is one transaction that holds the
+    bus lock for its latency, so concurrent readers contend like on the real bus.
+    Transfer time scales inversely with the bus frequency.
+    """
+
+    def __init__(self, frequency: int = BASE_FREQUENCY):
+        self.frequency = frequency
+        self.lock = threading.Lock()
+        self.transactions = 0
+        self.failures = 0
+        self.rng = random.Random(SEED)
+        self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @contextmanager
+    def transaction(self, device: str):
+        latency = LATENCY.get(device, LATENCY["*"]) * BASE_FREQUENCY / self.frequency
+        failure_rate = FAILURE_RATE.get(device, FAILURE_RATE["*"])
+        with self.lock:
+            self.transactions += 1
+            if latency:
+                time.sleep(latency)
+            if failure_rate and self.rng.random() < failure_rate:
+                self.failures += 1
+                raise OSError(errno.EREMOTEIO, f"Remote I/O error ({device})")
+            yield
+
+    # busio.I2C API used by drivers and tools
+    def try_lock(self) -> bool:
+        return self.lock.acquire(blocking=False)
+
+    def unlock(self) -> None:
+        self.lock.release()
+
+    def scan(self) -> List[int]:
+        return [0x1C, 0x2E, 0x39, 0x6A, 0x70, 0x77, 0x10]
+
+    def deinit(self) -> None:
+        pass
+
+
+class _SimDevice:
+    name = "device"
+
+    def __init__(self, bus: SimI2C):
+        self.bus = bus
+        self.rng = random.Random(f"{SEED}-{self.name}")
+
+    def _read(self, fn: Callable[[float], Any]) -> Any:
+        """One bus transaction returning fn(elapsed seconds)."""
+        with self.bus.transaction(self.name):
+            return fn(self.bus.elapsed())
+
+    def _noise(self, scale: float) -> float:
+        return self.rng.gauss(0, scale)
+
+
+# ──────────────────────────────────────────────────────────────
+# 📡 Sensors
+# ──────────────────────────────────────────────────────────────
+def _walking(t: float) -> float:
+    """1 while 'walking' (20 s out of every 60 s), easing in and out."""
+    phase = t % 60
+    return max(0.0, min(1.0, min(phase - 30, 50 - phase) / 2)) if 30 <= phase <= 50 else 0.0
+
+
+class SimLSM9DS1(_SimDevice):
+    name = "lsm9ds1"
+
+    @property
+    def acceleration(self) -> Tuple[float, float, float]:
+        def read(t: float) -> Tuple[float, float, float]:
+            step = 1.5 * _walking(t) * math.sin(2 * math.pi * 1.8 * t)
+            return (0.3 * math.sin(0.5 * t) + self._noise(0.02),
+                    0.2 * math.sin(0.33 * t) + self._noise(0.02),
+                    9.81 + step + self._noise(0.03))
+        return self._read(read)
+
+    @property
+    def gyro(self) -> Tuple[float, float, float]:
+        return self._read(lambda t: (0.15 * math.cos(0.5 * t) + self._noise(0.005),
+                                     0.066 * math.cos(0.33 * t) + self._noise(0.005),
+                                     0.05 + self._noise(0.005)))
+
+    @property
+    def magnetic(self) -> Tuple[float, float, float]:
+        def read(t: float) -> Tuple[float, float, float]:
+            heading = 0.05 * t
+            return (0.3 * math.cos(heading) + self._noise(0.003),
+                    0.3 * math.sin(heading) + self._noise(0.003),
+                    -0.4 + self._noise(0.003))
+        return self._read(read)
+
+    @property
+    def temperature(self) -> float:
+        return self._read(lambda t: 24.0 + 0.5 * math.sin(t / 300) + self._noise(0.05))
+
+
+class SimAPDS9960(_SimDevice):
+    name = "apds9960"
+
+    def __init__(self, bus: SimI2C):
+        super().__init__(bus)
+        self.enable_proximity = False
+        self.enable_color = False
+        self.enable_gesture = False
+        self.gesture_rate = float(os.getenv("SIM_GESTURE_RATE", "0"))
+        self.last_gesture = time.monotonic()
+        self.queued_gestures: Deque[int] = deque()
+
+    def swipe(self, gesture: int) -> None:
+        """Inject a gesture (0x01 up, 0x02 down, 0x03 left, 0x04 right)."""
+        self.queued_gestures.append(gesture)
+
+    @property
+    def proximity(self) -> int:
+        def read(t: float) -> int:
+            # Someone walks up for ~5 s every 45 s
+            phase = t % 45
+            near = math.sin(math.pi * (phase - 40) / 5) if phase >= 40 else 0.0
+            return max(0, min(255, int(8 + 230 * near + self._noise(2))))
+        return self._read(read)
+
+    @property
+    def color_data(self) -> Tuple[int, int, int, int]:
+        def read(t: float) -> Tuple[int, int, int, int]:
+            clear = 800 + 200 * math.sin(t / 300) + self._noise(5)
+            return (int(clear * 0.35), int(clear * 0.4), int(clear * 0.25), int(clear))
+        return self._read(read)
+
+    @property
+    def color_data_ready(self) -> bool:
+        return True
+
+    def gesture(self) -> int:
+        def read(t: float) -> int:
+            if self.queued_gestures:
+                return self.queued_gestures.popleft()
+            now = time.monotonic()
+            elapsed, self.last_gesture = now - self.last_gesture, now
+            if self.gesture_rate and self.rng.random() < self.gesture_rate * elapsed:
+                return self.rng.choice((0x01, 0x02))
+            return 0
+        return self._read(read)
+
+
+class SimBME680(_SimDevice):
+    name = "bme680"
+
+    def __init__(self, bus: SimI2C):
+        super().__init__(bus)
+        self.sea_level_pressure = 1013.25
+
+    @property
+    def temperature(self) -> float:
+        return self._read(lambda t: 22.0 + 2.0 * math.sin(t / 600) + self._noise(0.02))
+
+    @property
+    def humidity(self) -> float:
+        return self._read(lambda t: 45.0 + 5.0 * math.sin(t / 900) + self._noise(0.1))
+
+    relative_humidity = humidity
+
+    @property
+    def pressure(self) -> float:
+        return self._read(lambda t: 1013.25 + 1.5 * math.sin(t / 1800) + self._noise(0.01))
+
+    @property
+    def gas(self) -> int:
+        def read(t: float) -> int:
+            # VOC spike every two minutes drops gas resistance for ~10 s
+            spike = 0.7 if (t % 120) >= 110 else 0.0
+            return int(50000 * (1 - spike) + self._noise(150))
+        return self._read(read)
+
+    @property
+    def altitude(self) -> float:
+        return 44330 * (1.0 - math.pow(self.pressure / self.sea_level_pressure, 0.1903))
+
+
+def _nmea(body: str) -> str:
+    checksum = 0
+    for char in body:
+        checksum ^= ord(char)
+    return f"${body}*{checksum:02X}"
+
+
+def _nmea_coord(value: float, lat: bool) -> Tuple[str, str]:
+    hemisphere = ("N" if value >= 0 else "S") if lat else ("E" if value >= 0 else "W")
+    value = abs(value)
+    degrees = int(value)
+    minutes = (value - degrees) * 60
+    return (f"{degrees:02d}{minutes:07.4f}" if lat else f"{degrees:03d}{minutes:07.4f}"), hemisphere
+
+
+class SimGPS(_SimDevice):
+    """
+    GPS_GtopI2C stand-in. The module emits GGA, GSA and RMC once a second into a
+    small buffer; each update() consumes one sentence and returns False when empty.
+    """
+    name = "gps"
+    BUFFER_SENTENCES = 12
+
+    def __init__(self, bus: SimI2C):
+        super().__init__(bus)
+        self.buffer: Deque[str] = deque(maxlen=self.BUFFER_SENTENCES)
+        self.emitted_until = 0
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+        self.speed_knots: Optional[float] = None
+        self.track_angle_deg: Optional[float] = None
+        self.altitude_m: Optional[float] = None
+        self.fix_quality = 0
+        self.satellites: Optional[int] = None
+        self.horizontal_dilution: Optional[float] = None
+        self.timestamp_utc: Optional[time.struct_time] = None
+        self.nmea_sentence: Optional[str] = None
+        self.dropped = 0
+
+    @property
+    def has_fix(self) -> bool:
+        return self.fix_quality >= 1
+
+    def send_command(self, command: bytes, add_checksum: bool = True) -> None:
+        with self.bus.transaction(self.name):
+            pass
+
+    def _position(self, t: float) -> Tuple[float, float, float, float]:
+        # Slow loop around home, ~1.5 knots
+        angle = t / 600
+        lat = HOME[0] + 0.002 * math.sin(angle)
+        lon = HOME[1] + 0.002 * math.cos(angle)
+        return lat, lon, 1.5 + 0.3 * math.sin(t / 30), (math.degrees(angle) + 90) % 360
+
+    def _emit(self, t: float) -> None:
+        # Anything older than the buffer would have been overwritten anyway
+        first = max(self.emitted_until, int(t) + 1 - self.BUFFER_SENTENCES // 3)
+        self.dropped += 3 * (first - self.emitted_until)
+        for second in range(first, int(t) + 1):
+            lat, lon, knots, track = self._position(second)
+            stamp = time.strftime("%H%M%S", time.gmtime(time.time() - (t - second)))
+            date = time.strftime("%d%m%y", time.gmtime())
+            lat_s, ns = _nmea_coord(lat, True)
+            lon_s, ew = _nmea_coord(lon, False)
+            satellites = 7 + (second // 20) % 4
+            hdop = 0.9 + 0.1 * (second % 5)
+            sentences = [
+                _nmea(f"GPGGA,{stamp}.000,{lat_s},{ns},{lon_s},{ew},1,{satellites:02d},{hdop:.2f},12.0,M,-34.0,M,,"),
+                _nmea("GPGSA,A,3,01,03,08,11,14,17,22,28,,,,,1.80,{:.2f},1.50".format(hdop)),
+                _nmea(f"GPRMC,{stamp}.000,A,{lat_s},{ns},{lon_s},{ew},{knots:.2f},{track:.2f},{date},,,A"),
+            ]
+            for sentence in sentences:
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.dropped += 1
+                self.buffer.append(sentence)
+        self.emitted_until = int(t) + 1
+
+    def _parse(self, sentence: str) -> None:
+        fields = sentence[1:sentence.index("*")].split(",")
+        kind = fields[0][2:]
+
+        def coord(value: str, hemisphere: str, width: int) -> float:
+            degrees = float(value[:width]) + float(value[width:]) / 60
+            return -degrees if hemisphere in ("S", "W") else degrees
+
+        if kind == "GGA":
+            self.latitude = coord(fields[2], fields[3], 2)
+            self.longitude = coord(fields[4], fields[5], 3)
+            self.fix_quality = int(fields[6])
+            self.satellites = int(fields[7])
+            self.horizontal_dilution = float(fields[8])
+            self.altitude_m = float(fields[9])
+        elif kind == "RMC":
+            self.speed_knots = float(fields[7])
+            self.track_angle_deg = float(fields[8])
+            self.timestamp_utc = time.gmtime()
+
+    def update(self) -> bool:
+        """Consume one pending NMEA sentence; False if none was waiting."""
+        def read(t: float) -> bool:
+            self._emit(t)
+            if not self.buffer:
+                return False
+            self.nmea_sentence = self.buffer.popleft()
+            self._parse(self.nmea_sentence)
+            return True
+        return self._read(read)
+
+
+# ──────────────────────────────────────────────────────────────
+# 🎛️ Keypad & display
+# ──────────────────────────────────────────────────────────────
+class SimPixels:
+    """
+    Seesaw NeoPixel stand-in. Like the real driver, every pixel assignment is its
+    own bus write into the seesaw buffer, and auto_write adds a show() per pixel.
+    """
+
+    def __init__(self, bus: SimI2C, n: int = 16):
+        self.bus = bus
+        self.n = n
+        self.auto_write = True
+        self.brightness = 1.0
+        self.buffer: List[Tuple[int, int, int]] = [(0, 0, 0)] * n
+        self.shown: List[Tuple[int, int, int]] = list(self.buffer)
+        self.writes = 0
+        self.shows = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.buffer[index]
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            for i, color in zip(range(*index.indices(self.n)), value):
+                self[i] = color
+            return
+        with self.bus.transaction("neotrellis"):
+            self.writes += 1
+            self.buffer[index] = tuple(value)
+        if self.auto_write:
+            self.show()
+
+    def fill(self, color: Tuple[int, int, int]) -> None:
+        auto_write, self.auto_write = self.auto_write, False
+        for i in range(self.n):
+            self[i] = color
+        self.auto_write = auto_write
+        if auto_write:
+            self.show()
+
+    def show(self) -> None:
+        with self.bus.transaction("neotrellis"):
+            self.shows += 1
+            self.shown = list(self.buffer)
+
+
+class _KeyEvent:
+    def __init__(self, number: int, edge: int):
+        self.number = number
+        self.edge = edge
+
+
+class SimNeoTrellis(_SimDevice):
+    name = "neotrellis"
+    EDGE_HIGH, EDGE_LOW, EDGE_FALLING, EDGE_RISING = 0, 1, 2, 3
+
+    def __init__(self, bus: SimI2C):
+        super().__init__(bus)
+        self.pixels = SimPixels(bus)
+        self.callbacks: Dict[int, Callable[[Any], None]] = {}
+        self.active: Dict[int, set] = {}
+        self.queued: Deque[int] = deque()
+        self.key_rate = float(os.getenv("SIM_KEY_RATE", "0"))
+        self.last_sync = time.monotonic()
+
+    def activate_key(self, key: int, edge: int, enable: bool = True) -> None:
+        edges = self.active.setdefault(key, set())
+        (edges.add if enable else edges.discard)(edge)
+
+    def set_callback(self, key: int, function: Callable[[Any], None]) -> None:
+        self.callbacks[key] = function
+
+    def press(self, key: int) -> None:
+        """Inject a key press, delivered on the next sync()."""
+        self.queued.append(key)
+
+    def sync(self) -> None:
+        """Scan the keypad (one transaction) and fire callbacks for rising edges."""
+        with self.bus.transaction(self.name):
+            now = time.monotonic()
+            elapsed, self.last_sync = now - self.last_sync, now
+            if self.key_rate and self.rng.random() < self.key_rate * elapsed:
+                self.queued.append(self.rng.randrange(16))
+            presses = list(self.queued)
+            self.queued.clear()
+
+        for key in presses:
+            if self.EDGE_RISING in self.active.get(key, ()) and key in self.callbacks:
+                self.callbacks[key](_KeyEvent(key, self.EDGE_RISING))
+
+
+class SimSeg14x4(_SimDevice):
+    name = "seg14x4"
+
+    def __init__(self, bus: SimI2C, address: int = 0x70):
+        super().__init__(bus)
+        self.address = address
+        self.auto_write = True
+        self.brightness = 1.0
+        self.text = ""
+        self.echo = os.getenv("SIM_DISPLAY_ECHO", "0") == "1"
+
+    def _write(self, text: str) -> None:
+        with self.bus.transaction(self.name):
+            self.text = text[-4:] if len(text) > 4 else text
+        if self.echo:
+            print(f"[Display] {self.text!r}")
+
+    def fill(self, color: int) -> None:
+        self._write("    " if not color else "████")
+
+    def print(self, value: Any) -> None:
+        self._write(str(value))
+
+    def show(self) -> None:
+        self._write(self.text)
+
+    def marquee(self, text: str, delay: float = 0.25, loop: bool = True) -> None:
+        """Scroll text once across the display; blocks like the real driver (loop is ignored)."""
+        padded = "    " + text
+        for i in range(len(padded) - 3):
+            self._write(padded[i:i + 4])
+            time.sleep(delay)
@@ -0,0 +1,119 @@
+"""
+Sensor drivers that read from a source instead of the I2C bus.
+
+A source is anything with `reading(name)` (the SensorReader tuple for that
+sensor, or None) and `gesture()`: a ReplaySource playing a recording, or a
+HubClient subscribed to the sensor hub. The drivers expose the same properties
+as the Adafruit ones, so scripts don't know the difference. A sensor with no
+reading raises OSError, like a failed bus transaction.
+"""
+import errno
+from typing import Any, Optional, Tuple
+
+
+class VirtualDevice:
+    name = ""
+
+    def __init__(self, source: Any):
+        self.source = source
+
+    def _reading(self) -> Tuple[Any, ...]:
+        reading = self.source.reading(self.name)
+        if reading is None:
+            raise OSError(errno.EREMOTEIO, f"{self.name} has no reading from {type(self.source).__name__}")
+        return reading
+
+
+class VirtualLSM9DS1(VirtualDevice):
+    name = "lsm9ds1"
+
+    @property
+    def acceleration(self) -> Tuple[float, float, float]:
+        return self._reading()[0]
+
+    @property
+    def gyro(self) -> Tuple[float, float, float]:
+        return self._reading()[1]
+
+    @property
+    def magnetic(self) -> Tuple[float, float, float]:
+        return self._reading()[2]
+
+    @property
+    def temperature(self) -> float:
+        return self._reading()[3]
+
+
+class VirtualAPDS9960(VirtualDevice):
+    name = "apds9960"
+
+    def __init__(self, source: Any):
+        super().__init__(source)
+        self.enable_proximity = False
+        self.enable_color = False
+        self.enable_gesture = False
+
+    @property
+    def proximity(self) -> int:
+        return self._reading()[0]
+
+    @property
+    def color_data(self) -> Tuple[int, int, int, int]:
+        return self._reading()[1]
+
+    @property
+    def color_data_ready(self) -> bool:
+        return True
+
+    def gesture(self) -> int:
+        return self.source.gesture()
+
+
+class VirtualBME680(VirtualDevice):
+    name = "bme680"
+
+    @property
+    def temperature(self) -> float:
+        return self._reading()[0]
+
+    @property
+    def gas(self) -> int:
+        return int(self._reading()[1])
+
+    @property
+    def humidity(self) -> float:
+        return self._reading()[2]
+
+    @property
+    def pressure(self) -> float:
+        return self._reading()[3]
+
+
+class VirtualGPS(VirtualDevice):
+    name = "gps"
+
+    def __init__(self, source: Any):
+        super().__init__(source)
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+        self.speed_knots: Optional[float] = None
+        self.fix_quality = 0
+        self.satellites: Optional[int] = None
+        self.horizontal_dilution: Optional[float] = None
+
+    @property
+    def has_fix(self) -> bool:
+        return self.fix_quality >= 1
+
+    def send_command(self, command: bytes, add_checksum: bool = True) -> None:
+        pass
+
+    def update(self) -> bool:
+        reading = self.source.reading(self.name)
+        if reading is None or reading[0] != reading[0]:
+            self.fix_quality = 0
+            return False
+        self.latitude, self.longitude, speed = reading
+        self.speed_knots = None if speed != speed else speed
+        self.fix_quality = 1
+        return True